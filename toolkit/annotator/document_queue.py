@@ -0,0 +1,181 @@
+import json
+import logging
+import random
+import time
+from typing import List, Optional, Tuple
+
+import redis
+from texta_elastic.core import ElasticCore
+from texta_elastic.document import ESDocObject
+
+from toolkit.settings import ANNOTATOR_QUEUE_BATCH_SIZE, ANNOTATOR_QUEUE_EXPIRE_SECONDS, ANNOTATOR_QUEUE_LOW_WATERMARK, ANNOTATOR_QUEUE_REFILL_WAIT_SECONDS, BROKER_URL, CELERY_SHORT_TERM_TASK_QUEUE, ERROR_LOGGER
+
+
+QUEUE_NEW = "new"
+QUEUE_SKIPPED = "skipped"
+QUEUE_ANNOTATED = "annotated"
+QUEUE_KINDS = (QUEUE_NEW, QUEUE_SKIPPED, QUEUE_ANNOTATED)
+
+_redis: Optional[redis.Redis] = None
+
+
+def get_redis() -> redis.Redis:
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis.from_url(BROKER_URL, socket_timeout=3)
+    return _redis
+
+
+class DocumentQueue:
+    """
+    Per-annotator queue of document references kept in Redis, which is filled with
+    shuffled batches of matching documents so that serving the next document to an
+    annotator wouldn't need a random scoring pass over the whole index every time.
+    """
+
+
+    def __init__(self, job_pk: int, kind: str, indices: List[str], query: dict):
+        self.job_pk = job_pk
+        self.kind = kind
+        self.indices = indices
+        self.query = query
+        self.key = DocumentQueue.get_key(job_pk, kind)
+        self.lock_key = DocumentQueue.get_lock_key(job_pk, kind)
+
+
+    @staticmethod
+    def get_key(job_pk: int, kind: str) -> str:
+        return f"texta:annotator:{job_pk}:{kind}:queue"
+
+
+    @staticmethod
+    def get_lock_key(job_pk: int, kind: str) -> str:
+        return f"{DocumentQueue.get_key(job_pk, kind)}:refill"
+
+
+    @staticmethod
+    def for_annotator(annotator, kind: str) -> "DocumentQueue":
+        return DocumentQueue(annotator.pk, kind, annotator.get_indices(), annotator.get_pull_query(kind))
+
+
+    def pull(self) -> Optional[dict]:
+        """Returns the next document from the queue which still matches the query, refilling the queue when needed."""
+        try:
+            for _ in range(ANNOTATOR_QUEUE_BATCH_SIZE):
+                entry = get_redis().lpop(self.key)
+                if entry is None:
+                    # Refilling an empty queue can't be left for later as the caller is waiting for a document.
+                    added = self._refill_while_waiting()
+                    if added is None:
+                        return self._get_random_document()
+                    if added == 0:
+                        return None
+                    continue
+
+                index, document_id = json.loads(entry)
+                self._schedule_refill()
+                # Documents could have been annotated through other means after they were queued.
+                if self._matches_query(index, document_id):
+                    return ESDocObject(document_id=document_id, index=index).document
+            return None
+
+        except redis.RedisError as e:
+            logging.getLogger(ERROR_LOGGER).exception(e)
+            return self._get_random_document()
+
+
+    def refill(self) -> int:
+        """
+        Adds a randomly ordered batch of matching documents, which are not queued yet, into the queue.
+        :return: Amount of documents added.
+        """
+        queued = [json.loads(entry) for entry in get_redis().lrange(self.key, 0, -1)]
+        queued_ids = [document_id for _, document_id in queued]
+        body = {
+            "query": {
+                "function_score": {
+                    "query": {"bool": {"must": [self.query.get("query", {"match_all": {}})], "must_not": [{"ids": {"values": queued_ids}}]}},
+                    "random_score": {"seed": random.randint(0, 2 ** 31 - 1), "field": "_seq_no"},
+                    "boost_mode": "replace"
+                }
+            },
+            "_source": False,
+            "size": ANNOTATOR_QUEUE_BATCH_SIZE
+        }
+        response = ElasticCore().es.search(index=",".join(self.indices), body=body)
+        entries = [json.dumps(self._hit_to_reference(hit)) for hit in response["hits"]["hits"]]
+        if entries:
+            pipeline = get_redis().pipeline()
+            pipeline.rpush(self.key, *entries)
+            pipeline.expire(self.key, ANNOTATOR_QUEUE_EXPIRE_SECONDS)
+            pipeline.execute()
+        return len(entries)
+
+
+    def acquire_refill_lock(self) -> bool:
+        return bool(get_redis().set(self.lock_key, 1, nx=True, ex=ANNOTATOR_QUEUE_EXPIRE_SECONDS))
+
+
+    def release_refill_lock(self):
+        get_redis().delete(self.lock_key)
+
+
+    def clear(self):
+        get_redis().delete(self.key, self.lock_key)
+
+
+    @staticmethod
+    def clear_all(job_pk: int):
+        """Removes every queue of the annotation job, for when the queued documents are no longer valid."""
+        keys = []
+        for kind in QUEUE_KINDS:
+            keys += [DocumentQueue.get_key(job_pk, kind), DocumentQueue.get_lock_key(job_pk, kind)]
+        try:
+            get_redis().delete(*keys)
+        except redis.RedisError as e:
+            # The queues expire on their own and every document is checked against the query before it's served.
+            logging.getLogger(ERROR_LOGGER).exception(e)
+
+
+    def _refill_while_waiting(self) -> Optional[int]:
+        """
+        Refills the queue under the same lock as the background refill, so that both wouldn't queue the same documents.
+        When a background refill is already running, waits for it to finish instead.
+        :return: Amount of documents available in the queue afterwards or None when the running refill took too long.
+        """
+        if self.acquire_refill_lock():
+            try:
+                return self.refill()
+            finally:
+                self.release_refill_lock()
+
+        deadline = time.monotonic() + ANNOTATOR_QUEUE_REFILL_WAIT_SECONDS
+        while get_redis().exists(self.lock_key):
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.05)
+        return get_redis().llen(self.key)
+
+
+    def _schedule_refill(self):
+        if get_redis().llen(self.key) >= ANNOTATOR_QUEUE_LOW_WATERMARK:
+            return
+        # Only a single refill per queue should be running at a time.
+        if self.acquire_refill_lock():
+            from toolkit.annotator.tasks import refill_annotator_queue
+            refill_annotator_queue.apply_async(args=(self.job_pk, self.kind), queue=CELERY_SHORT_TERM_TASK_QUEUE)
+
+
+    def _get_random_document(self) -> Optional[dict]:
+        document = ESDocObject.random_document(indices=self.indices, query=self.query)
+        return document.document if document else None
+
+
+    def _matches_query(self, index: str, document_id: str) -> bool:
+        body = {"query": {"bool": {"filter": [self.query.get("query", {"match_all": {}}), {"ids": {"values": [document_id]}}]}}}
+        return ElasticCore().es.count(index=index, body=body)["count"] > 0
+
+
+    @staticmethod
+    def _hit_to_reference(hit: dict) -> Tuple[str, str]:
+        return hit["_index"], hit["_id"]
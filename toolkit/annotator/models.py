@@ -4,6 +4,7 @@ from typing import List, Optional
 
 from django.contrib.auth.models import User
 from django.db import models
+from django.dispatch import receiver
 from texta_elastic.document import ESDocObject
 
 from toolkit.core.project.models import Project
@@ -236,23 +237,32 @@ class Annotator(TaskModel):
         add_entity_task.apply_async(args=(self.pk, document_id, texta_facts, index, user.pk), queue=CELERY_LONG_TERM_TASK_QUEUE)
 
 
-    def pull_document(self) -> Optional[dict]:
+    def get_pull_query(self, kind: str) -> dict:
         """
-        Function for returning a new Elasticsearch document for annotation.
-        :return:
+        Returns the query matching the documents to serve for the given queue.
+        :param kind: Either new, skipped or annotated documents, see toolkit.annotator.document_queue.
         """
         from texta_elastic.core import ElasticCore
+        from toolkit.annotator.document_queue import QUEUE_ANNOTATED, QUEUE_SKIPPED
 
         ec = ElasticCore()
         json_query = json.loads(self.query)
-        indices = self.get_indices()
-        query = ec.get_annotation_query(json_query, job_pk=self.pk)
-        document = ESDocObject.random_document(indices=indices, query=query)
+        if kind == QUEUE_SKIPPED:
+            return ec.get_skipped_annotation_query(json_query, self.pk)
+        elif kind == QUEUE_ANNOTATED:
+            return ec.get_annotated_annotation_query(query=json_query, job_pk=self.pk)
+        return ec.get_annotation_query(json_query, job_pk=self.pk)
+
+
+    def pull_document(self) -> Optional[dict]:
+        """
+        Function for returning a new Elasticsearch document for annotation.
+        :return:
+        """
+        from toolkit.annotator.document_queue import DocumentQueue, QUEUE_NEW
+
         # At one point in time, the documents will rune out.
-        if document:
-            return document.document
-        else:
-            return None
+        return DocumentQueue.for_annotator(self, QUEUE_NEW).pull()
 
 
     def skip_document(self, document_id: str, index: str, user) -> bool:
@@ -288,18 +298,10 @@ class Annotator(TaskModel):
         Returns all the documents that are marked for skipping.
         :return:
         """
-        from texta_elastic.core import ElasticCore
+        from toolkit.annotator.document_queue import DocumentQueue, QUEUE_SKIPPED
 
-        ec = ElasticCore()
-        json_query = json.loads(self.query)
-        indices = self.get_indices()
-        query = ec.get_skipped_annotation_query(json_query, self.pk)
-        document = ESDocObject.random_document(indices=indices, query=query)
         # At one point in time, the documents will rune out.
-        if document:
-            return document.document
-        else:
-            return None
+        return DocumentQueue.for_annotator(self, QUEUE_SKIPPED).pull()
 
 
     def pull_annotated_document(self) -> Optional[dict]:
@@ -307,18 +309,10 @@ class Annotator(TaskModel):
         Returns an already annotated document for validation purposes.
         :return:
         """
-        from texta_elastic.core import ElasticCore
+        from toolkit.annotator.document_queue import DocumentQueue, QUEUE_ANNOTATED
 
-        ec = ElasticCore()
-        json_query = json.loads(self.query)
-        indices = self.get_indices()
-        query = ec.get_annotated_annotation_query(query=json_query, job_pk=self.pk)
-        document = ESDocObject.random_document(indices=indices, query=query)
         # At one point in time, the documents will run out.
-        if document:
-            return document.document
-        else:
-            return None
+        return DocumentQueue.for_annotator(self, QUEUE_ANNOTATED).pull()
 
 
     def reset_processed_records(self, indices: List[str], query: dict):
@@ -328,7 +322,10 @@ class Annotator(TaskModel):
         :param query: Elasticsearch query to subset the documents of the indices for the reset.
         :return:
         """
-        pass
+        from toolkit.annotator.document_queue import DocumentQueue
+
+        # Queued documents were picked by their state before the reset.
+        DocumentQueue.clear_all(self.pk)
 
 
     @staticmethod
@@ -359,6 +356,16 @@ class Annotator(TaskModel):
             ec.add_texta_meta_mapping(index)
 
 
+@receiver(models.signals.post_delete, sender=Annotator)
+def auto_delete_annotator_queues_on_delete(sender, instance: Annotator, **kwargs):
+    """
+    Delete the document queues of the annotator from Redis
+    when the corresponding `Annotator` object is deleted.
+    """
+    from toolkit.annotator.document_queue import DocumentQueue
+    DocumentQueue.clear_all(instance.pk)
+
+
 class AnnotatorGroup(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE, default=None, null=True)
     parent = models.ForeignKey(Annotator, on_delete=models.CASCADE)
@@ -6,17 +6,18 @@ from typing import List
 import texta_mlp.settings
 from celery.decorators import task
 from django.contrib.auth.models import User
-from elasticsearch.helpers import streaming_bulk
+from elasticsearch.helpers import parallel_bulk, streaming_bulk
 from texta_elastic.core import ElasticCore
-from texta_elastic.document import ESDocObject, ElasticDocument
+from texta_elastic.document import ESDocObject
 from texta_elastic.mapping_tools import get_selected_fields, update_field_types, update_mapping
 from texta_elastic.searcher import ElasticSearcher
 
+from toolkit.annotator.document_queue import DocumentQueue
 from toolkit.annotator.models import Annotator, AnnotatorGroup
 from toolkit.base_tasks import BaseTask
 from toolkit.core.project.models import Project
 from toolkit.elastic.index.models import Index
-from toolkit.settings import ERROR_LOGGER, INFO_LOGGER
+from toolkit.settings import ANNOTATOR_BULK_THREAD_COUNT, ERROR_LOGGER, INFO_LOGGER
 from toolkit.tools.show_progress import ShowProgress
 
 
@@ -60,15 +61,6 @@ def apply_elastic_search(elastic_search, flatten_doc=False):
         yield new_doc
 
 
-def annotator_bulk_generator(generator, index: str):
-    for document in generator:
-        yield {
-            "_index": index,
-            "_type": "_doc",
-            "_source": document
-        }
-
-
 def add_doc_uuid(generator: ElasticSearcher):
     """
     Add unique document ID's so that annotations across multiple sub-indices could be mapped together in the end. Refer to https://git.texta.ee/texta/texta-rest/-/issues/589
@@ -91,11 +83,27 @@ def add_doc_uuid(generator: ElasticSearcher):
                 }
 
 
-def bulk_add_documents(elastic_search: ElasticSearcher, elastic_doc: ElasticDocument, index: str, chunk_size: int, flatten_doc=False):
+def annotator_fan_out_generator(generator, indices: List[str]):
+    for document in generator:
+        for index in indices:
+            yield {
+                "_index": index,
+                "_type": "_doc",
+                "_source": document
+            }
+
+
+def fan_out_documents(elastic_search: ElasticSearcher, elastic_wrapper: ElasticCore, indices: List[str], chunk_size: int, flatten_doc=False):
+    """
+    Scrolls the source documents once and copies every batch into all the given indices,
+    sending the bulk requests concurrently.
+    """
     new_docs = apply_elastic_search(elastic_search, flatten_doc)
-    actions = annotator_bulk_generator(new_docs, index)
-    # No need to wait for indexing to actualize, hence refresh is False.
-    elastic_doc.bulk_add_generator(actions=actions, chunk_size=chunk_size, refresh="wait_for")
+    actions = annotator_fan_out_generator(new_docs, indices)
+    for success, info in parallel_bulk(client=elastic_wrapper.es, actions=actions, thread_count=ANNOTATOR_BULK_THREAD_COUNT, chunk_size=chunk_size):
+        if not success:
+            logging.getLogger(ERROR_LOGGER).exception(json.dumps(info))
+    elastic_wrapper.es.indices.refresh(index=",".join(indices))
 
 
 def __add_meta_to_original_index(indices: List[str], index_fields: List[str], show_progress: ShowProgress, query: dict, scroll_size: int, elastic_wrapper: ElasticCore):
@@ -144,6 +152,15 @@ def add_entity_task(self, pk: int, document_id: str, texta_facts: List[dict], in
         annotator_obj.generate_record(document_id, index=index, user_pk=user_obj.pk, do_annotate=True)
 
 
+@task(name="refill_annotator_queue", base=BaseTask, bind=True)
+def refill_annotator_queue(self, pk: int, kind: str):
+    queue = DocumentQueue.for_annotator(Annotator.objects.get(pk=pk), kind)
+    try:
+        queue.refill()
+    finally:
+        queue.release_refill_lock()
+
+
 @task(name="annotator_task", base=BaseTask, bind=True)
 def annotator_task(self, annotator_task_id):
     annotator_obj = Annotator.objects.get(pk=annotator_task_id)
@@ -195,10 +212,13 @@ def annotator_task(self, annotator_task_id):
 
         show_progress = ShowProgress(task_object, multiplier=1)
         show_progress.update_step("scrolling data")
-        show_progress.update_view(0)
+        show_progress.update_view()
 
         __add_meta_to_original_index(indices, index_fields, show_progress, query, scroll_size, ec)
 
+        # The schema of the copies depends only on the source indices, so it's the same for every user.
+        schema_input = update_field_types(indices, all_fields, field_type, flatten_doc=False)
+
         for new_annotator in new_annotators:
             new_annotator_obj = Annotator.objects.create(
                 annotator_uid=f"{annotator_obj.description}_{new_annotator}_{annotator_obj.pk}",
@@ -214,39 +234,26 @@ def annotator_task(self, annotator_task_id):
                 entity_configuration=annotator_obj.entity_configuration,
             )
             new_annotator_obj.annotator_users.add(new_annotator)
-            for new_index in new_indices:
-                logging.getLogger(INFO_LOGGER).info(f"New Index check {new_index} for user {new_annotator}")
-                logging.getLogger(INFO_LOGGER).info(f"Index object {indices}")
+            for index in indices:
+                new_index = f"{index}_{new_annotator}_{annotator_obj.pk}"
+                logging.getLogger(INFO_LOGGER).info(f"Updating index schema for index {new_index}")
+                updated_schema = update_mapping(schema_input, new_index, add_facts_mapping, add_texta_meta_mapping=True)
 
-                for index in indices:
-                    if new_index == f"{index}_{new_annotator}_{annotator_obj.pk}":
+                logging.getLogger(INFO_LOGGER).info(f"Creating new index {new_index} for user {new_annotator}")
+                ElasticCore().create_index(new_index, updated_schema)
 
-                        elastic_search = ElasticSearcher(indices=indices, field_data=all_fields, callback_progress=show_progress, query=query, scroll_size=scroll_size)
-                        elastic_doc = ElasticDocument(new_index)
-
-                        logging.getLogger(INFO_LOGGER).info(f"Updating index schema for index {new_index}")
-                        ''' the operations that don't require a mapping update have been completed '''
-                        schema_input = update_field_types(indices, all_fields, field_type, flatten_doc=False)
-                        updated_schema = update_mapping(schema_input, new_index, add_facts_mapping, add_texta_meta_mapping=True)
-
-                        logging.getLogger(INFO_LOGGER).info(f"Creating new index {new_index} for user {new_annotator}")
-                        # create new_index
-                        create_index_res = ElasticCore().create_index(new_index, updated_schema)
-
-                        index_model, is_created = Index.objects.get_or_create(name=new_index, defaults={"added_by": annotator_obj.author.username})
-                        project_obj.indices.add(index_model)
-                        index_user = index_model.name.rsplit('_', 2)[1]
-                        if str(index_user) == str(new_annotator):
-                            new_annotator_obj.indices.add(index_model)
-
-                        logging.getLogger(INFO_LOGGER).info("Indexing documents.")
-                        # set new_index name as mapping name
-                        bulk_add_documents(elastic_search, elastic_doc, index=new_index, chunk_size=scroll_size, flatten_doc=False)
+                index_model, is_created = Index.objects.get_or_create(name=new_index, defaults={"added_by": annotator_obj.author.username})
+                project_obj.indices.add(index_model)
+                new_annotator_obj.indices.add(index_model)
 
             new_annotator_obj.save()
             annotator_group_children.append(new_annotator_obj.id)
             logging.getLogger(INFO_LOGGER).info(f"Saving new annotator object ID {new_annotator_obj.id}")
 
+        logging.getLogger(INFO_LOGGER).info(f"Indexing documents into {len(new_indices)} indices.")
+        elastic_search = ElasticSearcher(indices=indices, field_data=all_fields, callback_progress=show_progress, query=query, scroll_size=scroll_size)
+        fan_out_documents(elastic_search, ec, new_indices, chunk_size=scroll_size, flatten_doc=False)
+
         new_annotator_obj.add_annotation_mapping(new_indices)
         new_annotator_obj.add_texta_meta_mapping(new_indices)
 
@@ -1,13 +1,17 @@
 # Create your tests here.
 import json
+from unittest import mock
 
+import redis
 from django.urls import reverse
 from django.test import override_settings
 from rest_framework import status
 from rest_framework.test import APITestCase
 from texta_elastic.core import ElasticCore
 
+from toolkit.annotator.document_queue import DocumentQueue, QUEUE_NEW, get_redis
 from toolkit.annotator.models import Annotator
+from toolkit.annotator.tasks import refill_annotator_queue
 from toolkit.elastic.index.models import Index
 from toolkit.helper_functions import reindex_test_dataset
 from toolkit.settings import TEXTA_ANNOTATOR_KEY
@@ -487,3 +491,112 @@ class MultilabelAnnotatorTests(APITestCase):
         annotations_after = model_object_after.annotated
         print_output("run_empty_multilabel_annotation:annotations_after", annotations_after)
         self.assertTrue(annotations_after == annotations_before + 1)
+
+
+@override_settings(CELERY_ALWAYS_EAGER=True)
+class DocumentQueueTests(APITestCase):
+
+    def setUp(self):
+        self.test_index_name = reindex_test_dataset()
+        self.user = create_test_user('annotator', 'my@email.com', 'pw')
+        self.project = project_creation("documentQueueTestProject", self.test_index_name, self.user)
+        self.project.users.add(self.user)
+        self.client.login(username='annotator', password='pw')
+        self.ec = ElasticCore()
+
+        payload = {
+            "description": "Queued annotation.",
+            "indices": [{"name": self.test_index_name}],
+            "query": json.dumps(TEST_QUERY),
+            "fields": [TEST_FIELD],
+            "annotation_type": "binary",
+            "annotating_users": ["annotator"],
+            "binary_configuration": {
+                "fact_name": "TOXICITY",
+                "pos_value": "DO_DELETE",
+                "neg_value": "SAFE"
+            }
+        }
+        response = self.client.post(reverse("v2:annotator-list", kwargs={"project_pk": self.project.pk}), data=payload, format="json")
+        self.assertTrue(response.status_code == status.HTTP_201_CREATED)
+        self.annotator = Annotator.objects.get(pk=response.data["id"])
+        self.queue = DocumentQueue.for_annotator(self.annotator, QUEUE_NEW)
+        self.queue.clear()
+
+
+    def tearDown(self) -> None:
+        self.queue.clear()
+        self.ec.delete_index(index=self.test_index_name, ignore=[400, 404])
+
+
+    def _get_queued(self):
+        return [json.loads(entry) for entry in get_redis().lrange(self.queue.key, 0, -1)]
+
+
+    @mock.patch("toolkit.annotator.document_queue.ANNOTATOR_QUEUE_LOW_WATERMARK", 0)
+    def test_documents_are_pulled_in_queue_order(self):
+        self.assertTrue(self.queue.refill() > 0)
+        queued = self._get_queued()
+        for index, document_id in queued[:3]:
+            document = self.queue.pull()
+            self.assertEqual((document["_index"], document["_id"]), (index, document_id))
+        self.assertEqual(self._get_queued(), queued[3:])
+
+
+    @mock.patch("toolkit.annotator.document_queue.ANNOTATOR_QUEUE_BATCH_SIZE", 5)
+    @mock.patch("toolkit.annotator.document_queue.ANNOTATOR_QUEUE_LOW_WATERMARK", 5)
+    def test_queue_is_refilled_below_the_low_watermark(self):
+        self.assertEqual(self.queue.refill(), 5)
+        with mock.patch("toolkit.annotator.tasks.refill_annotator_queue.apply_async") as apply_async:
+            document = self.queue.pull()
+            self.queue.pull()
+        # Four were left after the pull, so a single background refill was scheduled under the lock.
+        apply_async.assert_called_once()
+        self.assertEqual(apply_async.call_args[1]["args"], (self.annotator.pk, QUEUE_NEW))
+        self.assertTrue(get_redis().exists(self.queue.lock_key))
+
+        refill_annotator_queue(self.annotator.pk, QUEUE_NEW)
+        queued = self._get_queued()
+        self.assertEqual(len(queued), 8)
+        self.assertEqual(len(set(document_id for index, document_id in queued)), 8)
+        self.assertFalse(get_redis().exists(self.queue.lock_key))
+        self.assertTrue(document)
+
+
+    @mock.patch("toolkit.annotator.document_queue.ANNOTATOR_QUEUE_LOW_WATERMARK", 0)
+    def test_documents_annotated_after_queueing_are_skipped(self):
+        self.queue.refill()
+        queued = self._get_queued()
+        index, document_id = queued[0]
+        self.annotator.skip_document(document_id, index, self.user)
+        self.ec.es.indices.refresh(index=index)
+
+        document = self.queue.pull()
+        self.assertEqual((document["_index"], document["_id"]), tuple(queued[1]))
+
+
+    @mock.patch("toolkit.annotator.document_queue.ANNOTATOR_QUEUE_REFILL_WAIT_SECONDS", 0.2)
+    def test_pulling_waits_for_a_running_refill_instead_of_refilling_again(self):
+        self.assertTrue(self.queue.acquire_refill_lock())
+        document = self.queue.pull()
+        # The lock holder didn't finish in time, so a random document is served without touching the queue.
+        self.assertTrue(document)
+        self.assertEqual(self._get_queued(), [])
+        self.queue.release_refill_lock()
+
+        self.assertTrue(self.queue.pull())
+        self.assertTrue(len(self._get_queued()) > 0)
+
+
+    def test_random_document_is_served_when_redis_is_down(self):
+        with mock.patch("toolkit.annotator.document_queue.get_redis", side_effect=redis.ConnectionError("Redis is down")):
+            document = self.queue.pull()
+        self.assertTrue(document)
+        self.assertEqual(document["_index"], self.annotator.get_indices()[0])
+
+
+    def test_queues_are_removed_with_the_annotator(self):
+        self.queue.refill()
+        self.assertTrue(get_redis().exists(self.queue.key))
+        self.annotator.delete()
+        self.assertFalse(get_redis().exists(self.queue.key))
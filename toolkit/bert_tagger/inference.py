@@ -0,0 +1,59 @@
+from typing import Dict, List, Union
+
+import torch
+from texta_bert_tagger.tagger import BertTagger
+
+from toolkit.tools.quantization import get_model_size
+
+
+def get_loaded_size(tagger: BertTagger) -> int:
+    """Measures the memory imprint of the loaded tagger by the size of its tensors, including the packed weights of quantized layers."""
+    model = getattr(tagger, "model", None)
+    if model is None:
+        return 0
+    return get_model_size(model)
+
+
+def supports_batching(tagger: BertTagger) -> bool:
+    return getattr(tagger, "model", None) is not None and callable(getattr(tagger, "tokenizer", None)) and bool(getattr(tagger.config, "label_reverse_index", None))
+
+
+def get_label(tagger: BertTagger, label_index: int) -> str:
+    # Label indices are integers in freshly trained taggers and strings in the ones loaded from JSON.
+    label_reverse_index = tagger.config.label_reverse_index
+    return label_reverse_index.get(label_index, label_reverse_index.get(str(label_index)))
+
+
+def tag_texts(tagger: BertTagger, texts: List[str], max_length: int, batch_size: int) -> List[Dict[str, Union[str, float]]]:
+    """
+    Predicts the texts in batches, returning the results in the same format as BertTagger.tag_text.
+    Texts are bucketed by their length so that the texts of a batch need as little padding as possible,
+    the results are returned in the order of the input texts.
+    """
+    if not supports_batching(tagger):
+        return [tagger.tag_text(text) for text in texts]
+
+    model = tagger.model
+    model.eval()
+    device = next(model.parameters()).device
+
+    results = [None] * len(texts)
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    for start in range(0, len(order), batch_size):
+        bucket = order[start:start + batch_size]
+        encoded = tagger.tokenizer(
+            [texts[i] for i in bucket],
+            add_special_tokens=True,
+            max_length=max_length,
+            truncation=True,
+            padding="longest",
+            return_attention_mask=True,
+            return_tensors="pt"
+        )
+        with torch.no_grad():
+            outputs = model(encoded["input_ids"].to(device), token_type_ids=None, attention_mask=encoded["attention_mask"].to(device))
+        probabilities, label_indices = torch.softmax(outputs[0], dim=1).max(dim=1)
+
+        for i, probability, label_index in zip(bucket, probabilities.tolist(), label_indices.tolist()):
+            results[i] = {"prediction": get_label(tagger, label_index), "probability": probability}
+    return results
@@ -5,8 +5,9 @@ import pathlib
 import secrets
 import tempfile
 import zipfile
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Union
 
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core import serializers
 from django.db import models, transaction
@@ -16,6 +17,7 @@ from texta_bert_tagger.tagger import BertTagger as TextBertTagger
 from texta_elastic.searcher import EMPTY_QUERY
 
 from toolkit.bert_tagger import choices
+from toolkit.bert_tagger.inference import get_loaded_size, tag_texts
 from toolkit.constants import MAX_DESC_LEN
 from toolkit.core.project.models import Project
 from toolkit.core.task.models import Task
@@ -24,6 +26,11 @@ from toolkit.elastic.tools.feedback import Feedback
 from toolkit.helper_functions import get_core_setting
 from toolkit.model_constants import CommonModelMixin, FavoriteModelMixin, S3ModelMixin
 from toolkit.settings import (BASE_DIR, BERT_CACHE_DIR, BERT_FINETUNED_MODEL_DIRECTORY, BERT_PRETRAINED_MODEL_DIRECTORY, CELERY_LONG_TERM_TASK_QUEUE)
+from toolkit.tools.model_cache import ModelCache, get_file_mtime
+from toolkit.tools.quantization import get_quantized_accuracy_delta, quantize_tagger, sample_examples
+
+
+BERT_TAGGER_CACHE = ModelCache("bert_tagger", max_items=settings.BERT_TAGGER_CACHE_MAX_ITEMS, max_bytes=settings.BERT_TAGGER_CACHE_MAX_BYTES)
 
 
 class BertTagger(FavoriteModelMixin, CommonModelMixin, S3ModelMixin):
@@ -44,6 +51,7 @@ class BertTagger(FavoriteModelMixin, CommonModelMixin, S3ModelMixin):
 
     # BERT params
     use_gpu = models.BooleanField(default=True)
+    use_cpu_fast_inference = models.BooleanField(default=False)
 
     num_epochs = models.IntegerField(default=choices.DEFAULT_NUM_EPOCHS)
     split_ratio = models.FloatField(default=choices.DEFAULT_TRAINING_SPLIT)
@@ -65,6 +73,8 @@ class BertTagger(FavoriteModelMixin, CommonModelMixin, S3ModelMixin):
     precision = models.FloatField(default=None, null=True)
     recall = models.FloatField(default=None, null=True)
     f1_score = models.FloatField(default=None, null=True)
+    # Accuracy of the quantized CPU model minus the accuracy of the full precision one, measured on training examples.
+    quantized_accuracy_delta = models.FloatField(default=None, null=True)
     classes = models.TextField(default=json.dumps([]))
 
     balance = models.BooleanField(default=choices.DEFAULT_BALANCE)
@@ -194,14 +204,18 @@ class BertTagger(FavoriteModelMixin, CommonModelMixin, S3ModelMixin):
         return {"plot": self.plot.path, "model": self.model.path}
 
 
-    def load_tagger(self):
-        """Load BERT tagger from disc."""
+    def load_tagger(self, quantize: Optional[bool] = None):
+        """
+        Load BERT tagger from disc.
+        :param quantize: Whether to quantize the model for fast CPU inference, defaults to the setting of the tagger.
+        """
+        quantize = self.use_cpu_fast_inference if quantize is None else quantize
         # NB! Saving pretrained models must be disabled!
         tagger = TextBertTagger(
             allow_standard_output=choices.DEFAULT_ALLOW_STANDARD_OUTPUT,
             save_pretrained=False,
             pretrained_models_dir=BERT_PRETRAINED_MODEL_DIRECTORY,
-            use_gpu=self.use_gpu,
+            use_gpu=self.use_gpu and not quantize,
             # logger = logging.getLogger(INFO_LOGGER),
             cache_dir=BERT_CACHE_DIR
         )
@@ -211,9 +225,43 @@ class BertTagger(FavoriteModelMixin, CommonModelMixin, S3ModelMixin):
             tagger.config.use_state_dict = True
         else:
             tagger.config.use_state_dict = False
+        if quantize:
+            quantize_tagger(tagger)
         return tagger
 
 
+    def evaluate_quantization(self, data: Dict[str, List[str]]) -> float:
+        """
+        Compares the accuracy of the quantized tagger against the full precision one on a sample of the given examples.
+        The examples are the ones the tagger was trained on, so the delta shows how much quantization changes
+        the predictions, not how accurate either model is on unseen documents.
+        """
+        examples = sample_examples(data, settings.QUANTIZATION_EVALUATION_SAMPLE_SIZE)
+        full_tagger = self.load_tagger(quantize=False)
+        quantized_tagger = self.load_tagger(quantize=True)
+        return get_quantized_accuracy_delta(
+            full_predict=lambda texts: [prediction["result"] for prediction in self.apply_loaded_tagger_to_texts(full_tagger, texts)],
+            quantized_predict=lambda texts: [prediction["result"] for prediction in self.apply_loaded_tagger_to_texts(quantized_tagger, texts)],
+            examples=examples
+        )
+
+
+    def load_cached_tagger(self):
+        """
+        Loading BERT tagger from the per-process cache, falls back to the disc on a cache miss.
+        The cache key contains the model file and its modification time, so retrained models are never served from the cache.
+        """
+        model_path = self.model.path if self.model else None
+        cache_key = (self.pk, model_path, get_file_mtime(model_path), self.use_cpu_fast_inference)
+        return BERT_TAGGER_CACHE.get_or_load(cache_key, loader=self.load_tagger, size=get_loaded_size)
+
+
+    def apply_loaded_tagger_to_texts(self, tagger: TextBertTagger, texts: List[str], batch_size: int = settings.BERT_TAGGER_INFERENCE_BATCH_SIZE):
+        """Apply loaded BERT tagger to a list of texts in length-bucketed batches."""
+        tagger_results = tag_texts(tagger, texts, max_length=self.max_length, batch_size=batch_size)
+        return [{'probability': float(result['probability']), 'tagger_id': self.id, 'result': result['prediction']} for result in tagger_results]
+
+
     def apply_loaded_tagger(self, tagger: TextBertTagger, tagger_input: Union[str, Dict], input_type: str = "text", feedback: bool = False):
         """Apply loaded BERT tagger to doc or text."""
         # tag doc or text
@@ -243,6 +291,8 @@ def auto_delete_bert_tagger_on_delete(sender, instance: BertTagger, **kwargs):
     Delete resources on the file-system upon BertTagger deletion.
     Triggered on individual model object and queryset BertTagger deletion.
     """
+    BERT_TAGGER_CACHE.invalidate(instance.pk)
+
     if instance.model:
         if os.path.isfile(instance.model.path):
             os.remove(instance.model.path)
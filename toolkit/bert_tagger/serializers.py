@@ -8,7 +8,7 @@ from texta_elastic.searcher import EMPTY_QUERY
 from toolkit.bert_tagger import choices
 from toolkit.bert_tagger.models import BertTagger
 from toolkit.helper_functions import get_downloaded_bert_models
-from toolkit.serializer_constants import (CommonModelSerializerMixin, ElasticScrollMixIn, FavoriteModelSerializerMixin, FieldParseSerializer, IndicesSerializerMixin, ProjectFilteredPrimaryKeyRelatedField, ProjectResourceUrlSerializer)
+from toolkit.serializer_constants import (CPU_FAST_INFERENCE_HELPTEXT, CommonModelSerializerMixin, ElasticScrollMixIn, FavoriteModelSerializerMixin, FieldParseSerializer, IndicesSerializerMixin, ProjectFilteredPrimaryKeyRelatedField, ProjectResourceUrlSerializer)
 from toolkit.settings import ALLOW_BERT_MODEL_DOWNLOADS, BERT_PRETRAINED_MODEL_DIRECTORY
 from toolkit.validator_constants import validate_pos_label
 
@@ -46,6 +46,7 @@ class BertTaggerSerializer(FieldParseSerializer, serializers.ModelSerializer, Co
     pos_label = serializers.CharField(default="", required=False, allow_blank=True, help_text='Fact value used as positive label while evaluating the results. This is needed only, if the selected fact has exactly two possible values. Default = ""')
 
     use_gpu = serializers.BooleanField(default=True, help_text="Whether to force the usage of a GPU or not.")
+    use_cpu_fast_inference = serializers.BooleanField(default=False, required=False, help_text=CPU_FAST_INFERENCE_HELPTEXT)
 
     checkpoint_model = ProjectFilteredPrimaryKeyRelatedField(queryset=BertTagger.objects, many=False, read_only=False, allow_null=True, default=None,
                                                              help_text=f'Previously fine-tuned BERT model. Select this, if you wish to further fine-tune it with additional data and/or new parameters. Default = None')
@@ -89,12 +90,12 @@ class BertTaggerSerializer(FieldParseSerializer, serializers.ModelSerializer, Co
 
     class Meta:
         model = BertTagger
-        fields = ('url', 'author', 'id', 'description', 'query', 'fields', 'use_gpu', 'f1_score', 'precision', 'recall', 'accuracy',
+        fields = ('url', 'author', 'id', 'description', 'query', 'fields', 'use_gpu', 'use_cpu_fast_inference', 'quantized_accuracy_delta', 'f1_score', 'precision', 'recall', 'accuracy',
                   'validation_loss', 'training_loss', 'maximum_sample_size', 'minimum_sample_size', 'num_epochs', 'plot', 'tasks', 'pos_label', 'fact_name',
                   'indices', 'bert_model', 'learning_rate', 'eps', 'is_favorited', 'max_length', 'batch_size', 'adjusted_batch_size',
                   'split_ratio', 'negative_multiplier', 'checkpoint_model', 'num_examples', 'confusion_matrix', 'balance', 'use_sentence_shuffle', 'balance_to_max_limit', 'classes')
 
-        read_only_fields = ('project', 'fields', 'f1_score', 'precision', 'recall', 'accuracy', 'validation_loss', 'training_loss', 'plot',
+        read_only_fields = ('project', 'fields', 'f1_score', 'precision', 'recall', 'accuracy', 'quantized_accuracy_delta', 'validation_loss', 'training_loss', 'plot',
                             'tasks', 'num_examples', 'adjusted_batch_size', 'confusion_matrix', 'classes')
 
         fields_to_parse = ['fields', 'classes']
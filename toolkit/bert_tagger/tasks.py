@@ -3,6 +3,8 @@ import logging
 import os
 import pathlib
 import secrets
+import time
+from collections import defaultdict
 from typing import Dict, List, Union
 
 from celery.decorators import task
@@ -17,33 +19,25 @@ from texta_elastic.searcher import ElasticSearcher
 
 from toolkit.base_tasks import BaseTask, TransactionAwareTask
 from toolkit.bert_tagger import choices
-from toolkit.bert_tagger.models import BertTagger as BertTaggerObject
+from toolkit.bert_tagger.models import BERT_TAGGER_CACHE, BertTagger as BertTaggerObject
 from toolkit.core.task.models import Task
 from toolkit.elastic.tools.data_sample import DataSample
 from toolkit.helper_functions import get_indices_from_object
-from toolkit.settings import BERT_CACHE_DIR, BERT_FINETUNED_MODEL_DIRECTORY, BERT_PRETRAINED_MODEL_DIRECTORY, CELERY_LONG_TERM_TASK_QUEUE, ERROR_LOGGER, INFO_LOGGER
+from toolkit.settings import (BERT_CACHE_DIR, BERT_FINETUNED_MODEL_DIRECTORY, BERT_PRETRAINED_MODEL_DIRECTORY, BERT_TAGGER_INFERENCE_BATCH_SIZE, CELERY_LONG_TERM_TASK_QUEUE, ERROR_LOGGER,
+                              INFO_LOGGER)
 from toolkit.tools.plots import create_tagger_plot
 from toolkit.tools.show_progress import ShowProgress
 
-# Global object for the worker so tagger models won't get reloaded on each task
-# Essentially an indefinite cache
-PERSISTENT_BERT_TAGGERS = {}
-
 
 @task(name="apply_persistent_bert_tagger", base=BaseTask)
 def apply_persistent_bert_tagger(tagger_input: Union[str, Dict], tagger_id: int, input_type: str = 'text', feedback: bool = False):
     """
     Task to use Bert models stored in memory for fast re-use.
-    Stores models in dict.
+    Stores models in the size-bounded per-process cache.
     """
-    global PERSISTENT_BERT_TAGGERS
     tagger_object = BertTaggerObject.objects.get(id=tagger_id)
     try:
-        # load tagger object into cache if not there
-        if tagger_id not in PERSISTENT_BERT_TAGGERS:
-            PERSISTENT_BERT_TAGGERS[tagger_id] = tagger_object.load_tagger()
-        # select loaded tagger from cache
-        loaded_tagger = PERSISTENT_BERT_TAGGERS[tagger_id]
+        loaded_tagger = tagger_object.load_cached_tagger()
         return tagger_object.apply_loaded_tagger(loaded_tagger, tagger_input, input_type=input_type, feedback=feedback)
     except Exception as e:
         raise
@@ -118,7 +112,7 @@ def train_bert_tagger(tagger_id, testing=False):
             balance_to_max_limit=tagger_object.balance_to_max_limit
         )
         show_progress.update_step('training')
-        show_progress.update_view(0.0)
+        show_progress.update_view()
 
         # select sklearn average function based on the number of classes
         if data_sample.is_binary:
@@ -186,6 +180,13 @@ def train_bert_tagger(tagger_id, testing=False):
         # set tagger location
         tagger_object.model.name = tagger_path
 
+        # report how much accuracy the quantized CPU model loses
+        if tagger_object.use_cpu_fast_inference:
+            show_progress.update_step('evaluating quantized model')
+            tagger_object.quantized_accuracy_delta = tagger_object.evaluate_quantization(data_sample.data)
+        else:
+            tagger_object.quantized_accuracy_delta = None
+
         report_dict = report.to_dict()
 
         # save tagger plot
@@ -206,6 +207,8 @@ def train_bert_tagger(tagger_id, testing=False):
         tagger_object.classes = json.dumps(report.classes, ensure_ascii=False)
         # save tagger object
         tagger_object.save()
+        # free the memory of the previous version in this worker
+        BERT_TAGGER_CACHE.invalidate(tagger_object.pk)
         # declare the job done
         task_object.complete()
 
@@ -245,31 +248,43 @@ def to_texta_facts(tagger_result: List[Dict[str, Union[str, int, bool]]], field:
     return [new_fact]
 
 
-def update_generator(generator: ElasticSearcher, ec: ElasticCore, fields: List[str], fact_name: str, fact_value: str, tagger_object: BertTaggerObject, tagger: BertTagger = None):
+def update_generator(generator: ElasticSearcher, ec: ElasticCore, fields: List[str], fact_name: str, fact_value: str, tagger_object: BertTaggerObject, tagger: BertTagger = None,
+                     batch_size: int = BERT_TAGGER_INFERENCE_BATCH_SIZE):
     for i, scroll_batch in enumerate(generator):
         logging.getLogger(INFO_LOGGER).info(f"Appyling BERT Tagger with ID {tagger_object.id} to batch {i + 1}...")
-        for raw_doc in scroll_batch:
-            hit = raw_doc["_source"]
-            flat_hit = ec.flatten(hit)
-            existing_facts = hit.get("texta_facts", [])
+        start_time = time.monotonic()
 
+        # Collect the texts of the whole scroll batch so they could be tagged in batches.
+        texts, text_locations = [], []
+        for document_index, raw_doc in enumerate(scroll_batch):
+            flat_hit = ec.flatten(raw_doc["_source"])
             for field in fields:
                 text = flat_hit.get(field, None)
                 if text and isinstance(text, str):
+                    texts.append(text)
+                    text_locations.append((document_index, field))
+
+        results = tagger_object.apply_loaded_tagger_to_texts(tagger, texts, batch_size=batch_size)
+
+        new_facts = defaultdict(list)
+        for (document_index, field), result in zip(text_locations, results):
+            # If tagger is binary and fact value is not specified by the user, use tagger description as fact value
+            if result["result"] in ["true", "false"]:
+                if not fact_value:
+                    fact_value = tagger_object.description
 
-                    result = tagger_object.apply_loaded_tagger(tagger, text, input_type="text", feedback=False)
+            # For multitag, use the prediction as fact value
+            else:
+                fact_value = result["result"]
 
-                    # If tagger is binary and fact value is not specified by the user, use tagger description as fact value
-                    if result["result"] in ["true", "false"]:
-                        if not fact_value:
-                            fact_value = tagger_object.description
+            new_facts[document_index].extend(to_texta_facts(result, field, fact_name, fact_value))
 
-                    # For multitag, use the prediction as fact value
-                    else:
-                        fact_value = result["result"]
+        duration = time.monotonic() - start_time
+        logging.getLogger(INFO_LOGGER).info(f"Tagged batch {i + 1} of BERT Tagger with ID {tagger_object.id} with {len(scroll_batch) / duration if duration else 0:.1f} docs/s.")
 
-                    new_facts = to_texta_facts(result, field, fact_name, fact_value)
-                    existing_facts.extend(new_facts)
+        for document_index, raw_doc in enumerate(scroll_batch):
+            existing_facts = raw_doc["_source"].get("texta_facts", [])
+            existing_facts.extend(new_facts[document_index])
 
             if existing_facts:
                 # Remove duplicates to avoid adding the same facts with repetitive use.
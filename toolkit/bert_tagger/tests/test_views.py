@@ -3,7 +3,7 @@ import os
 import pathlib
 import uuid
 from io import BytesIO
-from time import sleep, time_ns
+from time import sleep, time, time_ns
 from typing import Optional
 
 from django.test import override_settings
@@ -13,6 +13,7 @@ from rest_framework.test import APITransactionTestCase
 from texta_bert_tagger.tagger import BertTagger
 from texta_elastic.aggregator import ElasticAggregator
 from texta_elastic.core import ElasticCore
+from texta_elastic.searcher import ElasticSearcher
 
 from toolkit.bert_tagger.models import BertTagger as BertTaggerObject
 from toolkit.core.task.models import Task
@@ -135,6 +136,7 @@ class BertTaggerObjectViewTests(APITransactionTestCase):
         self.run_apply_multiclass_tagger_to_index()
         self.run_apply_tagger_to_index_invalid_input()
         self.run_bert_tag_text_persistent()
+        self.run_batched_inference_benchmark()
 
         self.run_test_that_user_cant_delete_pretrained_model()
         self.run_test_that_admin_users_can_delete_pretrained_model()
@@ -793,6 +795,28 @@ class BertTaggerObjectViewTests(APITransactionTestCase):
         print_output('test_bert_tagger_persistent speed:', (end_1, end_2))
         assert end_2 < end_1
 
+    def run_batched_inference_benchmark(self):
+        """Compares the throughput of batched inference against tagging the texts one by one on the CPU."""
+        tagger_object = BertTaggerObject.objects.get(pk=self.test_imported_binary_cpu_tagger_id)
+        tagger = tagger_object.load_cached_tagger()
+        self.assertTrue(tagger_object.load_cached_tagger() is tagger)
+
+        random_docs = ElasticSearcher(indices=[self.test_index_name]).random_documents(size=200)
+        texts = [doc[TEST_FIELD_CHOICE[0]] for doc in random_docs if doc.get(TEST_FIELD_CHOICE[0])]
+
+        start = time()
+        single_results = [tagger_object.apply_loaded_tagger(tagger, text) for text in texts]
+        single_duration = time() - start
+
+        start = time()
+        batched_results = tagger_object.apply_loaded_tagger_to_texts(tagger, texts, batch_size=32)
+        batched_duration = time() - start
+
+        print_output('test_bert_tagger_batched_inference docs/s (single, batched):', (len(texts) / single_duration, len(texts) / batched_duration))
+        self.assertEqual([result["result"] for result in single_results], [result["result"] for result in batched_results])
+        for single_result, batched_result in zip(single_results, batched_results):
+            self.assertAlmostEqual(single_result["probability"], batched_result["probability"], places=3)
+
     def run_test_that_user_cant_delete_pretrained_model(self):
         self.client.login(username='BertTaggerOwner', password='pw')
 
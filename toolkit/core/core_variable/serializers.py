@@ -60,12 +60,6 @@ class CoreVariableSerializer(serializers.HyperlinkedModelSerializer):
             service_alive = get_elastic_status(uri=value)["alive"]
             if service_alive is False:
                 raise serializers.ValidationError(f"Invalid TEXTA_ES_URL {value}")
-        if name == "TEXTA_EVALUATOR_MEMORY_BUFFER_GB":
-            if value:
-                try:
-                    float_value = float(value)
-                except ValueError:
-                    raise serializers.ValidationError(f"The value inside the string should be either a float or an integer.")
 
         # if not alive, raise Error
         if not service_alive:
@@ -29,6 +29,11 @@ class HealthViewsTests(APITestCase):
 
         self.assertTrue(response.data["toolkit"]["available_langs"])
 
+        # Check if the counters of the model caches are present.
+        tagger_cache = response.data["toolkit"]["model_cache"]["tagger"]
+        for key in ("items", "bytes", "hits", "misses", "evictions"):
+            self.assertTrue(key in tagger_cache)
+
         # Check if all counted devices are present in devices list
         self.assertTrue(len(response.data['host']['gpu']['devices']) == response.data['host']['gpu']['count'])
 
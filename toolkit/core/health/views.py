@@ -10,6 +10,7 @@ from rest_framework.response import Response
 
 from toolkit.core.health.utils import (get_active_tasks, get_elastic_status, get_gpu_devices, get_redis_status, get_version)
 from toolkit.settings import DEFAULT_MLP_LANGUAGE_CODES
+from toolkit.tools.model_cache import get_cache_statistics
 
 
 @permission_classes((AllowAny,))
@@ -54,5 +55,6 @@ class HealthView(views.APIView):
 
         toolkit_status["host"]["gpu"] = {"count": gpu_count, "devices": gpu_devices}
         toolkit_status["toolkit"]["active_tasks"] = get_active_tasks(toolkit_status["services"]["redis"]["alive"])
+        toolkit_status["toolkit"]["model_cache"] = get_cache_statistics()
 
         return Response(toolkit_status, status=status.HTTP_200_OK)
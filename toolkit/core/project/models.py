@@ -3,10 +3,41 @@ from typing import List
 
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from rest_framework.exceptions import ValidationError
 from texta_elastic.core import ElasticCore
 
 from toolkit.constants import MAX_DESC_LEN
+from toolkit.elastic.choices import DEFAULT_STEMMER_BACKEND, STEMMER_BACKEND_CHOICES
+
+
+# Names of the resource counts and the reverse relations of the resources to the project.
+RESOURCE_COUNT_RELATIONS = {
+    'num_lexicons': 'lexicon',
+    'num_torchtaggers': 'torchtagger',
+    'num_taggers': 'tagger',
+    'num_tagger_groups': 'taggergroup',
+    'num_embeddings': 'embedding',
+    'num_clusterings': 'clusteringresult',
+    'num_regex_taggers': 'regextagger',
+    'num_regex_tagger_groups': 'regextaggergroup',
+    'num_anonymizers': 'anonymizer',
+    'num_mlp_workers': 'mlpworker',
+    'num_reindexers': 'reindexer',
+    'num_dataset_importers': 'datasetimport',
+    'num_bert_taggers': 'berttagger',
+    'num_index_splitters': 'indexsplitter',
+    'num_evaluators': 'evaluator',
+    'num_lang_detectors': 'applylangworker',
+    'num_summarizers': 'summarizer',
+    'num_search_query_taggers': 'searchquerytagger',
+    'num_search_fields_taggers': 'searchfieldstagger',
+    'num_elastic_analyzers': 'applyesanalyzerworker',
+    'num_rakun_keyword_extractors': 'rakunextractor',
+    'num_crf_extractors': 'crfextractor',
+    'num_annotators': 'annotator'
+}
 
 
 class Project(models.Model):
@@ -18,6 +49,7 @@ class Project(models.Model):
     indices = models.ManyToManyField(Index, default=None)
     administrators = models.ManyToManyField(User, related_name="administrators")
     scopes = models.TextField(default=json.dumps([]))
+    stemmer_backend = models.CharField(max_length=MAX_DESC_LEN, choices=STEMMER_BACKEND_CHOICES, default=DEFAULT_STEMMER_BACKEND)
 
     created_at = models.DateTimeField(auto_now_add=True, null=True)
     modified_at = models.DateTimeField(auto_now=True, null=True)
@@ -66,29 +98,21 @@ class Project(models.Model):
 
 
     def get_resource_counts(self):
-        proj = self
-        return {
-            'num_lexicons': proj.lexicon_set.count(),
-            'num_torchtaggers': proj.torchtagger_set.count(),
-            'num_taggers': proj.tagger_set.count(),
-            'num_tagger_groups': proj.taggergroup_set.count(),
-            'num_embeddings': proj.embedding_set.count(),
-            'num_clusterings': proj.clusteringresult_set.count(),
-            'num_regex_taggers': proj.regextagger_set.count(),
-            'num_regex_tagger_groups': proj.regextaggergroup_set.count(),
-            'num_anonymizers': proj.anonymizer_set.count(),
-            'num_mlp_workers': proj.mlpworker_set.count(),
-            'num_reindexers': proj.reindexer_set.count(),
-            'num_dataset_importers': proj.datasetimport_set.count(),
-            'num_bert_taggers': proj.berttagger_set.count(),
-            'num_index_splitters': proj.indexsplitter_set.count(),
-            'num_evaluators': proj.evaluator_set.count(),
-            'num_lang_detectors': proj.applylangworker_set.count(),
-            'num_summarizers': proj.summarizer_set.count(),
-            'num_search_query_taggers': proj.searchquerytagger_set.count(),
-            'num_search_fields_taggers': proj.searchfieldstagger_set.count(),
-            'num_elastic_analyzers': proj.applyesanalyzerworker_set.count(),
-            'num_rakun_keyword_extractors': proj.rakunextractor_set.count(),
-            'num_crf_extractors': proj.crfextractor_set.count(),
-            'num_annotators': proj.annotator_set.count()
-        }
+        # Projects fetched through annotate_resource_counts already carry the counts.
+        if all(hasattr(self, count_name) for count_name in RESOURCE_COUNT_RELATIONS):
+            return {count_name: getattr(self, count_name) for count_name in RESOURCE_COUNT_RELATIONS}
+        return annotate_resource_counts(Project.objects.filter(pk=self.pk)).values(*RESOURCE_COUNT_RELATIONS).get()
+
+
+def annotate_resource_counts(queryset: models.QuerySet) -> models.QuerySet:
+    """
+    Annotates the projects of the queryset with the counts of their resources as subqueries,
+    so that the counts of any amount of projects would be fetched within the same query.
+    """
+    annotations = {}
+    for count_name, relation_name in RESOURCE_COUNT_RELATIONS.items():
+        relation = Project._meta.get_field(relation_name)
+        project_field = relation.field.name
+        resources = relation.related_model.objects.filter(**{project_field: OuterRef("pk")}).order_by().values(project_field).annotate(count=Count("pk")).values("count")
+        annotations[count_name] = Coalesce(Subquery(resources, output_field=IntegerField()), 0)
+    return queryset.annotate(**annotations)
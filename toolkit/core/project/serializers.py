@@ -13,6 +13,7 @@ from toolkit.core import choices as choices
 from toolkit.core.project.models import Project
 from toolkit.core.user_profile.serializers import UserSerializer
 from toolkit.core.user_profile.validators import check_if_username_exist
+from toolkit.elastic.choices import DEFAULT_STEMMER_BACKEND, STEMMER_BACKEND_CHOICES
 from toolkit.elastic.index.models import Index
 from toolkit.elastic.index.serializers import IndexSerializer
 from toolkit.elastic.validators import check_for_existence
@@ -172,6 +173,12 @@ class ProjectSerializer(FieldParseSerializer, serializers.ModelSerializer):
     resource_count = serializers.SerializerMethodField()
 
     scopes = serializers.ListField(default=[], required=False, help_text="Users that belong to the given scope will have access to the Projects resources.")
+    stemmer_backend = serializers.ChoiceField(
+        choices=STEMMER_BACKEND_CHOICES,
+        default=DEFAULT_STEMMER_BACKEND,
+        required=False,
+        help_text=f"Whether Snowball stemming is done through Elasticsearch or in-process. Models keep the backend they were trained with. Default: {DEFAULT_STEMMER_BACKEND}."
+    )
 
 
     # For whatever reason, it doesn't validate read-only fields, so we do it manually.
@@ -217,6 +224,8 @@ class ProjectSerializer(FieldParseSerializer, serializers.ModelSerializer):
             instance.title = validated_data["title"]
         if "scopes" in validated_data:
             instance.scopes = json.dumps(validated_data["scopes"])
+        if "stemmer_backend" in validated_data:
+            instance.stemmer_backend = validated_data["stemmer_backend"]
 
         instance.save()
         return instance
@@ -230,13 +239,14 @@ class ProjectSerializer(FieldParseSerializer, serializers.ModelSerializer):
         administrators = wrap_in_list(validated_data["administrators_write"])
         author = self.context["request"].user
         scopes = json.dumps(validated_data["scopes"], ensure_ascii=False)
+        stemmer_backend = validated_data.get("stemmer_backend", DEFAULT_STEMMER_BACKEND)
 
         if indices and not author.is_superuser:
             raise PermissionDenied("Non-superusers can not create projects with indices defined!")
 
         # create object
         with transaction.atomic():
-            project = Project.objects.create(title=title, author=author, scopes=scopes)
+            project = Project.objects.create(title=title, author=author, scopes=scopes, stemmer_backend=stemmer_backend)
             project.users.add(*users, *administrators, author)
             project.administrators.add(*administrators, author)  # All admins are also users.
 
@@ -251,7 +261,7 @@ class ProjectSerializer(FieldParseSerializer, serializers.ModelSerializer):
 
     class Meta:
         model = Project
-        fields = ('url', 'id', 'title', 'author', 'administrators_write', 'administrators', 'users', 'users_write', 'indices', 'indices_write', 'scopes', 'resources', 'created_at', 'modified_at', 'resource_count',)
+        fields = ('url', 'id', 'title', 'author', 'administrators_write', 'administrators', 'users', 'users_write', 'indices', 'indices_write', 'scopes', 'stemmer_backend', 'resources', 'created_at', 'modified_at', 'resource_count',)
         read_only_fields = ('author', 'resources', 'created_at', 'modified_at')
         fields_to_parse = ("scopes",)
 
@@ -8,8 +8,10 @@ from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
 from texta_elastic.core import ElasticCore
 from time import sleep
+from types import SimpleNamespace
 
-from toolkit.core.project.models import Project
+from toolkit.core.project.models import Project, annotate_resource_counts
+from toolkit.core.project.views import ProjectViewSet
 from toolkit.elastic.index.models import Index
 from toolkit.helper_functions import reindex_test_dataset
 from toolkit.settings import RELATIVE_PROJECT_DATA_PATH, SEARCHER_FOLDER_KEY
@@ -312,6 +314,29 @@ class ProjectViewTests(APITestCase):
         self.assertTrue('num_dataset_importers' in response.data)
 
 
+    def test_that_resource_counts_are_fetched_in_a_single_query(self):
+        Project.objects.create(title="second_project", author=self.user)
+        with self.assertNumQueries(1):
+            projects = list(annotate_resource_counts(Project.objects.all()))
+            counts = [project.get_resource_counts() for project in projects]
+
+        for project, project_counts in zip(projects, counts):
+            self.assertEqual(project_counts["num_taggers"], project.tagger_set.count())
+            self.assertEqual(project_counts["num_embeddings"], project.embedding_set.count())
+            self.assertEqual(project_counts["num_annotators"], project.annotator_set.count())
+
+
+    def test_that_resource_counts_are_annotated_only_for_actions_that_return_them(self):
+        view = ProjectViewSet()
+        view.request = SimpleNamespace(user=self.user)
+        for action in ("list", "retrieve", "get_resource_counts"):
+            view.action = action
+            self.assertIn("num_taggers", view.get_queryset().query.annotations)
+        for action in ("add_indices", "count_indices", "autocomplete_fact_names", "destroy"):
+            view.action = action
+            self.assertNotIn("num_taggers", view.get_queryset().query.annotations)
+
+
     def test_search_export(self):
         payload = {"indices": [TEST_INDEX, REINDEXER_TEST_INDEX]}
         response = self.client.post(self.export_url, data=payload, format="json")
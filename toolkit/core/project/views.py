@@ -25,7 +25,7 @@ from texta_elastic.query import Query
 from texta_elastic.searcher import ElasticSearcher
 from texta_elastic.spam_detector import SpamDetector
 
-from toolkit.core.project.models import Project
+from toolkit.core.project.models import Project, annotate_resource_counts
 from toolkit.core.project.serializers import (CountIndicesSerializer, ExportSearcherResultsSerializer, HandleIndicesSerializer, HandleProjectAdministratorsSerializer, HandleUsersSerializer, ProjectDocumentSerializer, ProjectFactAggregatorSerializer, ProjectGetFactsSerializer,
                                               ProjectGetSpamSerializer, ProjectSearchByQuerySerializer, ProjectSerializer, ProjectSimplifiedSearchSerializer, ProjectSuggestFactNamesSerializer, ProjectSuggestFactValuesSerializer)
 from toolkit.elastic.decorators import elastic_view
@@ -468,9 +468,14 @@ class ProjectViewSet(viewsets.ModelViewSet, FeedbackIndexView):
             else:
                 query_filter = (in_user | in_admin)
 
-            return query_filter.distinct().order_by('-id').prefetch_related("users", "administrators", "indices")
+            queryset = query_filter.distinct()
         else:
-            return Project.objects.all().order_by('-id').prefetch_related("users", "administrators", "indices")
+            queryset = Project.objects.all()
+
+        # Only these actions serialize the counts, other actions would pay for the subqueries for nothing.
+        if self.action in ("list", "retrieve", "get_resource_counts"):
+            queryset = annotate_resource_counts(queryset)
+        return queryset.order_by('-id').prefetch_related("users", "administrators", "indices")
 
 
     @action(detail=True, methods=['post'], serializer_class=HandleIndicesSerializer, permission_classes=[OnlySuperadminAllowed])
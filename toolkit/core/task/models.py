@@ -69,14 +69,22 @@ class Task(models.Model):
         self.errors = json.dumps(unique_errors, ensure_ascii=False)
         self.save()
 
+    def flush_progress(self):
+        """Writes the progress still buffered by the ShowProgress reporters of this task into the database."""
+        from toolkit.tools.show_progress import flush_task_progress
+        flush_task_progress(self.pk)
+        self.refresh_from_db(fields=["num_processed", "step"])
+
     @avoid_db_timeout
     def handle_failed_task(self, e: Exception):
         logging.getLogger(ERROR_LOGGER).exception(e)
+        self.flush_progress()
         self.add_error(str(e))
         self.update_status(Task.STATUS_FAILED)
 
     @avoid_db_timeout
     def complete(self):
+        self.flush_progress()
         self.status = Task.STATUS_COMPLETED
         self.time_completed = now()
         self.step = ""
@@ -7,6 +7,7 @@ import tempfile
 import zipfile
 from io import BytesIO
 
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core import serializers
 from django.db import models, transaction
@@ -29,10 +30,14 @@ from toolkit.settings import (
     INFO_LOGGER,
     RELATIVE_MODELS_PATH
 )
+from toolkit.tools.model_cache import ModelCache, get_file_mtime, get_file_size
 from .choices import FEATURE_EXTRACTOR_CHOICES, FEATURE_FIELDS_CHOICES
 from ..model_constants import CommonModelMixin, FavoriteModelMixin
 
 
+CRF_EXTRACTOR_CACHE = ModelCache("crf_extractor", max_items=settings.CRF_EXTRACTOR_CACHE_MAX_ITEMS, max_bytes=settings.CRF_EXTRACTOR_CACHE_MAX_BYTES)
+
+
 class CRFExtractor(FavoriteModelMixin, CommonModelMixin):
     MODEL_TYPE = 'crf_extractor'
     MODEL_JSON_NAME = "model.json"
@@ -227,6 +232,25 @@ class CRFExtractor(FavoriteModelMixin, CommonModelMixin):
             raise ModelLoadFailedError(str(e))
 
 
+    def load_cached_extractor(self):
+        """
+        Loading model from the per-process cache, falls back to the disc on a cache miss.
+        The cache key contains the model file and its modification time, so retrained models are never served from the cache.
+        """
+        model_path = self.model.path if self.model else None
+        cache_key = (self.pk, model_path, get_file_mtime(model_path))
+        return CRF_EXTRACTOR_CACHE.get_or_load(cache_key, loader=self.load_extractor, size=lambda extractor: self.get_loaded_size())
+
+
+    def get_loaded_size(self) -> int:
+        """Estimates the memory imprint of the loaded extractor by the size of its files on the disc."""
+        file_paths = [self.model.path] if self.model else []
+        if self.embedding and self.embedding.embedding_model:
+            embedding_path = self.embedding.embedding_model.path
+            file_paths += [embedding_path] + Embedding.get_loaded_file_names(embedding_path)
+        return get_file_size(*file_paths)
+
+
     def apply_loaded_extractor(self, extractor: Extractor, mlp_document):
         result = extractor.tag(mlp_document)
         return result
@@ -238,6 +262,8 @@ def auto_delete_crfextractor_on_delete(sender, instance: CRFExtractor, **kwargs)
     Delete resources on the file-system upon TorchTagger deletion.
     Triggered on individual model object and queryset TorchTagger deletion.
     """
+    CRF_EXTRACTOR_CACHE.invalidate(instance.pk)
+
     if instance.model:
         if os.path.isfile(instance.model.path):
             os.remove(instance.model.path)
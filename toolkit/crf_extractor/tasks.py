@@ -1,20 +1,25 @@
 import logging
+import math
 import os
 import pathlib
 import secrets
+from functools import partial
 from typing import List
 
+from billiard.pool import Pool
 from celery.decorators import task
+from django.db import connections
 from texta_crf_extractor.crf_extractor import CRFExtractor
 from texta_elastic.core import ElasticCore
 from texta_elastic.document import ElasticDocument
 from texta_elastic.searcher import ElasticSearcher
 
 from toolkit.base_tasks import BaseTask, TransactionAwareTask
-from toolkit.helper_functions import get_indices_from_object
+from toolkit.helper_functions import chunks, get_indices_from_object
 from toolkit.settings import (
     CELERY_LONG_TERM_TASK_QUEUE,
     CELERY_SHORT_TERM_TASK_QUEUE,
+    CRF_EXTRACTOR_PROCESS_COUNT,
     ERROR_LOGGER,
     INFO_LOGGER,
     MEDIA_URL
@@ -24,6 +29,11 @@ from toolkit.tools.show_progress import ShowProgress
 from .models import CRFExtractor as CRFExtractorObject
 
 
+# Extractor loaded by the task that applies it to an index,
+# the processes of its pool inherit it when they are forked.
+_POOL_EXTRACTOR = None
+
+
 @task(name="start_crf_task", base=TransactionAwareTask, queue=CELERY_LONG_TERM_TASK_QUEUE)
 def start_crf_task(crf_id: int):
     """
@@ -33,7 +43,7 @@ def start_crf_task(crf_id: int):
     task_object = extractor.tasks.last()
     show_progress = ShowProgress(task_object, multiplier=1)
     show_progress.update_step('starting tagging')
-    show_progress.update_view(0)
+    show_progress.update_view()
     return crf_id
 
 
@@ -50,7 +60,7 @@ def train_crf_task(crf_id: int):
         # create progress object
         show_progress = ShowProgress(task_object, multiplier=1)
         show_progress.update_step('scrolling documents')
-        show_progress.update_view(0)
+        show_progress.update_view()
         # retrieve indices & field data
         indices = get_indices_from_object(crf_object)
         mlp_field = crf_object.mlp_field
@@ -120,7 +130,7 @@ def save_crf_results(result_data: dict):
         show_progress = ShowProgress(task_object, multiplier=1)
         # update status to saving
         show_progress.update_step('saving')
-        show_progress.update_view(0)
+        show_progress.update_view()
         crf_object.best_c1 = result_data["best_c_values"][0]
         crf_object.best_c2 = result_data["best_c_values"][1]
         crf_object.model.name = result_data["extractor_path"]
@@ -150,33 +160,67 @@ def apply_crf_extractor(crf_id: int, mlp_document: dict):
     """
     # Get CRF object
     crf_object = CRFExtractorObject.objects.get(pk=crf_id)
-    # Load model from the disc
-    crf_extractor = crf_object.load_extractor()
+    # Load model from the per-process cache or the disc
+    crf_extractor = crf_object.load_cached_extractor()
     # Use the loaded model for predicting
     prediction = crf_object.apply_loaded_extractor(crf_extractor, mlp_document)
     return prediction
 
 
+def tag_documents(documents: List[dict], mlp_fields: List[str], label_suffix: str, extractor: CRFExtractor = None) -> List[List[dict]]:
+    """
+    Returns the new facts of every document. Inside the processes of the pool,
+    the extractor they inherited from the task when they were forked is used.
+    """
+    extractor = extractor or _POOL_EXTRACTOR
+    new_facts = []
+    for document in documents:
+        document_facts = []
+        for mlp_field in mlp_fields:
+            document_facts.extend(extractor.tag(document, field_name=mlp_field, label_suffix=label_suffix)["texta_facts"] or [])
+        new_facts.append(document_facts)
+    return new_facts
+
+
+def fork_pool(extractor: CRFExtractor, process_count: int) -> Pool:
+    """Forks the processes that tag the documents with the given extractor."""
+    global _POOL_EXTRACTOR
+    _POOL_EXTRACTOR = extractor
+    # Forked processes must not share the database connections of the task,
+    # so they are closed right before the fork without querying anything in between.
+    connections.close_all()
+    return Pool(processes=process_count)
+
+
 def update_generator(
         generator: ElasticSearcher,
         ec: ElasticCore,
         mlp_fields: List[str],
         label_suffix: str,
         object_id: int,
-        extractor: CRFExtractor = None
+        extractor: CRFExtractor = None,
+        pool: Pool = None,
+        process_count: int = 1
 ):
     """
     Tags & updates documents in ES.
+    Scroll batches are split between the processes of the pool when one is given.
     """
     for i, scroll_batch in enumerate(generator):
         logging.getLogger(INFO_LOGGER).info(f"Appyling CRFExtractor with ID {object_id} to batch {i + 1}...")
-        for raw_doc in scroll_batch:
-            hit = raw_doc["_source"]
-            existing_facts = hit.get("texta_facts", [])
-            for mlp_field in mlp_fields:
-                new_facts = extractor.tag(hit, field_name=mlp_field, label_suffix=label_suffix)["texta_facts"]
-                if new_facts:
-                    existing_facts.extend(new_facts)
+        hits = [raw_doc["_source"] for raw_doc in scroll_batch]
+
+        if pool and hits:
+            chunk_size = math.ceil(len(hits) / process_count)
+            # Results of map come in the order of the chunks, which keeps the facts next to their documents.
+            chunk_results = pool.map(partial(tag_documents, mlp_fields=mlp_fields, label_suffix=label_suffix), list(chunks(hits, chunk_size)))
+            new_facts = [document_facts for chunk_result in chunk_results for document_facts in chunk_result]
+        else:
+            new_facts = tag_documents(hits, mlp_fields, label_suffix, extractor=extractor)
+
+        for raw_doc, document_facts in zip(scroll_batch, new_facts):
+            existing_facts = raw_doc["_source"].get("texta_facts", [])
+            existing_facts.extend(document_facts)
 
             if existing_facts:
                 # Remove duplicates to avoid adding the same facts with repetitive use.
@@ -205,6 +249,8 @@ def apply_crf_extractor_to_index(
     """
     Applies Extractor to ES index.
     """
+    global _POOL_EXTRACTOR
+    pool = None
     try:
         # load model
         crf_object = CRFExtractorObject.objects.get(pk=object_id)
@@ -226,6 +272,9 @@ def apply_crf_extractor_to_index(
             callback_progress=progress,
             scroll_size=bulk_size
         )
+        # the pool processes inherit the loaded model when they are forked
+        if CRF_EXTRACTOR_PROCESS_COUNT > 1:
+            pool = fork_pool(extractor, CRF_EXTRACTOR_PROCESS_COUNT)
         # create update actions
         actions = update_generator(
             generator=searcher,
@@ -233,7 +282,9 @@ def apply_crf_extractor_to_index(
             mlp_fields=mlp_fields,
             label_suffix=label_suffix,
             object_id=object_id,
-            extractor=extractor
+            extractor=extractor,
+            pool=pool,
+            process_count=CRF_EXTRACTOR_PROCESS_COUNT
         )
         # perform updates
         try:
@@ -248,3 +299,8 @@ def apply_crf_extractor_to_index(
     except Exception as e:
         task_object.handle_failed_task(e)
         raise e
+
+    finally:
+        if pool:
+            pool.terminate()
+        _POOL_EXTRACTOR = None
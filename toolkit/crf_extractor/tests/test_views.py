@@ -2,6 +2,7 @@ import json
 import pathlib
 from io import BytesIO
 from time import sleep
+from unittest import mock
 
 from django.test import override_settings
 from django.urls import reverse
@@ -13,6 +14,7 @@ from texta_elastic.searcher import EMPTY_QUERY
 
 from toolkit.core.task.models import Task
 from toolkit.crf_extractor.models import CRFExtractor
+from toolkit.crf_extractor.tasks import tag_documents
 from toolkit.helper_functions import reindex_test_dataset
 from toolkit.settings import RELATIVE_MODELS_PATH
 from toolkit.test_settings import (CRF_TEST_FIELD, CRF_TEST_INDEX, TEST_INDEX, TEST_KEEP_PLOT_FILES, TEST_VERSION_PREFIX)
@@ -85,6 +87,7 @@ class CRFExtractorViewTests(APITransactionTestCase):
         self.run_test_export_import()
         self.run_apply_crf_to_index()
         self.run_apply_crf_to_index_with_specified_label_suffix()
+        self.run_apply_crf_to_index_with_a_process_pool()
         self.run_retraining_view_on_trained_crf_model()
 
 
@@ -239,6 +242,41 @@ class CRFExtractorViewTests(APITransactionTestCase):
         self.assertTrue(len(results) > 1)
 
 
+    @mock.patch("toolkit.crf_extractor.tasks.CRF_EXTRACTOR_PROCESS_COUNT", 3)
+    def run_apply_crf_to_index_with_a_process_pool(self):
+        """Tests that the facts tagged by the processes of the pool end up in the documents they were found from."""
+        test_tagger_id = self.test_crf_ids[0]
+        url = f'{self.url}{test_tagger_id}/apply_to_index/'
+        label_suffix = "CRF_POOL"
+        payload = {
+            "description": "apply crf with a process pool test task",
+            "mlp_fields": ["text_mlp"],
+            "indices": [{"name": self.test_index_copy}],
+            "label_suffix": label_suffix
+        }
+        response = self.client.post(url, payload, format='json')
+        print_output('run_apply_crf_to_index_with_a_process_pool:response.data', response.data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        tagger_object = CRFExtractor.objects.get(pk=test_tagger_id)
+        self.assertEqual(tagger_object.tasks.last().status, Task.STATUS_COMPLETED)
+
+        # Compare the facts of every document against tagging it without the pool.
+        extractor = tagger_object.load_extractor()
+        ec = ElasticCore()
+        ec.es.indices.refresh(index=self.test_index_copy)
+        hits = ec.es.search(index=self.test_index_copy, body={"query": {"match_all": {}}, "size": 100})["hits"]["hits"]
+        tagged_documents = 0
+        for hit in hits:
+            facts = [fact for fact in hit["_source"].get("texta_facts", []) if fact["fact"].endswith(f"_{label_suffix}")]
+            expected_facts = tag_documents([hit["_source"]], ["text_mlp"], label_suffix, extractor=extractor)[0]
+            self.assertEqual(
+                sorted(json.dumps(fact, sort_keys=True) for fact in facts),
+                sorted(set(json.dumps(fact, sort_keys=True) for fact in expected_facts))
+            )
+            tagged_documents += bool(facts)
+        self.assertTrue(tagged_documents > 1)
+
+
     def run_retraining_view_on_trained_crf_model(self):
         tagger_id = self.test_crf_ids[0]
         tagger_orm: CRFExtractor = CRFExtractor.objects.get(pk=tagger_id)
@@ -1,11 +1,13 @@
+import io
 import logging
 import os
+from typing import Iterator
 
 import pandas as pd
+from elasticsearch.helpers import parallel_bulk
 from texta_elastic.document import ElasticDocument
 
-from toolkit.helper_functions import chunks
-from toolkit.settings import INFO_LOGGER
+from toolkit.settings import DATASET_IMPORT_CHUNK_SIZE, DATASET_IMPORT_THREAD_COUNT, INFO_LOGGER
 
 
 class Dataset:
@@ -30,53 +32,64 @@ class Dataset:
         self.index = index
         self.num_records = 0
         self.num_records_success = 0
+        self.num_bytes_read = 0
         self.meta = meta
         self.logger = logging.getLogger(INFO_LOGGER)
 
 
-    def _get_file_content(self):
-        """Retrieves DataFrame for a collection from given path."""
+    def _read_chunks(self, file_handle) -> Iterator[pd.DataFrame]:
+        """Parses the file into DataFrames of at most DATASET_IMPORT_CHUNK_SIZE rows."""
         _, file_extension = os.path.splitext(self.file_path)
         file_extension = file_extension.lower()
         if file_extension == Dataset.TYPE_CSV:
             # CSV
             self.logger.info(f"Parsing CSV file content of task ID: '{self.meta.pk}' with description: '{self.meta.description}'!")
-            return True, pd.read_csv(self.file_path, header=0, sep=self.separator)
+            yield from pd.read_csv(file_handle, header=0, sep=self.separator, chunksize=DATASET_IMPORT_CHUNK_SIZE)
 
         elif file_extension in (Dataset.TYPE_XLS, Dataset.TYPE_XLSX):
-            # EXCEL
+            # EXCEL, which can't be parsed in chunks.
             self.logger.info(f"Parsing Excel file content of task ID: '{self.meta.pk}' with description: '{self.meta.description}'!")
-            return True, pd.read_excel(self.file_path, header=0)
+            file_content = pd.read_excel(file_handle, header=0)
+            for start in range(0, len(file_content), DATASET_IMPORT_CHUNK_SIZE):
+                yield file_content.iloc[start:start + DATASET_IMPORT_CHUNK_SIZE]
 
         elif file_extension in Dataset.TYPE_JSON:
             # JSON-LINES
-            with open(self.file_path) as fh:
-                self.logger.info(f"Parsing JSON-lines file content of task ID: '{self.meta.pk}' with description: '{self.meta.description}'!")
-                return True, pd.read_json(fh, lines=True)
+            self.logger.info(f"Parsing JSON-lines file content of task ID: '{self.meta.pk}' with description: '{self.meta.description}'!")
+            text_handle = io.TextIOWrapper(file_handle, encoding="utf8")
+            yield from pd.read_json(text_handle, lines=True, chunksize=DATASET_IMPORT_CHUNK_SIZE)
 
-        # nothing parsed
-        return False, None
+
+    @staticmethod
+    def _chunk_to_records(chunk: pd.DataFrame) -> Iterator[dict]:
+        """Converts the rows of the chunk into dicts without the empty values."""
+        chunk = chunk.dropna(how="all")
+        columns = list(chunk.columns)
+        is_present = chunk.notna().to_numpy()
+        for record, present_values in zip(chunk.to_dict(orient="records"), is_present):
+            yield {column: record[column] for column, is_value_present in zip(columns, present_values) if is_value_present}
+
+
+    def _generate_actions(self, file_handle) -> Iterator[dict]:
+        for chunk in self._read_chunks(file_handle):
+            for record in self._chunk_to_records(chunk):
+                self.num_records += 1
+                yield {"_index": self.index, "_source": record}
+            # Read from the raw file handle as the text wrappers read ahead in blocks anyway.
+            self.num_bytes_read = file_handle.tell()
 
 
     def import_dataset(self) -> list:
         error_container = []
-        # retrieve content from file
-        success, file_content = self._get_file_content()
-        file_content = file_content.dropna(how="all")
 
-        # check if file was parsed
-        if not success:
+        _, file_extension = os.path.splitext(self.file_path)
+        if file_extension.lower() not in (Dataset.TYPE_CSV, Dataset.TYPE_XLS, Dataset.TYPE_XLSX, *Dataset.TYPE_JSON):
             error_container.append('unknown file type')
             return error_container
 
-        # convert content to list of records (dicts)
-        self.logger.info(f"Converting parsed content into dictionary records of task ID: '{self.meta.pk}' with description: '{self.meta.description}'!")
-        records = file_content.to_dict(orient='records')
-        # set num_records
-        self.num_records = len(records)
-        # set total number of documents for progress
+        # progress is measured in bytes, the amount of records isn't known before reading the whole file
         if self.show_progress:
-            self.show_progress.set_total(self.num_records)
+            self.show_progress.set_total(os.path.getsize(self.file_path))
 
         # add documents to ES
         es_doc = ElasticDocument(self.index)
@@ -89,24 +102,28 @@ class Dataset:
         self.logger.info(f"Adding texta_facts mapping to freshly created index of task ID: '{self.meta.pk}' with description: '{self.meta.description}'!")
         es_doc.core.add_texta_facts_mapping(self.index)
 
-        # get records
-        self.logger.info(f"Preparing chunks for Elasticsearch insertion of task ID: '{self.meta.pk}' with description: '{self.meta.description}'!")
-        chunk_size = 500
-        records = [{k: v for k, v in record.items() if pd.Series(v).notna().all()} for record in records]
-        record_chunks = list(chunks(records, chunk_size))
-
         self.logger.info(f"Starting bulk insertion into Elasticsearch of task ID: '{self.meta.pk}' with description: '{self.meta.description}'!")
-
-        for documents in record_chunks:
-            success, errors = es_doc.bulk_add(documents, chunk_size=chunk_size, stats_only=False, raise_on_error=False)
-            self.num_records_success += success
-
-            if self.show_progress:
-                self.show_progress.update(success)
-
-            for error in list(errors):
-                message = error["index"]["error"]["reason"] if isinstance(error, dict) else str(error)
-                error_container.append(message)
-
+        num_bytes_reported = 0
+        with open(self.file_path, "rb") as file_handle:
+            actions = self._generate_actions(file_handle)
+            for success, info in parallel_bulk(
+                    client=es_doc.core.es,
+                    actions=actions,
+                    thread_count=DATASET_IMPORT_THREAD_COUNT,
+                    chunk_size=DATASET_IMPORT_CHUNK_SIZE,
+                    raise_on_error=False
+            ):
+                if success:
+                    self.num_records_success += 1
+                else:
+                    message = info["index"]["error"]["reason"] if isinstance(info, dict) else str(info)
+                    error_container.append(message)
+
+                # Progress is reported from this thread as the actions are consumed inside the worker pool.
+                if self.show_progress and self.num_bytes_read > num_bytes_reported:
+                    self.show_progress.update(self.num_bytes_read - num_bytes_reported)
+                    num_bytes_reported = self.num_bytes_read
+
+        es_doc.core.es.indices.refresh(index=self.index)
         self.logger.info(f"Finished indexing documents into Elasticsearch of task ID: '{self.meta.pk}' with description: '{self.meta.description}'!")
         return error_container
@@ -1,4 +1,5 @@
 import logging
+import os
 
 from celery.decorators import task
 
@@ -21,10 +22,12 @@ def import_dataset(dataset_import_id):
     # create progress
     show_progress = ShowProgress(task_object, multiplier=1)
     show_progress.update_step('importing dataset')
-    show_progress.update_view(0)
+    show_progress.update_view()
     try:
         # retrieve file path from object
         file_path = import_object.file.path
+        # progress is measured in bytes of the file, same as in Dataset.import_dataset
+        task_object.set_total(os.path.getsize(file_path))
         ds = Dataset(file_path, import_object.index, show_progress=show_progress, separator=import_object.separator, meta=import_object)
         errors = ds.import_dataset()
         # update errors
@@ -1,3 +1,4 @@
+import os
 from uuid import uuid4
 
 from django.test import override_settings
@@ -55,6 +56,8 @@ class DatasetImportViewTests(APITransactionTestCase):
                 # Check if Import is completed
                 task_object = import_dataset.tasks.last()
                 self.assertEqual(task_object.status, Task.STATUS_COMPLETED)
+                # Progress is measured in bytes of the imported file.
+                self.assertEqual(task_object.total, os.path.getsize(file_path))
                 self.assertTrue(import_dataset.num_documents > 0)
                 self.assertTrue(import_dataset.num_documents_success > 0)
                 self.assertTrue(import_dataset.num_documents_success <= import_dataset.num_documents)
@@ -48,6 +48,15 @@ ES6_SNOWBALL_MAPPING = {
 ES7_SNOWBALL_MAPPING = {"ar": "arabic", "et": "estonian"}
 DEFAULT_SNOWBALL_LANGUAGE = None
 
+# Where Snowball stemming is applied, either through the _analyze API of Elasticsearch or in-process.
+STEMMER_BACKEND_ELASTIC = "elasticsearch"
+STEMMER_BACKEND_SNOWBALL = "snowball"
+STEMMER_BACKEND_CHOICES = (
+    (STEMMER_BACKEND_ELASTIC, STEMMER_BACKEND_ELASTIC),
+    (STEMMER_BACKEND_SNOWBALL, STEMMER_BACKEND_SNOWBALL)
+)
+DEFAULT_STEMMER_BACKEND = STEMMER_BACKEND_ELASTIC
+
 
 def map_iso_to_snowball(iso_code: str) -> Optional[str]:
     mapping = {**ES6_SNOWBALL_MAPPING, **ES7_SNOWBALL_MAPPING}
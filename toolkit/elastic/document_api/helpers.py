@@ -1,3 +1,145 @@
+import time
+from typing import List, Optional
+
+from texta_elastic.core import ElasticCore
+
+from toolkit.settings import FACTS_UPDATE_PROGRESS_POLL_INTERVAL, TEXTA_TAGS_KEY
+
+
+# Fact keys that are mapped as keywords inside the nested texta_facts field and can be used for prefiltering.
+PREFILTER_FACT_KEYS = ("fact", "str_val", "doc_path")
+
+DELETE_FACTS_SCRIPT_ID = "texta_delete_facts"
+EDIT_FACTS_SCRIPT_ID = "texta_edit_facts"
+
+# Painless counterpart of check_if_dict_is_subdict.
+_FACT_MATCHES_TARGETS = """
+boolean matchesTargets(def fact, def targets) {
+    for (def target : targets) {
+        boolean isSubset = true;
+        for (def key : target.keySet()) {
+            if (!fact.containsKey(key) || fact[key] != target[key]) {
+                isSubset = false;
+                break;
+            }
+        }
+        if (isSubset) {
+            return true;
+        }
+    }
+    return false;
+}
+"""
+
+DELETE_FACTS_SCRIPT = _FACT_MATCHES_TARGETS + f"""
+def facts = ctx._source.{TEXTA_TAGS_KEY};
+if (facts == null) {{
+    ctx.op = 'noop';
+    return;
+}}
+List kept = new ArrayList();
+for (def fact : facts) {{
+    if (!matchesTargets(fact, params.target_facts)) {{
+        kept.add(fact);
+    }}
+}}
+if (kept.size() == facts.size()) {{
+    ctx.op = 'noop';
+}} else {{
+    ctx._source.{TEXTA_TAGS_KEY} = kept;
+}}
+"""
+
+EDIT_FACTS_SCRIPT = _FACT_MATCHES_TARGETS + f"""
+def facts = ctx._source.{TEXTA_TAGS_KEY};
+if (facts == null) {{
+    ctx.op = 'noop';
+    return;
+}}
+boolean changed = false;
+for (int i = 0; i < facts.size(); i++) {{
+    if (matchesTargets(facts[i], params.target_facts) && facts[i] != params.resulting_fact) {{
+        facts[i] = params.resulting_fact;
+        changed = true;
+    }}
+}}
+if (!changed) {{
+    ctx.op = 'noop';
+}}
+"""
+
+
 def check_if_dict_is_subdict(main_dict: dict, potential_subdict: dict):
     is_subset = potential_subdict.items() <= main_dict.items()
     return is_subset
+
+
+def get_nested_facts_query(target_facts: List[dict]) -> Optional[dict]:
+    """
+    Creates a nested query which matches the documents containing at least one of the target facts.
+    Returns None when some target fact can't be expressed in the query, as narrowing
+    the search would then miss documents.
+    """
+    should = []
+    for fact in target_facts:
+        must = [
+            {"term": {f"{TEXTA_TAGS_KEY}.{key}": value}}
+            for key, value in fact.items()
+            if key in PREFILTER_FACT_KEYS and isinstance(value, (str, int, float))
+        ]
+        if not must:
+            return None
+        should.append({"bool": {"must": must}})
+
+    # Indices without the facts field in their mapping match nothing instead of failing the whole request.
+    return {"nested": {"path": TEXTA_TAGS_KEY, "ignore_unmapped": True, "query": {"bool": {"should": should, "minimum_should_match": 1}}}}
+
+
+def narrow_query_to_facts(query: dict, target_facts: List[dict]) -> dict:
+    """Adds the nested prefilter of the target facts into the users query."""
+    facts_query = get_nested_facts_query(target_facts)
+    if facts_query is None:
+        return query
+
+    user_query = query.get("query", {"match_all": {}})
+    return {**query, "query": {"bool": {"must": [user_query], "filter": [facts_query]}}}
+
+
+def update_facts_by_query(indices: List[str], query: dict, script_id: str, script_source: str, params: dict, scroll_size: int, show_progress) -> int:
+    """
+    Runs the stored Painless script on the documents matching the query with a sliced
+    _update_by_query and reports the progress of the Elasticsearch task until it's done.
+    :return: Amount of updated documents.
+    """
+    ec = ElasticCore()
+    ec.es.put_script(id=script_id, body={"script": {"lang": "painless", "source": script_source}})
+
+    response = ec.es.update_by_query(
+        index=",".join(indices),
+        body={"query": query.get("query", {"match_all": {}}), "script": {"id": script_id, "params": params}},
+        scroll_size=scroll_size,
+        slices="auto",
+        conflicts="proceed",
+        refresh=True,
+        wait_for_completion=False
+    )
+    es_task_id = response["task"]
+
+    processed = 0
+    while True:
+        es_task = ec.es.tasks.get(task_id=es_task_id)
+        status = es_task["task"]["status"]
+        done = status["updated"] + status["noops"] + status["version_conflicts"] + status["deleted"]
+        show_progress.update(done - processed)
+        processed = done
+
+        if es_task["completed"]:
+            break
+        time.sleep(FACTS_UPDATE_PROGRESS_POLL_INTERVAL)
+
+    if "error" in es_task:
+        raise ValueError(f"Updating the facts by query failed: {es_task['error']}")
+    failures = es_task.get("response", {}).get("failures", [])
+    if failures:
+        raise ValueError(f"Updating the facts by query failed for {len(failures)} documents: {failures[:5]}")
+    return status["updated"]
@@ -7,7 +7,7 @@ from texta_elastic.searcher import EMPTY_QUERY
 from toolkit.core.task.models import Task
 from toolkit.elastic.index.models import Index
 from toolkit.model_constants import CommonModelMixin
-from toolkit.serializer_constants import BULK_SIZE_HELPTEXT, ES_TIMEOUT_HELPTEXT
+from toolkit.serializer_constants import BULK_SIZE_HELPTEXT, ES_TIMEOUT_HELPTEXT, UPDATE_BY_QUERY_HELPTEXT
 from toolkit.settings import CELERY_LONG_TERM_TASK_QUEUE
 
 
@@ -17,6 +17,7 @@ class DeleteFactsByQueryTask(CommonModelMixin):
     query = models.TextField(default=json.dumps(EMPTY_QUERY))
     indices = models.ManyToManyField(Index)
     facts = models.TextField()
+    use_update_by_query = models.BooleanField(default=False, help_text=UPDATE_BY_QUERY_HELPTEXT)
 
 
     def get_available_or_all_indices(self, indices: List[str] = None) -> List[str]:
@@ -61,6 +62,7 @@ class EditFactsByQueryTask(CommonModelMixin):
     indices = models.ManyToManyField(Index)
     target_facts = models.TextField(help_text="Which facts to select for editing.")
     fact = models.TextField(help_text="End result of the selected facts.")
+    use_update_by_query = models.BooleanField(default=False, help_text=UPDATE_BY_QUERY_HELPTEXT)
 
 
     def get_available_or_all_indices(self, indices: List[str] = None) -> List[str]:
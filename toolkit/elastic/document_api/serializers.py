@@ -67,7 +67,7 @@ class DeleteFactsByQuerySerializer(serializers.ModelSerializer, IndicesSerialize
 
     class Meta:
         model = DeleteFactsByQueryTask
-        fields = ('id', 'url', 'author', 'description', 'query', 'facts', 'indices', 'tasks')
+        fields = ('id', 'url', 'author', 'description', 'query', 'facts', 'indices', 'use_update_by_query', 'tasks')
 
 
 class EditFactsByQuerySerializer(serializers.ModelSerializer, IndicesSerializerMixin, CommonModelSerializerMixin, ProjectResourceUrlSerializer):
@@ -102,4 +102,4 @@ class EditFactsByQuerySerializer(serializers.ModelSerializer, IndicesSerializerM
 
     class Meta:
         model = EditFactsByQueryTask
-        fields = ('id', 'url', 'author', 'description', 'query', 'target_facts', 'fact', 'indices', 'tasks')
+        fields = ('id', 'url', 'author', 'description', 'query', 'target_facts', 'fact', 'indices', 'use_update_by_query', 'tasks')
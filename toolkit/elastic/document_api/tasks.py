@@ -7,7 +7,8 @@ from texta_elastic.document import ElasticDocument
 from texta_elastic.searcher import ElasticSearcher
 
 from toolkit.base_tasks import QuietTransactionAwareTask
-from toolkit.elastic.document_api.helpers import check_if_dict_is_subdict
+from toolkit.elastic.document_api.helpers import DELETE_FACTS_SCRIPT, DELETE_FACTS_SCRIPT_ID, EDIT_FACTS_SCRIPT, EDIT_FACTS_SCRIPT_ID, check_if_dict_is_subdict, narrow_query_to_facts, \
+    update_facts_by_query
 from toolkit.elastic.document_api.models import DeleteFactsByQueryTask, EditFactsByQueryTask
 from toolkit.settings import CELERY_LONG_TERM_TASK_QUEUE, INFO_LOGGER, TEXTA_TAGS_KEY
 from toolkit.tools.show_progress import ShowProgress
@@ -28,11 +29,11 @@ def start_fact_delete_query_task(self, worker_id: int):
         # init progress
         show_progress = ShowProgress(task_object, multiplier=1)
         show_progress.update_step('Scrolling document IDs')
-        show_progress.update_view(0)
+        show_progress.update_view()
 
         # create searcher object for scrolling ids
         searcher = ElasticSearcher(
-            query=json.loads(worker_object.query),
+            query=narrow_query_to_facts(json.loads(worker_object.query), json.loads(worker_object.facts)),
             indices=worker_object.get_indices(),
             output=ElasticSearcher.OUT_DOC,
             callback_progress=show_progress,
@@ -43,7 +44,7 @@ def start_fact_delete_query_task(self, worker_id: int):
         count = searcher.count()
 
         show_progress.update_step(f'Deleting facts from {count} documents')
-        show_progress.update_view(0)
+        show_progress.update_view()
         task_object.set_total(count)
         return True
 
@@ -57,11 +58,13 @@ def query_delete_actions_generator(searcher, target_facts: List[dict]):
         for document in documents:
             source = document.get("_source")
             existing_facts = source.get(TEXTA_TAGS_KEY, [])
-            new_facts = []
-            for index_count, existing_fact in enumerate(existing_facts):
-                for fact in target_facts:
-                    if not check_if_dict_is_subdict(main_dict=existing_fact, potential_subdict=fact):
-                        new_facts.append(existing_fact)
+            new_facts = [
+                existing_fact for existing_fact in existing_facts
+                if not any(check_if_dict_is_subdict(main_dict=existing_fact, potential_subdict=fact) for fact in target_facts)
+            ]
+            # Leave documents without any of the target facts untouched.
+            if len(new_facts) == len(existing_facts):
+                continue
 
             document["_source"][TEXTA_TAGS_KEY] = new_facts
             yield {
@@ -86,20 +89,25 @@ def fact_delete_query_task(self, worker_id: int):
         indices: List[str] = worker_object.get_indices()
         target_facts = json.loads(worker_object.facts)
         scroll_size = worker_object.scroll_size
-
-        searcher = ElasticSearcher(
-            query=json.loads(worker_object.query),
-            indices=indices,
-            field_data=[TEXTA_TAGS_KEY],
-            output=ElasticSearcher.OUT_RAW,
-            callback_progress=show_progress,
-            scroll_size=scroll_size,
-            scroll_timeout=f"{worker_object.es_timeout}m"
-        )
-
-        ed = ElasticDocument(index=None)
-        actions = query_delete_actions_generator(searcher, target_facts)
-        ed.bulk_update(actions)
+        query = narrow_query_to_facts(json.loads(worker_object.query), target_facts)
+
+        if worker_object.use_update_by_query:
+            params = {"target_facts": target_facts}
+            update_facts_by_query(indices, query, DELETE_FACTS_SCRIPT_ID, DELETE_FACTS_SCRIPT, params, scroll_size, show_progress)
+        else:
+            searcher = ElasticSearcher(
+                query=query,
+                indices=indices,
+                field_data=[TEXTA_TAGS_KEY],
+                output=ElasticSearcher.OUT_RAW,
+                callback_progress=show_progress,
+                scroll_size=scroll_size,
+                scroll_timeout=f"{worker_object.es_timeout}m"
+            )
+
+            ed = ElasticDocument(index=None)
+            actions = query_delete_actions_generator(searcher, target_facts)
+            ed.bulk_update(actions)
 
         task_object.complete()
         worker_object.save()
@@ -126,11 +134,11 @@ def start_fact_edit_query_task(self, worker_id: int):
         # init progress
         show_progress = ShowProgress(task_object, multiplier=1)
         show_progress.update_step('Scrolling document IDs')
-        show_progress.update_view(0)
+        show_progress.update_view()
 
         # create searcher object for scrolling ids
         searcher = ElasticSearcher(
-            query=json.loads(worker_object.query),
+            query=narrow_query_to_facts(json.loads(worker_object.query), json.loads(worker_object.target_facts)),
             indices=worker_object.get_indices(),
             output=ElasticSearcher.OUT_DOC,
             callback_progress=show_progress,
@@ -140,7 +148,7 @@ def start_fact_edit_query_task(self, worker_id: int):
 
         count = searcher.count()
         show_progress.update_step(f'Editing facts from {count} documents')
-        show_progress.update_view(0)
+        show_progress.update_view()
 
         task_object.set_total(count)
         return True
@@ -160,10 +168,17 @@ def query_edit_actions_generator(searcher: ElasticSearcher, target_facts: List[d
         for document in documents:
             source = document.get("_source")
             existing_facts = source.get(TEXTA_TAGS_KEY, [])
+            is_changed = False
             for index_count, existing_fact in enumerate(existing_facts):
                 for fact in target_facts:
-                    if check_if_dict_is_subdict(main_dict=existing_fact, potential_subdict=fact):
+                    if check_if_dict_is_subdict(main_dict=existing_fact, potential_subdict=fact) and existing_fact != resulting_fact:
                         existing_facts[index_count] = resulting_fact
+                        is_changed = True
+                        break
+
+            # Leave documents without any of the target facts untouched.
+            if not is_changed:
+                continue
 
             document["_source"][TEXTA_TAGS_KEY] = existing_facts
             yield {
@@ -189,20 +204,25 @@ def fact_edit_query_task(self, worker_id: int):
         target_facts = json.loads(worker_object.target_facts)
         fact = json.loads(worker_object.fact)
         scroll_size = worker_object.scroll_size
-
-        searcher = ElasticSearcher(
-            query=json.loads(worker_object.query),
-            indices=indices,
-            field_data=[TEXTA_TAGS_KEY],
-            output=ElasticSearcher.OUT_RAW,
-            callback_progress=show_progress,
-            scroll_size=scroll_size,
-            scroll_timeout=f"{worker_object.es_timeout}m"
-        )
-
-        ed = ElasticDocument(index=None)
-        actions = query_edit_actions_generator(searcher, target_facts, resulting_fact=fact)
-        ed.bulk_update(actions, chunk_size=scroll_size)
+        query = narrow_query_to_facts(json.loads(worker_object.query), target_facts)
+
+        if worker_object.use_update_by_query:
+            params = {"target_facts": target_facts, "resulting_fact": fact}
+            update_facts_by_query(indices, query, EDIT_FACTS_SCRIPT_ID, EDIT_FACTS_SCRIPT, params, scroll_size, show_progress)
+        else:
+            searcher = ElasticSearcher(
+                query=query,
+                indices=indices,
+                field_data=[TEXTA_TAGS_KEY],
+                output=ElasticSearcher.OUT_RAW,
+                callback_progress=show_progress,
+                scroll_size=scroll_size,
+                scroll_timeout=f"{worker_object.es_timeout}m"
+            )
+
+            ed = ElasticDocument(index=None)
+            actions = query_edit_actions_generator(searcher, target_facts, resulting_fact=fact)
+            ed.bulk_update(actions, chunk_size=scroll_size)
 
         task_object.complete()
 
@@ -12,6 +12,9 @@ from rest_framework import status
 from rest_framework.test import APITestCase, APITransactionTestCase
 from texta_elastic.core import ElasticCore
 
+from toolkit.core.task.models import Task
+from toolkit.elastic.document_api.models import DeleteFactsByQueryTask
+from toolkit.elastic.index.models import Index
 from toolkit.helper_functions import reindex_test_dataset
 from toolkit.settings import TEXTA_TAGS_KEY
 from toolkit.test_settings import TEST_FIELD, TEST_QUERY, VERSION_NAMESPACE
@@ -399,6 +402,68 @@ class FactManagementApplicationTests(APITransactionTestCase):
             self.assertTrue(fact["spans"] == json.dumps([[0, 0]]))
 
 
+    def test_delete_facts_by_query_with_update_by_query(self):
+        url = reverse("v2:delete_facts_by_query-list", kwargs=self.kwargs)
+        payload = {
+            "description": "testing whether this deletes facts server-side",
+            "query": {"query": {"ids": {"values": [self.uuid]}}},
+            "facts": [{"str_val": "politsei", "fact": "ORG"}],
+            "indices": [{"name": self.test_index_name}],
+            "use_update_by_query": True
+        }
+        response = self.client.post(url, data=payload, format="json")
+        print_output("test_delete_facts_by_query_with_update_by_query:response.data", response.data)
+        self.assertTrue(response.status_code == status.HTTP_201_CREATED)
+        self.assertTrue(response.data["use_update_by_query"])
+
+        document = self.__wait_for_document_update()
+        self.assertTrue(document[TEST_FIELD] == self.content)
+        self.assertTrue(document.get(TEXTA_TAGS_KEY) == [])
+
+
+    def test_delete_facts_by_query_with_an_index_without_facts_mapping(self):
+        unmapped_index_name = f"texta_test_unmapped_{uuid.uuid1().hex}"
+        self.ec.es.indices.create(index=unmapped_index_name, body={"mappings": {"properties": {TEST_FIELD: {"type": "text"}}}})
+        self.addCleanup(self.ec.es.indices.delete, index=unmapped_index_name, ignore=[400, 404])
+        index, is_created = Index.objects.get_or_create(name=unmapped_index_name)
+        self.project.indices.add(index)
+
+        url = reverse("v2:delete_facts_by_query-list", kwargs=self.kwargs)
+        payload = {
+            "description": "testing whether indices without facts are skipped",
+            "query": {"query": {"ids": {"values": [self.uuid]}}},
+            "facts": [{"str_val": "politsei", "fact": "ORG"}],
+            "indices": [{"name": self.test_index_name}, {"name": unmapped_index_name}],
+            "use_update_by_query": True
+        }
+        response = self.client.post(url, data=payload, format="json")
+        print_output("test_delete_facts_by_query_with_an_index_without_facts_mapping:response.data", response.data)
+        self.assertTrue(response.status_code == status.HTTP_201_CREATED)
+        self.assertEqual(DeleteFactsByQueryTask.objects.get(pk=response.data["id"]).tasks.last().status, Task.STATUS_COMPLETED)
+
+        document = self.__wait_for_document_update()
+        self.assertTrue(document.get(TEXTA_TAGS_KEY) == [])
+
+
+    def test_update_facts_by_query_with_update_by_query(self):
+        url = reverse("v2:edit_facts_by_query-list", kwargs=self.kwargs)
+        payload = {
+            "description": "testing whether this updates facts server-side",
+            "query": {"query": {"ids": {"values": [self.uuid]}}},
+            "target_facts": [{"str_val": "politsei", "fact": "ORG"}],
+            "fact": {"str_val": "Eesti Politsei", "fact": "ORG", "spans": json.dumps([[0, 0]]), "doc_path": "hello"},
+            "indices": [{"name": self.test_index_name}],
+            "use_update_by_query": True
+        }
+        response = self.client.post(url, data=payload, format="json")
+        print_output("test_update_facts_by_query_with_update_by_query:response.data", response.data)
+        self.assertTrue(response.status_code == status.HTTP_201_CREATED)
+
+        document = self.ec.es.get(index=self.test_index_name, doc_type="_doc", id=self.uuid)["_source"]
+        self.assertTrue(document[TEST_FIELD] == self.content)
+        self.assertEqual(document[TEXTA_TAGS_KEY], [payload["fact"]])
+
+
     def test_unauthorized_access(self):
         self.client.logout()
         names = ["v2:delete_facts_by_query-list", "v2:edit_facts_by_query-list"]
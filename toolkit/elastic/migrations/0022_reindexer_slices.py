@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elastic', '0021_analyzers_tasks_reformat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reindexer',
+            name='slices',
+            field=models.IntegerField(default=1),
+        ),
+    ]
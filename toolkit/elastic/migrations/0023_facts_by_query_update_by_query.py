@@ -0,0 +1,23 @@
+# Generated by Django 2.2.28 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('elastic', '0022_reindexer_slices'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deletefactsbyquerytask',
+            name='use_update_by_query',
+            field=models.BooleanField(default=False, help_text='Whether to update the documents inside Elasticsearch with a sliced _update_by_query instead of scrolling them through Toolkit.'),
+        ),
+        migrations.AddField(
+            model_name='editfactsbyquerytask',
+            name='use_update_by_query',
+            field=models.BooleanField(default=False, help_text='Whether to update the documents inside Elasticsearch with a sliced _update_by_query instead of scrolling them through Toolkit.'),
+        ),
+    ]
@@ -19,6 +19,7 @@ class Reindexer(CommonModelMixin):
     random_size = models.IntegerField(default=0)
     field_type = models.TextField(default=json.dumps([]))
     add_facts_mapping = models.BooleanField(default=False)
+    slices = models.IntegerField(default=1)
 
 
     def __str__(self):
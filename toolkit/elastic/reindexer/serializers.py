@@ -13,6 +13,7 @@ from toolkit.elastic.validators import (
     check_for_wildcards
 )
 from toolkit.serializer_constants import CommonModelSerializerMixin, FieldParseSerializer, ProjectResourceUrlSerializer
+from toolkit.settings import REINDEXER_MAX_SLICES
 
 
 class ReindexerCreateSerializer(FieldParseSerializer, serializers.HyperlinkedModelSerializer, ProjectResourceUrlSerializer, CommonModelSerializerMixin):
@@ -40,11 +41,18 @@ class ReindexerCreateSerializer(FieldParseSerializer, serializers.HyperlinkedMod
         required=False,
         min_value=1,
     )
+    slices = serializers.IntegerField(
+        help_text=f'Number of parallel slices the documents are split into while reindexing. Max: {REINDEXER_MAX_SLICES}, default: 1.',
+        required=False,
+        default=1,
+        min_value=1,
+        max_value=REINDEXER_MAX_SLICES
+    )
 
 
     class Meta:
         model = Reindexer
-        fields = ('id', 'url', 'author', 'description', 'indices', 'scroll_size', 'fields', 'query', 'new_index', 'random_size', 'field_type', 'add_facts_mapping', 'tasks')
+        fields = ('id', 'url', 'author', 'description', 'indices', 'scroll_size', 'fields', 'query', 'new_index', 'random_size', 'field_type', 'add_facts_mapping', 'slices', 'tasks')
         fields_to_parse = ('fields', 'field_type', 'indices')
 
 
@@ -1,7 +1,9 @@
 import json
 import logging
+import time
 from typing import List, Optional
 
+from celery import chain, group
 from celery.decorators import task
 from texta_elastic.core import ElasticCore
 from texta_elastic.document import ElasticDocument
@@ -12,7 +14,7 @@ from toolkit.base_tasks import BaseTask
 from toolkit.core.task.models import Task
 from toolkit.elastic.index.models import Index
 from toolkit.elastic.reindexer.models import Reindexer
-from toolkit.settings import INFO_LOGGER
+from toolkit.settings import CELERY_LONG_TERM_TASK_QUEUE, CELERY_SHORT_TERM_TASK_QUEUE, INFO_LOGGER, REINDEXER_PROGRESS_POLL_INTERVAL
 from toolkit.tools.show_progress import ShowProgress
 
 
@@ -87,7 +89,7 @@ def apply_field_changes_generator(generator, index: str, field_data: List[dict],
 
         # Log out the progress every tenth of the way.
         tenth = round((total / 10))
-        if tenth > 0 and counter % tenth == 0:
+        if task_object and tenth > 0 and counter % tenth == 0:
             task_object.update_progress(tenth, step="uploading documents")
             logger.info(f"[Reindexer] Parsed {counter} documents out of {total}!")
 
@@ -113,6 +115,63 @@ def bulk_add_documents(
     elastic_doc.bulk_add_generator(actions=actions, chunk_size=chunk_size, refresh=refresh)
 
 
+def is_server_side_reindex_possible(field_type: List[dict], random_size: int, flatten_doc: bool = FLATTEN_DOC) -> bool:
+    """
+    Documents only need to pass through the client when fields are renamed
+    or retyped or a random subset is picked, otherwise Elasticsearch can copy them by itself.
+    """
+    return not field_type and not random_size and not flatten_doc
+
+
+def track_progress(documents, show_progress: ShowProgress):
+    for document in documents:
+        yield document
+        show_progress.update(1)
+
+
+def get_slice_query(query: dict, slice_id: int, max_slices: int) -> dict:
+    return {**query, "slice": {"id": slice_id, "max": max_slices}}
+
+
+def server_side_reindex(indices: List[str], new_index: str, fields: List[str], query: dict, scroll_size: int, slices: int, show_progress: ShowProgress, logger):
+    """
+    Copies the documents with the _reindex API of Elasticsearch and
+    reports the progress of the background reindexing task until it's done.
+    """
+    body = {
+        "source": {
+            "index": indices,
+            "query": query.get("query", {"match_all": {}}),
+            # Only the parts of the MLP meta that describe the copied fields are kept, same as when copying through Toolkit.
+            "_source": fields + [f"_mlp_meta.{field}" for field in fields],
+            "size": scroll_size
+        },
+        "dest": {"index": new_index}
+    }
+    ec = ElasticCore()
+    response = ec.es.reindex(body=body, slices=slices, refresh=True, wait_for_completion=False)
+    es_task_id = response["task"]
+    logger.info(f"[Reindexer] Started server-side reindexing with task ID '{es_task_id}'.")
+
+    processed = 0
+    while True:
+        es_task = ec.es.tasks.get(task_id=es_task_id)
+        status = es_task["task"]["status"]
+        done = status["created"] + status["updated"] + status["deleted"] + status["version_conflicts"] + status["noops"]
+        show_progress.update(done - processed)
+        processed = done
+
+        if es_task["completed"]:
+            break
+        time.sleep(REINDEXER_PROGRESS_POLL_INTERVAL)
+
+    if "error" in es_task:
+        raise ValueError(f"Server-side reindexing failed: {es_task['error']}")
+    failures = es_task.get("response", {}).get("failures", [])
+    if failures:
+        raise ValueError(f"Server-side reindexing failed for {len(failures)} documents: {failures[:5]}")
+
+
 @task(name="reindex_task", base=BaseTask)
 def reindex_task(reindexer_task_id: int):
     info_logger = logging.getLogger(INFO_LOGGER)
@@ -127,6 +186,7 @@ def reindex_task(reindexer_task_id: int):
         scroll_size = reindexer_obj.scroll_size
         new_index = reindexer_obj.new_index
         query = json.loads(reindexer_obj.query)
+        slices = reindexer_obj.slices
 
         # if no fields, let's use all fields from all selected indices
         if not fields:
@@ -137,7 +197,7 @@ def reindex_task(reindexer_task_id: int):
 
         show_progress = ShowProgress(task_object)
         show_progress.update_step("scrolling data")
-        show_progress.update_view(0)
+        show_progress.update_view()
 
         if random_size > 0:
             query = {
@@ -166,29 +226,105 @@ def reindex_task(reindexer_task_id: int):
         index, is_created = Index.objects.get_or_create(name=new_index, added_by=reindexer_obj.author.username)
 
         info_logger.info(f"[Reindexer] Indexing documents into index '{new_index}'.")
-        # set new_index name as mapping name, perhaps make it customizable in the future
+
+        if is_server_side_reindex_possible(field_type, random_size):
+            show_progress.update_step("reindexing documents")
+            server_side_reindex(indices, new_index, fields, query, scroll_size, slices, show_progress, info_logger)
+
+        # Split the documents between parallel subtasks with sliced scroll,
+        # the last one of them finishes the job once all slices are done.
+        elif slices > 1 and not random_size:
+            show_progress.update_step("uploading documents")
+            slice_tasks = [reindex_slice_task.s(reindexer_obj.pk, slice_id, slices) for slice_id in range(slices)]
+            chain(group(slice_tasks), end_reindex_task.s(reindexer_id=reindexer_obj.pk)).apply_async(queue=CELERY_LONG_TERM_TASK_QUEUE)
+            return True
+
+        else:
+            # set new_index name as mapping name, perhaps make it customizable in the future
+            bulk_add_documents(
+                elastic_search,
+                elastic_doc,
+                task_object=task_object,
+                index=new_index,
+                chunk_size=scroll_size,
+                flatten_doc=FLATTEN_DOC,
+                field_data=field_type,
+                random_size=random_size,
+                total=total,
+                logger=info_logger
+            )
+
+        reindexer_obj.project.indices.add(index)
+
+        # declare the job done
+        task_object.complete()
+
+        info_logger.info(f"[Reindexer] Reindexing into index '{new_index}' succesfully completed.")
+        return True
+
+
+    except Exception as e:
+        task_object.handle_failed_task(e)
+        raise e
+
+
+@task(name="reindex_slice_task", base=BaseTask, queue=CELERY_LONG_TERM_TASK_QUEUE)
+def reindex_slice_task(reindexer_id: int, slice_id: int, max_slices: int):
+    """Reindexes a single slice of the source documents, progress is added to the Task of the Reindexer."""
+    info_logger = logging.getLogger(INFO_LOGGER)
+    reindexer_obj = Reindexer.objects.get(pk=reindexer_id)
+    task_object: Task = reindexer_obj.tasks.last()
+    try:
+        indices = json.loads(reindexer_obj.indices)
+        fields = json.loads(reindexer_obj.fields)
+        field_type = json.loads(reindexer_obj.field_type)
+        query = json.loads(reindexer_obj.query)
+
+        if not fields:
+            fields = ElasticCore().get_fields(indices)
+            fields = [field["path"] for field in fields]
+
+        info_logger.info(f"[Reindexer] Indexing slice {slice_id + 1}/{max_slices} into index '{reindexer_obj.new_index}'.")
+        show_progress = ShowProgress(task_object)
+        show_progress.update_step("uploading documents")
+
+        elastic_search = ElasticSearcher(
+            indices=indices,
+            field_data=fields + ["_mlp_meta"],
+            query=get_slice_query(query, slice_id, max_slices),
+            scroll_size=reindexer_obj.scroll_size
+        )
         bulk_add_documents(
-            elastic_search,
-            elastic_doc,
-            task_object=task_object,
-            index=new_index,
-            chunk_size=scroll_size,
+            track_progress(elastic_search, show_progress),
+            ElasticDocument(reindexer_obj.new_index),
+            index=reindexer_obj.new_index,
+            chunk_size=reindexer_obj.scroll_size,
             flatten_doc=FLATTEN_DOC,
             field_data=field_type,
-            random_size=random_size,
-            total=total,
+            refresh=False,
             logger=info_logger
         )
+        show_progress.flush()
+        return slice_id
 
-        reindexer_obj.project.indices.add(index)
+    except Exception as e:
+        task_object.handle_failed_task(e)
+        raise e
 
-        # declare the job done
+
+@task(name="end_reindex_task", base=BaseTask, queue=CELERY_SHORT_TERM_TASK_QUEUE)
+def end_reindex_task(previous_result, reindexer_id: int):
+    reindexer_obj = Reindexer.objects.get(pk=reindexer_id)
+    task_object: Task = reindexer_obj.tasks.last()
+    try:
+        ElasticCore().es.indices.refresh(index=reindexer_obj.new_index)
+        index = Index.objects.get(name=reindexer_obj.new_index)
+        reindexer_obj.project.indices.add(index)
         task_object.complete()
 
-        info_logger.info(f"[Reindexer] Reindexing into index '{new_index}' succesfully completed.")
+        logging.getLogger(INFO_LOGGER).info(f"[Reindexer] Reindexing into index '{reindexer_obj.new_index}' succesfully completed in {len(previous_result)} slices.")
         return True
 
-
     except Exception as e:
         task_object.handle_failed_task(e)
         raise e
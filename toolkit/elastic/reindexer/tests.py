@@ -97,6 +97,27 @@ class ReindexerViewTests(APITransactionTestCase):
         self.assertTrue(len(mlp_meta.keys()) == 1)  # Ensure that ONLY the fields we wanted are included.
 
 
+    def test_server_side_reindexing_keeps_meta_information_only_for_copied_fields(self):
+        field_name = "comment_content"
+        new_index = f"{self.mlp_test_index}_server_side"
+        self.addCleanup(self.ec.delete_index, index=new_index, ignore=[400, 404])
+        payload = {
+            "description": "Test that server-side reindexing trims the MLP meta.",
+            "fields": [field_name],
+            "indices": [self.mlp_test_index],
+            "new_index": new_index
+        }
+        url = reverse(f"{VERSION_NAMESPACE}:reindexer-list", kwargs={"project_pk": self.project.pk})
+        response = self.client.post(url, data=payload, format="json")
+        print_output("test_server_side_reindexing_keeps_meta_information_only_for_copied_fields:response.data", response.data)
+        self.assertTrue(response.status_code == status.HTTP_201_CREATED)
+
+        hits = self.ec.es.search(index=new_index)["hits"]["hits"]
+        self.assertTrue(len(hits) == 1)
+        self.assertEqual(hits[0]["_source"]["_mlp_meta"], {field_name: {"spans": "text", "analyzers": ["lemmas", "ner", "pos_tags"], "tokenization": "text"}})
+        self.assertTrue("comment_subject" not in hits[0]["_source"])
+
+
     def test_run(self):
         existing_new_index_payload = {
             "description": "TestWrongField",
@@ -318,6 +339,34 @@ class ReindexerViewTests(APITransactionTestCase):
         es.core.delete_index(self.new_index_name)
 
 
+    def test_that_sliced_reindexing_copies_all_documents(self):
+        payload = {
+            "description": "SlicedReindex",
+            "new_index": self.new_index_name,
+            "fields": [TEST_FIELD],
+            "field_type": [{"path": TEST_FIELD, "new_path_name": TEST_FIELD_RENAMED, "field_type": "text"}],
+            "indices": [self.test_index_name],
+            "slices": 3
+        }
+
+        url = reverse("v2:reindexer-list", kwargs={"project_pk": self.project.pk})
+        reindex_response = self.client.post(url, data=payload, format='json')
+        print_output('test_that_sliced_reindexing_copies_all_documents:response.data', reindex_response.data)
+        self.assertEqual(reindex_response.status_code, status.HTTP_201_CREATED)
+
+        task_object = Reindexer.objects.get(pk=reindex_response.data["id"]).tasks.last()
+        self.assertEqual(task_object.status, Task.STATUS_COMPLETED)
+
+        # Every document must end up in the new index exactly once.
+        source_count = ElasticSearcher(indices=[self.test_index_name]).count()
+        new_count = ElasticSearcher(indices=[self.new_index_name]).count()
+        self.assertEqual(source_count, new_count)
+        self.assertTrue(self.project.indices.filter(name=self.new_index_name).exists())
+
+        # Manual clean up.
+        self.ec.delete_index(self.new_index_name)
+
+
     def test_that_texta_facts_structure_is_nested(self):
         payload = {
             "description": "TestTextaFacts",
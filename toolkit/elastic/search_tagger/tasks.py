@@ -127,7 +127,7 @@ def start_search_query_tagger_worker(self, object_id: int):
     task_object = searchquerytagger_object.tasks.last()
     show_progress = ShowProgress(task_object, multiplier=1)
     show_progress.update_step('running search query tagger')
-    show_progress.update_view(0)
+    show_progress.update_view()
     return object_id
 
 
@@ -186,7 +186,7 @@ def start_search_fields_tagger_worker(self, object_id: int):
     searchfieldstagger_object = SearchFieldsTagger.objects.get(pk=object_id)
     show_progress = ShowProgress(searchfieldstagger_object.tasks.last(), multiplier=1)
     show_progress.update_step('running search fields tagger')
-    show_progress.update_view(0)
+    show_progress.update_view()
     return object_id
 
 
@@ -12,9 +12,9 @@ from toolkit.elastic.tools.feedback import Feedback
 from texta_elastic.query import Query
 from texta_elastic.searcher import ElasticSearcher
 from toolkit.settings import INFO_LOGGER
-from toolkit.tools.lemmatizer import ElasticAnalyzer
+from toolkit.tools.lemmatizer import get_stemmer
 from texta_elastic.core import ElasticCore
-from ..choices import ES6_SNOWBALL_MAPPING, ES7_SNOWBALL_MAPPING
+from ..choices import DEFAULT_STEMMER_BACKEND, ES6_SNOWBALL_MAPPING, ES7_SNOWBALL_MAPPING
 from ..exceptions import InvalidDataSampleError
 from ...tools.show_progress import ShowProgress
 
@@ -32,6 +32,7 @@ class DataSample:
                  text_processor: TextProcessor = None,
                  add_negative_sample: bool = False,
                  snowball_language: str = None,
+                 stemmer_backend: str = DEFAULT_STEMMER_BACKEND,
                  detect_lang: bool = False,
                  balance: bool = False,
                  use_sentence_shuffle: bool = False,
@@ -45,6 +46,7 @@ class DataSample:
         :param text_processor:
         :param add_negative_sample:
         :param snowball_language: Which language stemmer to use on the document. Based on internal Elasticsearch values.
+        :param stemmer_backend: Where the Snowball stemming is done, languages the backend does not support fall back to Elasticsearch.
         :param detect_lang: Whether to apply the stemmer based on the pre-detected values in the document itself.
         """
         self.tagger_object = model_object
@@ -54,6 +56,7 @@ class DataSample:
         self.join_fields = join_fields
         self.text_processor = text_processor
         self.add_negative_sample = add_negative_sample
+        self.stemmer_backend = stemmer_backend
         self.detect_lang = detect_lang
         self.balance = balance
         self.use_sentence_shuffle = use_sentence_shuffle
@@ -162,39 +165,45 @@ class DataSample:
             return humanized
 
 
+    def _stem_values(self, language: str, locations: List[tuple]):
+        """
+        Stems the values of the given (class, example index, field) locations in place,
+        all of them together instead of one request per value.
+        """
+        stemmer = get_stemmer(language=language, backend=self.stemmer_backend)
+        texts = [self.data[cl][index][key] for cl, index, key in locations]
+        stemmed_texts = stemmer.stem_texts(texts, language=language)
+        for (cl, index, key), stemmed_text in zip(locations, stemmed_texts):
+            self.data[cl][index][key] = stemmed_text
+
+
     def _snowball(self, snowball_language):
         """
         Stems the texts in data sample using Snowball.
         """
         if snowball_language:
-            lemmatizer = ElasticAnalyzer()
-            for cl, examples in self.data.items():
-                processed_examples = []
-                for example_doc in examples:
-                    new_example_doc = {k: lemmatizer.stem_text(v, language=snowball_language) for k, v in example_doc.items()}
-                    processed_examples.append(new_example_doc)
-                self.data[cl] = processed_examples
+            locations = [(cl, index, key) for cl, examples in self.data.items() for index, example_doc in enumerate(examples) for key in example_doc]
+            self._stem_values(snowball_language, locations)
 
 
     def _snowball_from_doc(self):
         """
         Stems the texts in data sample using Snowball.
         """
-        lemmatizer = ElasticAnalyzer()
+        locations_by_language = {}
         for cl, examples in self.data.items():
-            processed_examples = []
-            for example_doc in examples:
-                for key, value in example_doc.items():
+            for index, example_doc in enumerate(examples):
+                for key in example_doc:
                     # Use this string to differentiate between original and MLP added fields.
                     if "_mlp." not in key:
                         lang = example_doc.get(f"{key}_mlp.language.detected", None)
                         if lang is not None:
                             snowball_language = self.humanize_lang_code(lang)
                             if snowball_language:
-                                example_doc[key] = lemmatizer.stem_text(example_doc[key], snowball_language)
-                processed_examples.append(example_doc)
+                                locations_by_language.setdefault(snowball_language, []).append((cl, index, key))
 
-            self.data[cl] = processed_examples
+        for snowball_language, locations in locations_by_language.items():
+            self._stem_values(snowball_language, locations)
 
 
     @staticmethod
@@ -286,7 +295,7 @@ class DataSample:
 
         for i, class_name in enumerate(self.class_names):
             self.show_progress.update_step(f"scrolling sample for {class_name}")
-            self.show_progress.update_view(0)
+            self.show_progress.update_view()
 
             self._set_class_display_name(class_name)
 
@@ -295,7 +304,7 @@ class DataSample:
         # add negatives as additional class if asked
         if len(self.class_names) < 2 or self.add_negative_sample:
             self.show_progress.update_step("scrolling negative sample")
-            self.show_progress.update_view(0)
+            self.show_progress.update_view()
             # set size of negatives equal to first class examples len
             size = len(samples[self.class_names[0]])
             samples['false'] = self._get_negatives(size)
@@ -453,7 +462,7 @@ class DataSample:
 
     def _get_negatives(self, size):
         self.show_progress.update_step("scrolling negative sample")
-        self.show_progress.update_view(0)
+        self.show_progress.update_view()
         # iterator for retrieving negative examples
         negative_sample_iterator = ElasticSearcher(
             indices=self.indices,
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.28 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('embedding', '0019_tasks_reformat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='embedding',
+            name='stemmer_backend',
+            field=models.CharField(choices=[('elasticsearch', 'elasticsearch'), ('snowball', 'snowball')], default='elasticsearch', max_length=1000),
+        ),
+    ]
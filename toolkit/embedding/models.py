@@ -4,7 +4,9 @@ import pathlib
 import secrets
 import tempfile
 import zipfile
+from typing import List
 
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core import serializers
 from django.db import models
@@ -17,11 +19,18 @@ from texta_tools.text_processor import TextProcessor
 from toolkit.constants import MAX_DESC_LEN
 from toolkit.core.project.models import Project
 from toolkit.core.task.models import Task
-from toolkit.elastic.choices import DEFAULT_SNOWBALL_LANGUAGE
+from toolkit.elastic.choices import DEFAULT_SNOWBALL_LANGUAGE, DEFAULT_STEMMER_BACKEND, STEMMER_BACKEND_CHOICES
 from toolkit.elastic.index.models import Index
 from toolkit.embedding.choices import FASTTEXT_EMBEDDING, W2V_EMBEDDING
 from toolkit.model_constants import CommonModelMixin, FavoriteModelMixin
+from toolkit.embedding.vector_index import VectorIndex
 from toolkit.settings import BASE_DIR, CELERY_LONG_TERM_TASK_QUEUE, RELATIVE_MODELS_PATH
+from toolkit.tools.model_cache import ModelCache, get_file_mtime, get_file_size
+
+
+EMBEDDING_CACHE = ModelCache("embedding", max_items=settings.EMBEDDING_CACHE_MAX_ITEMS, max_bytes=settings.EMBEDDING_CACHE_MAX_BYTES)
+# Kept apart from the models as putting a new version into a cache removes the others with the same id.
+VECTOR_INDEX_CACHE = ModelCache("embedding_vector_index", max_items=settings.EMBEDDING_CACHE_MAX_ITEMS, max_bytes=settings.EMBEDDING_CACHE_MAX_BYTES)
 
 
 class Embedding(FavoriteModelMixin, CommonModelMixin):
@@ -39,6 +48,7 @@ class Embedding(FavoriteModelMixin, CommonModelMixin):
     vocab_size = models.IntegerField(default=0)
     use_phraser = models.BooleanField(default=True)
     snowball_language = models.CharField(default=DEFAULT_SNOWBALL_LANGUAGE, null=True, max_length=MAX_DESC_LEN)
+    stemmer_backend = models.CharField(max_length=MAX_DESC_LEN, choices=STEMMER_BACKEND_CHOICES, default=DEFAULT_STEMMER_BACKEND)
     embedding_type = models.TextField(default=W2V_EMBEDDING)
     embedding_model = models.FileField(null=True, verbose_name='', default=None)
 
@@ -54,6 +64,12 @@ class Embedding(FavoriteModelMixin, CommonModelMixin):
         return container
 
 
+    @staticmethod
+    def get_loaded_file_names(embedding_model_path: str):
+        """Returns the extra files which are read into memory with the embedding, the memory-mapped vector index is shared instead."""
+        return [path for path in Embedding.get_extra_model_file_names(embedding_model_path) if not VectorIndex.is_index_file(path)]
+
+
     @staticmethod
     def save_embedding_extra_files(archive, modified_model_object, old_model_data: dict, extra_paths: list, embedding_field="embedding_model"):
         # Add the extra files from Gensim, they are not stored inside the mode,
@@ -142,6 +158,70 @@ class Embedding(FavoriteModelMixin, CommonModelMixin):
             )
 
 
+    def load_cached_embedding(self):
+        """
+        Loading embedding from the per-process cache, falls back to the disc on a cache miss.
+        The cache key contains the model file and its modification time, so retrained models are never served from the cache.
+        """
+        model_path = self.embedding_model.path
+        cache_key = (self.pk, model_path, get_file_mtime(model_path))
+        return EMBEDDING_CACHE.get_or_load(cache_key, loader=self._load_embedding, size=lambda embedding: self.get_loaded_size())
+
+
+    def _load_embedding(self):
+        embedding = self.get_embedding()
+        embedding.load_django(self)
+        return embedding
+
+
+    def get_loaded_size(self) -> int:
+        """Estimates the memory imprint of the loaded embedding by the size of its files on the disc."""
+        embedding_path = self.embedding_model.path
+        return get_file_size(embedding_path, *Embedding.get_loaded_file_names(embedding_path))
+
+
+    def load_cached_vector_index(self):
+        """Opens the memory-mapped word vectors of the embedding, returns None if the embedding has none."""
+        model_path = self.embedding_model.path
+        cache_key = (self.pk, model_path, get_file_mtime(model_path))
+        return VECTOR_INDEX_CACHE.get_or_load(cache_key, loader=lambda: VectorIndex.load(model_path, probes=settings.EMBEDDING_ANN_PROBES), size=lambda index: index.nbytes)
+
+
+    def build_vector_index(self, embedding):
+        """Writes the word vectors of the trained embedding next to its model for memory-mapping."""
+        word_vectors = embedding.model.wv
+        # Gensim 4 renamed index2word to index_to_key.
+        words = list(getattr(word_vectors, "index_to_key", None) or word_vectors.index2word)
+        build_ann = len(words) >= settings.EMBEDDING_ANN_MIN_VOCAB_SIZE
+        return VectorIndex.build(self.embedding_model.path, words, word_vectors.vectors, build_ann=build_ann, probes=settings.EMBEDDING_ANN_PROBES)
+
+
+    def get_similar(self, positives_used: List[str], negatives_used: List[str], positives_unused: List[str], negatives_unused: List[str], n: int) -> List[dict]:
+        """
+        Finds the phrases most similar to the positives from the memory-mapped vectors of the embedding,
+        falls back to the loaded embedding for the ones trained before the vectors were stored separately.
+        Phrases missing from the vocabulary are ignored the same way as by the loaded embedding.
+        """
+        vector_index = self.load_cached_vector_index()
+        if vector_index is None:
+            embedding = self.load_cached_embedding()
+            return embedding.get_similar(positives_used, negatives_used=negatives_used, positives_unused=positives_unused, negatives_unused=negatives_unused, n=n)
+
+        # Phrases are stored with their words joined by underscores.
+        to_token = lambda phrase: phrase.replace(" ", "_")
+        positives = [to_token(phrase) for phrase in positives_used if to_token(phrase) in vector_index.word_index]
+        if not positives:
+            return []
+
+        similar = vector_index.most_similar(
+            positives=positives,
+            negatives=[to_token(phrase) for phrase in negatives_used],
+            exclude=[to_token(phrase) for phrase in positives_unused + negatives_unused],
+            n=n
+        )
+        return [{"phrase": token.replace("_", " "), "score": score, "model": self.description} for token, score in similar]
+
+
     def get_indices(self):
         return [index.name for index in self.indices.all()]
 
@@ -227,6 +307,9 @@ def auto_delete_embedding_on_delete(sender, instance: Embedding, **kwargs):
     Delete resources on the file-system upon Embedding deletion.
     Triggered on individual model object and queryset Embedding deletion.
     """
+    EMBEDDING_CACHE.invalidate(instance.pk)
+    VECTOR_INDEX_CACHE.invalidate(instance.pk)
+
     if instance.embedding_model:
         embedding_path = pathlib.Path(instance.embedding_model.path)
         for path in embedding_path.parent.glob("{}*".format(embedding_path.name)):
@@ -32,8 +32,8 @@ class EmbeddingSerializer(FieldParseSerializer, serializers.HyperlinkedModelSeri
 
     class Meta:
         model = Embedding
-        fields = ('id', 'url', 'author', 'description', 'indices', 'fields', 'use_phraser', 'embedding_type', 'is_favorited', 'snowball_language', 'query', 'stop_words', 'num_dimensions', 'max_documents', 'min_freq', 'window_size', 'num_epochs', 'vocab_size', 'tasks')
-        read_only_fields = ('vocab_size',)
+        fields = ('id', 'url', 'author', 'description', 'indices', 'fields', 'use_phraser', 'embedding_type', 'is_favorited', 'snowball_language', 'query', 'stop_words', 'num_dimensions', 'max_documents', 'min_freq', 'window_size', 'num_epochs', 'vocab_size', 'stemmer_backend', 'tasks')
+        read_only_fields = ('vocab_size', 'stemmer_backend')
         fields_to_parse = ('fields', 'stop_words')
 
 
@@ -11,7 +11,7 @@ from toolkit.base_tasks import BaseTask
 from toolkit.embedding.models import Embedding
 from toolkit.helper_functions import get_indices_from_object
 from toolkit.settings import CELERY_LONG_TERM_TASK_QUEUE, FACEBOOK_MODEL_SUFFIX
-from toolkit.tools.lemmatizer import ElasticAnalyzer
+from toolkit.tools.lemmatizer import get_stemmer
 from toolkit.tools.show_progress import ShowProgress
 
 
@@ -22,7 +22,7 @@ def train_embedding(embedding_id):
     task_object = embedding_object.tasks.last()
     show_progress = ShowProgress(task_object, multiplier=1)
     show_progress.update_step('training')
-    show_progress.update_view(0)
+    show_progress.update_view()
     try:
         # retrieve indices from project 
         indices = get_indices_from_object(embedding_object)
@@ -30,11 +30,13 @@ def train_embedding(embedding_id):
         max_documents = embedding_object.max_documents
         use_phraser = embedding_object.use_phraser
         snowball_language = embedding_object.snowball_language
+        # the stemmer backend is stored with the model, so later changes in the project don't affect it
+        stemmer_backend = embedding_object.project.stemmer_backend
         stop_words = embedding_object.stop_words
 
         # add stemmer if asked
         if snowball_language:
-            snowball_lemmatizer = ElasticAnalyzer(language=snowball_language)
+            snowball_lemmatizer = get_stemmer(language=snowball_language, backend=stemmer_backend)
         else:
             snowball_lemmatizer = None
         # iterator for texts
@@ -75,7 +77,11 @@ def train_embedding(embedding_id):
 
         # save model path
         embedding_object.embedding_model.name = relative_model_path
+        # store the word vectors separately for memory-mapping and similarity search
+        show_progress.update_step('indexing vectors')
+        embedding_object.build_vector_index(embedding)
         embedding_object.vocab_size = embedding.model.wv.vectors.shape[0]
+        embedding_object.stemmer_backend = stemmer_backend
         embedding_object.save()
         # declare the job done
         task_object.complete()
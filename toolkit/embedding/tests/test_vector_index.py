@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from toolkit.embedding.vector_index import VectorIndex
+
+
+class VectorIndexTests(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.model_path = os.path.join(self.directory, "embedding_1_abc")
+        rng = np.random.default_rng(0)
+        self.words = [f"word_{i}" for i in range(2000)]
+        self.vectors = rng.normal(size=(2000, 16)).astype(np.float32)
+
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+    def test_vectors_are_memory_mapped_on_load(self):
+        VectorIndex.build(self.model_path, self.words, self.vectors)
+        index = VectorIndex.load(self.model_path)
+        self.assertIsInstance(index.vectors, np.memmap)
+        self.assertFalse(index.has_ann)
+        self.assertEqual(index.words, self.words)
+        self.assertIsNone(VectorIndex.load(os.path.join(self.directory, "embedding_2_def")))
+
+
+    def test_exact_search_matches_brute_force(self):
+        index = VectorIndex.build(self.model_path, self.words, self.vectors)
+        normalized = self.vectors / np.linalg.norm(self.vectors, axis=1, keepdims=True)
+        expected = np.argsort(-(normalized @ normalized[0]))[1:6]
+
+        similar = index.most_similar(["word_0"], n=5)
+        self.assertEqual([word for word, score in similar], [self.words[i] for i in expected])
+
+
+    def test_ann_search_finds_near_duplicates_and_excludes_inputs(self):
+        # Every word has a slightly perturbed twin that has to be found through the clusters.
+        twins = self.vectors + np.float32(0.01) * self.vectors[::-1]
+        words = self.words + [f"twin_{i}" for i in range(len(self.words))]
+        VectorIndex.build(self.model_path, words, np.vstack([self.vectors, twins]), build_ann=True)
+        index = VectorIndex.load(self.model_path, probes=4)
+        self.assertTrue(index.has_ann)
+
+        for i in range(0, 2000, 250):
+            similar = index.most_similar([f"word_{i}"], exclude=["word_1"], n=3)
+            self.assertEqual(similar[0][0], f"twin_{i}")
+            self.assertNotIn(f"word_{i}", [word for word, score in similar])
+
+
+    def test_index_files_are_recognized_by_their_suffix(self):
+        VectorIndex.build(self.model_path, self.words, self.vectors, build_ann=True)
+        index_files = [name for name in os.listdir(self.directory) if VectorIndex.is_index_file(os.path.join(self.directory, name))]
+        self.assertEqual(len(index_files), len(VectorIndex.SUFFIXES))
+        self.assertFalse(VectorIndex.is_index_file(self.model_path))
+        self.assertFalse(VectorIndex.is_index_file(f"{self.model_path}.wv.vectors.npy"))
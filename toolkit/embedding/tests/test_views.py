@@ -37,6 +37,7 @@ class EmbeddingViewTests(TransactionTestCase):
         self.run_create_fasttext_embedding_training_and_task_signal()
         self.run_predict(self.test_embedding_id)
         self.run_predict_with_all_lists_and_check_none_are_in_the_response()
+        self.run_predict_with_a_word_missing_from_the_vocabulary()
         self.run_phrase()
         self.run_model_export_import()
         self.create_embedding_with_empty_fields()
@@ -224,6 +225,29 @@ class EmbeddingViewTests(TransactionTestCase):
                 self.assertTrue(elem not in suggestions)
 
 
+    def run_predict_with_a_word_missing_from_the_vocabulary(self):
+        """Tests that words missing from the vocabulary are ignored and the response keeps its format."""
+        predict_url = f'{self.url}{self.test_embedding_id}/predict_similar/'
+        embedding = Embedding.objects.get(pk=self.test_embedding_id)
+
+        response = self.client.post(predict_url, json.dumps({"positives_used": ["eesti"]}), content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data)
+        for item in response.data:
+            self.assertEqual(set(item.keys()), {"phrase", "score", "model"})
+            self.assertEqual(item["model"], embedding.description)
+
+        payload = {"positives_used": ["eesti", "eestimaalasedki"]}
+        response_with_unknown_word = self.client.post(predict_url, json.dumps(payload), content_type='application/json')
+        print_output('predict_with_a_word_missing_from_the_vocabulary:response.data', response_with_unknown_word.data)
+        self.assertEqual(response_with_unknown_word.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["phrase"] for item in response_with_unknown_word.data], [item["phrase"] for item in response.data])
+
+        response = self.client.post(predict_url, json.dumps({"positives_used": ["eestimaalasedki"]}), content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [])
+
+
     def run_phrase(self):
         """Tests the endpoint for the predict action"""
         payload = {"text": "See on mingi eesti keelne tekst testimiseks"}
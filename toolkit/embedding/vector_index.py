@@ -0,0 +1,177 @@
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+class VectorIndex:
+    """
+    Unit-normalized word vectors of an embedding, kept on the disk next to the embedding model.
+
+    The vectors are memory-mapped when the index is opened, so the worker processes
+    of the same machine share their pages instead of each loading a copy.
+    Optionally the vectors are clustered with spherical k-means (an inverted file index)
+    and stored cluster by cluster, so that a query only scores the vectors of the
+    clusters closest to it instead of the whole vocabulary.
+    """
+    VECTORS_SUFFIX = "vectors.npy"
+    VOCAB_SUFFIX = "vocab.txt"
+    CENTROIDS_SUFFIX = "ann_centroids.npy"
+    OFFSETS_SUFFIX = "ann_offsets.npy"
+    SUFFIXES = (VECTORS_SUFFIX, VOCAB_SUFFIX, CENTROIDS_SUFFIX, OFFSETS_SUFFIX)
+
+    DTYPE = np.float32
+    KMEANS_ITERATIONS = 10
+    KMEANS_SAMPLES_PER_CLUSTER = 40
+    ASSIGNMENT_CHUNK_SIZE = 65536
+
+
+    def __init__(self, words: List[str], vectors: np.ndarray, centroids: Optional[np.ndarray] = None, offsets: Optional[np.ndarray] = None, probes: int = 8):
+        self.words = words
+        self.vectors = vectors
+        self.centroids = centroids
+        self.offsets = offsets
+        self.probes = probes
+        self.word_index = {word: i for i, word in enumerate(words)}
+
+
+    @staticmethod
+    def get_path(model_path: str, suffix: str) -> str:
+        # Files that start with the name of the model are exported, imported and deleted together with it.
+        return f"{model_path}_{suffix}"
+
+
+    @classmethod
+    def is_index_file(cls, path: str) -> bool:
+        return any(str(path).endswith(f"_{suffix}") for suffix in cls.SUFFIXES)
+
+
+    @property
+    def has_ann(self) -> bool:
+        return self.centroids is not None
+
+
+    @property
+    def nbytes(self) -> int:
+        """Estimates the private memory of the index, the memory-mapped vectors are shared and not counted."""
+        ann_bytes = self.centroids.nbytes + self.offsets.nbytes if self.has_ann else 0
+        return ann_bytes + sum(len(word) for word in self.words) * 4 + len(self.words) * 150
+
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return vectors / norms
+
+
+    @classmethod
+    def _assign(cls, vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        assignments = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), cls.ASSIGNMENT_CHUNK_SIZE):
+            chunk = vectors[start:start + cls.ASSIGNMENT_CHUNK_SIZE]
+            assignments[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+        return assignments
+
+
+    @classmethod
+    def _cluster(cls, vectors: np.ndarray, num_clusters: int, seed: int) -> np.ndarray:
+        """Spherical k-means on a sample of the vectors, returns the unit-normalized centroids."""
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(vectors), num_clusters * cls.KMEANS_SAMPLES_PER_CLUSTER)
+        sample = vectors[rng.choice(len(vectors), size=sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, size=num_clusters, replace=False)]
+
+        for _ in range(cls.KMEANS_ITERATIONS):
+            assignments = cls._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            # Empty clusters keep their previous centroid.
+            is_empty = np.bincount(assignments, minlength=num_clusters) == 0
+            sums[is_empty] = centroids[is_empty]
+            centroids = cls._normalize(sums)
+        return centroids
+
+
+    @classmethod
+    def build(cls, model_path: str, words: List[str], vectors: np.ndarray, build_ann: bool = False, probes: int = 8, seed: int = 42) -> "VectorIndex":
+        """Writes the vectors of the embedding and optionally their inverted file index next to the model."""
+        vectors = cls._normalize(np.asarray(vectors, dtype=cls.DTYPE))
+        centroids = offsets = None
+
+        if build_ann and len(vectors) > 1:
+            num_clusters = max(1, int(np.sqrt(len(vectors))))
+            centroids = cls._cluster(vectors, num_clusters, seed)
+            assignments = cls._assign(vectors, centroids)
+            # Store the vectors cluster by cluster so every cluster is a contiguous slice.
+            order = np.argsort(assignments, kind="stable")
+            vectors = vectors[order]
+            words = [words[i] for i in order]
+            offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=num_clusters))]).astype(np.int64)
+            np.save(cls.get_path(model_path, cls.CENTROIDS_SUFFIX), centroids)
+            np.save(cls.get_path(model_path, cls.OFFSETS_SUFFIX), offsets)
+
+        np.save(cls.get_path(model_path, cls.VECTORS_SUFFIX), vectors)
+        with open(cls.get_path(model_path, cls.VOCAB_SUFFIX), "w", encoding="utf8") as f:
+            f.write("\n".join(words))
+        return cls(words, vectors, centroids, offsets, probes=probes)
+
+
+    @classmethod
+    def load(cls, model_path: str, probes: int = 8) -> Optional["VectorIndex"]:
+        """Opens the index of the embedding model, returns None for models trained before indices existed."""
+        vectors_path = cls.get_path(model_path, cls.VECTORS_SUFFIX)
+        vocab_path = cls.get_path(model_path, cls.VOCAB_SUFFIX)
+        if not os.path.exists(vectors_path) or not os.path.exists(vocab_path):
+            return None
+
+        vectors = np.load(vectors_path, mmap_mode="r")
+        with open(vocab_path, encoding="utf8") as f:
+            words = f.read().split("\n")
+
+        centroids = offsets = None
+        centroids_path = cls.get_path(model_path, cls.CENTROIDS_SUFFIX)
+        if os.path.exists(centroids_path):
+            centroids = np.load(centroids_path)
+            offsets = np.load(cls.get_path(model_path, cls.OFFSETS_SUFFIX))
+        return cls(words, vectors, centroids, offsets, probes=probes)
+
+
+    def get_query_vector(self, positives: List[str], negatives: List[str]) -> Optional[np.ndarray]:
+        """Combines the words the same way Gensim's most_similar does, ignoring the ones missing from the vocabulary."""
+        weighted = [self.vectors[self.word_index[word]] for word in positives if word in self.word_index]
+        weighted += [-self.vectors[self.word_index[word]] for word in negatives if word in self.word_index]
+        if not weighted:
+            return None
+        query = np.mean(np.array(weighted, dtype=self.DTYPE), axis=0)
+        norm = np.linalg.norm(query)
+        return query / norm if norm else query
+
+
+    def _get_candidate_slices(self, query: np.ndarray) -> List[Tuple[int, int]]:
+        if not self.has_ann:
+            return [(0, len(self.words))]
+        probes = min(self.probes, len(self.centroids))
+        closest = np.argpartition(-(self.centroids @ query), probes - 1)[:probes]
+        return [(int(self.offsets[cluster]), int(self.offsets[cluster + 1])) for cluster in closest]
+
+
+    def most_similar(self, positives: List[str], negatives: List[str] = (), exclude: List[str] = (), n: int = 20) -> List[Tuple[str, float]]:
+        """Returns the n words closest to the positives and furthest from the negatives by cosine similarity."""
+        query = self.get_query_vector(positives, negatives)
+        if query is None:
+            return []
+
+        exclude = set(positives) | set(negatives) | set(exclude)
+        candidates, scores = [], []
+        for start, end in self._get_candidate_slices(query):
+            candidates.append(np.arange(start, end))
+            scores.append(self.vectors[start:end] @ query)
+        candidates, scores = np.concatenate(candidates), np.concatenate(scores)
+
+        # Take a few extra in case some of the best ones are excluded.
+        top = min(len(scores), n + len(exclude))
+        best = np.argpartition(-scores, top - 1)[:top] if top else []
+        best = sorted(best, key=lambda i: -scores[i])
+        results = [(self.words[candidates[i]], float(scores[i])) for i in best if self.words[candidates[i]] not in exclude]
+        return results[:n]
@@ -111,10 +111,7 @@ class EmbeddingViewSet(viewsets.ModelViewSet, BulkDelete, FavoriteModelViewMixin
             if not embedding_object.embedding_model.path:
                 raise NonExistantModelError()
 
-            embedding = embedding_object.get_embedding()
-            embedding.load_django(embedding_object)
-
-            predictions = embedding.get_similar(
+            predictions = embedding_object.get_similar(
                 serializer.validated_data['positives_used'],
                 negatives_used = serializer.validated_data['negatives_used'],
                 positives_unused = serializer.validated_data['positives_unused'],
@@ -137,8 +134,7 @@ class EmbeddingViewSet(viewsets.ModelViewSet, BulkDelete, FavoriteModelViewMixin
             if not embedding_object.embedding_model.name:
                 raise NonExistantModelError()
 
-            embedding = embedding_object.get_embedding()
-            embedding.load_django(embedding_object)
+            embedding = embedding_object.load_cached_embedding()
             phraser = embedding.phraser
 
             text_processor = TextProcessor(phraser=phraser, remove_stop_words=False)
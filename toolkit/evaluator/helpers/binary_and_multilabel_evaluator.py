@@ -1,18 +1,13 @@
 
 import numpy as np
-import json
-import psutil
 import logging
-from collections import defaultdict
-from typing import List, Union, Tuple, Dict
+from collections import Counter
+from typing import Iterable, List, Union, Tuple
 from texta_elastic.searcher import ElasticSearcher
 
 from toolkit.evaluator.models import Evaluator
 from toolkit.evaluator import choices
 
-from sklearn.metrics import precision_score, recall_score, accuracy_score, f1_score, confusion_matrix
-from sklearn.preprocessing import MultiLabelBinarizer
-
 from toolkit.settings import INFO_LOGGER
 
 
@@ -23,25 +18,6 @@ def are_empty_rows_and_cols(array: np.array, indx: int):
     return False
 
 
-def delete_empty_cols(true_labels: np.array, pred_labels: np.array, classes: List[Union[str, int]]) -> Tuple[np.array, np.array]:
-    """ Deletes empty columns corresponding to missing pred/true labels from true and predicted label arrays."""
-    if choices.MISSING_PRED_LABEL in classes and choices.MISSING_TRUE_LABEL in classes:
-        missing_pred_label_indx = classes.index(choices.MISSING_PRED_LABEL)
-        missing_true_label_indx = classes.index(choices.MISSING_TRUE_LABEL)
-        indices = [missing_pred_label_indx, missing_true_label_indx]
-        indices_to_del = []
-
-        for indx in indices:
-            if not true_labels[:, indx].any() and not pred_labels[:, indx].any():
-                indices_to_del.append(indx)
-        if indices_to_del:
-            # Delete empty cols
-            true_labels = np.delete(true_labels, indices_to_del, axis=1)
-            pred_labels = np.delete(pred_labels, indices_to_del, axis=1)
-
-    return (true_labels, pred_labels)
-
-
 def delete_empty_rows_and_cols(confusion: np.array, classes: List[Union[str, int]]) -> Tuple[np.array, List[Union[str, int]]]:
     """ Deletes empty columns and rows corresponding to missing pred/true labels from a confusion matrix."""
     if choices.MISSING_PRED_LABEL in classes and choices.MISSING_TRUE_LABEL in classes:
@@ -145,172 +121,199 @@ def filter_and_average_results(binary_results: dict, min_count: int, max_count:
     return avg_scores
 
 
-def get_memory_imprint(n_docs: int, n_classes: int, eval_type: str, unit="gb", int_size: int=64) -> int:
-    """ Get required memory space for 2 matrices with size (n_docs, n_classes)
-    and dtype = int{int_size}.
+def get_facts_by_name(texta_facts: List[dict], fact_name: str):
+    """ Returns list of fact values corresponding to `fact_name`. """
+    return [fact["str_val"] for fact in texta_facts if fact["fact"] == fact_name]
+
+
+def safe_divide(numerator: np.array, denominator: np.array) -> np.array:
+    """ Divides arrays element-wise, returns 0 where the denominator is 0 like sklearn does."""
+    numerator = np.asarray(numerator, dtype="float64")
+    denominator = np.asarray(denominator, dtype="float64")
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator != 0)
+
+
+def f1_from_precision_and_recall(precision: np.array, recall: np.array) -> np.array:
+    return safe_divide(2 * precision * recall, precision + recall)
+
+
+class ScoreAccumulator:
     """
-    unit_map = {"gb": 1024**3, "mb": 1024**2, "kb": 1024**1, "b": 1024**0}
+    Accumulates per-class true positive, true and predicted label counts and a sparse
+    confusion matrix over scroll batches. Exact scores for all the averaging functions
+    can be calculated from these at any point, so the memory usage depends only on the number of classes.
 
-    # Memory imprint for sparse label matrices
-    matrices_imprint = 2*((n_docs*n_classes*(int_size/(2**3)))/unit_map[unit])
+    Binary evaluation is handled as a multiclass problem with classes [0, 1]
+    where each document has exactly one true and one predicted label.
+    """
 
-    # Memory imprint for list of all classes
-    classes_list_imprint = (n_classes*(int_size/(2**3)))/unit_map[unit]
 
-    if eval_type == "binary":
-        total_imprint = matrices_imprint + classes_list_imprint
+    def __init__(self, classes: List[Union[str, int]], multilabel: bool = True):
+        self.classes = classes
+        self.multilabel = multilabel
+        self.class_index = {label: i for i, label in enumerate(classes)}
 
-    else:
-        # For mutlilabel and multiclass evaluation, individial scores are stored as well
-        binary_results_imprint = 2*((n_docs*(int_size/(2**3)))/unit_map[unit])
-        total_imprint = matrices_imprint + classes_list_imprint + binary_results_imprint
+        n_classes = len(classes)
+        self.true_positives = np.zeros(n_classes, dtype="int64")
+        self.true_counts = np.zeros(n_classes, dtype="int64")
+        self.pred_counts = np.zeros(n_classes, dtype="int64")
+        self.confusion = Counter()
 
-    return total_imprint
+        self.n_docs = 0
+        self.n_exact_matches = 0
+        # Sums of per-document scores for the "samples" average
+        self.samples_precision = 0.0
+        self.samples_recall = 0.0
+        self.samples_f1 = 0.0
 
 
-def is_enough_memory_available(required_memory: float, memory_buffer: float, unit="gb") -> bool:
-    """ Checks if the system has enough memory for the task."""
+    def _to_indices(self, labels: Iterable[Union[str, int]]) -> set:
+        # Labels unknown to the evaluator are ignored like MultiLabelBinarizer does.
+        return {self.class_index[label] for label in labels if label in self.class_index}
 
-    unit_map = {"gb": 1024**3, "mb": 1024**2, "kb": 1024**1, "b": 1024**0}
 
-    available_memory = max(0, (psutil.virtual_memory().available / unit_map[unit]) - memory_buffer)
+    def update(self, true_labels: List[Iterable[Union[str, int]]], pred_labels: List[Iterable[Union[str, int]]]):
+        """ Adds the labels of a scroll batch to the counts."""
+        true_indices, pred_indices, tp_indices = [], [], []
 
-    logging.getLogger(INFO_LOGGER).info(f"Required memory: {round(required_memory, 2)}{unit.upper()} | Memory buffer: {memory_buffer}{unit.upper()} | Available memory: {round(available_memory, 2)}{unit.upper()}")
-    return available_memory >= required_memory
+        for doc_true_labels, doc_pred_labels in zip(true_labels, pred_labels):
+            true_set = self._to_indices(doc_true_labels)
+            pred_set = self._to_indices(doc_pred_labels)
+            tp_set = true_set & pred_set
 
+            true_indices.extend(true_set)
+            pred_indices.extend(pred_set)
+            tp_indices.extend(tp_set)
 
-def get_facts_by_name(texta_facts: List[dict], fact_name: str):
-    """ Returns list of fact values corresponding to `fact_name`. """
-    return [fact["str_val"] for fact in texta_facts if fact["fact"] == fact_name]
+            self.n_docs += 1
+            self.n_exact_matches += int(true_set == pred_set)
 
+            if pred_set:
+                self.samples_precision += len(tp_set) / len(pred_set)
+            if true_set:
+                self.samples_recall += len(tp_set) / len(true_set)
+            if true_set or pred_set:
+                self.samples_f1 += 2 * len(tp_set) / (len(true_set) + len(pred_set))
 
-def get_scores(true_labels: List[Union[str, int]], pred_labels: List[Union[str, int]], classes: List[str], average: str, add_individual_results: bool) -> dict:
-    """ Calculate different metrics' scores with sklearn. """
+            # Documents are placed into the confusion matrix by their first true and predicted class
+            self.confusion[(min(true_set, default=0), min(pred_set, default=0))] += 1
 
-    bin_scores = {}
+        n_classes = len(self.classes)
+        self.true_counts += np.bincount(np.array(true_indices, dtype="int64"), minlength=n_classes)
+        self.pred_counts += np.bincount(np.array(pred_indices, dtype="int64"), minlength=n_classes)
+        self.true_positives += np.bincount(np.array(tp_indices, dtype="int64"), minlength=n_classes)
 
-    # Multilabel and multiclass
-    if len(classes) > 2:
-        # Binarize multilabel results
-        mlb = MultiLabelBinarizer(classes=classes)
 
-        true_labels = mlb.fit_transform(true_labels).astype("int8")
-        pred_labels = mlb.fit_transform(pred_labels).astype("int8")
+    def _scored_classes(self) -> np.array:
+        """ Mask of the classes included in the macro and weighted averages."""
+        present = (self.true_counts + self.pred_counts) > 0
+        if not self.multilabel:
+            # For single-label input only the labels present in the data are scored.
+            return present
 
-        confusion_classes = [i for i in range(len(classes))]
+        scored = np.ones(len(self.classes), dtype=bool)
+        # Missing true/pred label indicators are only scored if they occur in the data.
+        for label in (choices.MISSING_PRED_LABEL, choices.MISSING_TRUE_LABEL):
+            if label in self.class_index:
+                scored[self.class_index[label]] = present[self.class_index[label]]
+        return scored
 
-        if len(classes) <= choices.DEFAULT_MAX_CONFUSION_CLASSES:
-            confusion = confusion_matrix(true_labels.argmax(axis=1), pred_labels.argmax(axis=1), labels=confusion_classes)
-        else:
-            confusion = np.array([[]])
-
-        # Calculate scores for each individual label as well
-        if add_individual_results:
-            for i, label_class in enumerate(classes):
-                label_scores = get_scores(true_labels[:, i], pred_labels[:, i], classes=[0, 1], average="binary", add_individual_results=add_individual_results)
-                label_scores.pop("bin_scores")
-                bin_scores[label_class] = label_scores
-    # Binary
-    else:
-        # Use numerical classes for binary taggers to avoid conflicts
-        # when calculating confusion matrix
-        classes = [0, 1]
-        confusion = confusion_matrix(true_labels, pred_labels, labels=classes)
-
-    # Convert the labels to numpy array for the usage of np.any()
-    true_labels = np.array(true_labels)
-    pred_labels = np.array(pred_labels)
-
-    # Delete empty columns corresponding to missing true/pred labels
-    true_labels, pred_labels = delete_empty_cols(true_labels, pred_labels, classes)
-
-    # If bot true labels and pred labels contain only zeoros,
-    # add nan marker as a marker to ignore these scores while calculating averages
-    if not true_labels.any() and not pred_labels.any():
-        precision = choices.SCORES_NAN_MARKER
-        recall = choices.SCORES_NAN_MARKER
-        f1 = choices.SCORES_NAN_MARKER
-    else:
-        precision = precision_score(true_labels, pred_labels, average=average)
-        recall = recall_score(true_labels, pred_labels, average=average)
-        f1 = f1_score(true_labels, pred_labels, average=average)
-
-    # It's OK for accuracy if the label arrays contain only zeros
-    accuracy = accuracy_score(true_labels, pred_labels)
-
-    scores = {
-        "precision": precision,
-        "recall": recall,
-        "f1_score": f1,
-        "accuracy": accuracy,
-        "confusion_matrix": confusion,
-        "bin_scores": bin_scores
-    }
-    return scores
-
-
-def update_scores(scores_buffer: dict, batch_scores: dict) -> dict:
-    """
-    Update scores in `score_buffer` with scores in `batch_scores`.
-    Return updated buffer.
-    """
 
-    # Convert confusion matrix from list to numpy array so that
-    # the new matrix can be added to it
-    if "confusion_matrix" in scores_buffer:
-        scores_buffer["confusion_matrix"] = np.array(scores_buffer["confusion_matrix"])
+    def _has_positive_labels(self) -> bool:
+        if self.multilabel:
+            return bool(self.true_counts.any() or self.pred_counts.any())
+        return bool(self.true_counts[1] or self.pred_counts[1])
+
+
+    def get_confusion_matrix(self) -> np.array:
+        n_classes = len(self.classes)
+        if self.multilabel and n_classes > choices.DEFAULT_MAX_CONFUSION_CLASSES:
+            return np.array([[]])
+
+        confusion = np.zeros((n_classes, n_classes), dtype="int64")
+        for (true_index, pred_index), count in self.confusion.items():
+            confusion[true_index, pred_index] = count
+        return confusion
 
-    # Iterate over all metrics
-    for metric in batch_scores.keys():
-        # If metric isn't stored yet, add it
-        if metric not in scores_buffer:
-            scores_buffer[metric] = batch_scores[metric]
+
+    def get_scores(self, average: str) -> dict:
+        """ Calculates the scores for the given sklearn averaging function."""
+        if not self._has_positive_labels():
+            precision = recall = f1 = choices.SCORES_NAN_MARKER
 
         else:
-            # Add batch confusion matrix to the matrix based
-            # on previous batches
-            if metric == "confusion_matrix":
-                scores_buffer[metric]+=batch_scores[metric]
-
-            # For other different evaluation metrics
-            # calculate the mean of previous results and
-            # the batch results
-            else:
-                # If score is nan for the batch, continue
-                if batch_scores[metric] == choices.SCORES_NAN_MARKER:
-                    continue
+            class_precision = safe_divide(self.true_positives, self.pred_counts)
+            class_recall = safe_divide(self.true_positives, self.true_counts)
+            class_f1 = f1_from_precision_and_recall(class_precision, class_recall)
 
-                # If stored score for the metric is nan, change it to
-                # current batch's score
-                elif scores_buffer[metric] == choices.SCORES_NAN_MARKER:
-                    scores_buffer[metric] = batch_scores[metric]
+            if average == "binary":
+                precision, recall, f1 = class_precision[1], class_recall[1], class_f1[1]
 
-                # Otherwise, calculate average of the stored score and the batch score
-                else:
-                    scores_buffer[metric] = np.mean([scores_buffer[metric], batch_scores[metric]])
+            elif average == "micro":
+                precision = safe_divide(self.true_positives.sum(), self.pred_counts.sum())
+                recall = safe_divide(self.true_positives.sum(), self.true_counts.sum())
+                f1 = f1_from_precision_and_recall(precision, recall)
 
-    # Convert confusion matric back to list so it can be dumped as json
-    scores_buffer["confusion_matrix"] = scores_buffer["confusion_matrix"].astype("int").tolist()
-    return scores_buffer
+            elif average == "samples":
+                precision = safe_divide(self.samples_precision, self.n_docs)
+                recall = safe_divide(self.samples_recall, self.n_docs)
+                f1 = safe_divide(self.samples_f1, self.n_docs)
 
+            else:
+                scored = self._scored_classes()
+                weights = self.true_counts[scored] if average == "weighted" else np.ones(scored.sum())
+                precision = safe_divide(np.dot(class_precision[scored], weights), weights.sum())
+                recall = safe_divide(np.dot(class_recall[scored], weights), weights.sum())
+                f1 = safe_divide(np.dot(class_f1[scored], weights), weights.sum())
+
+            precision, recall, f1 = float(precision), float(recall), float(f1)
+
+        scores = {
+            "precision": precision,
+            "recall": recall,
+            "f1_score": f1,
+            "accuracy": float(safe_divide(self.n_exact_matches, self.n_docs)),
+            "confusion_matrix": self.get_confusion_matrix().tolist()
+        }
+        return scores
+
+
+    def get_individual_scores(self) -> dict:
+        """ Calculates binary scores for each class separately."""
+        bin_scores = {}
+        false_positives = self.pred_counts - self.true_positives
+        false_negatives = self.true_counts - self.true_positives
+        true_negatives = self.n_docs - self.true_positives - false_positives - false_negatives
+
+        for i, label_class in enumerate(self.classes):
+            tp, fp, fn, tn = (int(count[i]) for count in (self.true_positives, false_positives, false_negatives, true_negatives))
+
+            if not (tp or fp or fn):
+                precision = recall = f1 = choices.SCORES_NAN_MARKER
+            else:
+                precision = float(safe_divide(tp, tp + fp))
+                recall = float(safe_divide(tp, tp + fn))
+                f1 = float(f1_from_precision_and_recall(precision, recall))
 
-def scroll_and_score(generator: ElasticSearcher, evaluator_object: Evaluator, true_fact: str, pred_fact: str, true_fact_value: str = "", pred_fact_value: str = "", classes: List[Union[str, int]]=[], average: str = "macro", score_after_scroll: bool = True, n_batches: int = None, add_individual_results: bool = True) -> Tuple[dict, dict]:
-    """ Scrolls over ES index and calculates scores."""
+            bin_scores[label_class] = {
+                "precision": precision,
+                "recall": recall,
+                "f1_score": f1,
+                "accuracy": float(safe_divide(tp + tn, self.n_docs)),
+                "confusion_matrix": [[tn, fp], [fn, tp]]
+            }
+        return bin_scores
 
-    true_labels = []
-    pred_labels = []
-    ks = 0
 
-    # Store intermediate results
-    scores = {}
-    bin_scores = defaultdict(dict)
+def scroll_and_score(generator: ElasticSearcher, evaluator_object: Evaluator, true_fact: str, pred_fact: str, true_fact_value: str = "", pred_fact_value: str = "", classes: List[Union[str, int]]=[], average: str = "macro", n_batches: int = None, add_individual_results: bool = True) -> Tuple[dict, dict]:
+    """ Scrolls over ES index and calculates scores."""
+    binary = bool(true_fact_value and pred_fact_value)
+    # Use numerical classes for binary evaluation to avoid conflicts with the fact values
+    accumulator = ScoreAccumulator(classes=[0, 1] if binary else classes, multilabel=not binary)
 
     for i, scroll_batch in enumerate(generator):
-
-        # If scores are averaged after each scroll, clean label lists
-        if score_after_scroll:
-            true_labels = []
-            pred_labels = []
+        true_labels = []
+        pred_labels = []
 
         logging.getLogger(INFO_LOGGER).info(f"Scrolling through batch {i+1}/{n_batches}...")
 
@@ -325,12 +328,12 @@ def scroll_and_score(generator: ElasticSearcher, evaluator_object: Evaluator, tr
             pred_fact_values = get_facts_by_name(facts, pred_fact)
 
             # Binary evaluation
-            if true_fact_value and pred_fact_value:
+            if binary:
                 true_label_i = 1 if true_fact_value in true_fact_values else 0
                 pred_label_i = 1 if pred_fact_value in pred_fact_values else 0
 
-                true_labels.append(true_label_i)
-                pred_labels.append(pred_label_i)
+                true_labels.append([true_label_i])
+                pred_labels.append([pred_label_i])
 
             # Multilabel evaluation
             else:
@@ -345,42 +348,12 @@ def scroll_and_score(generator: ElasticSearcher, evaluator_object: Evaluator, tr
                 true_labels.append(true_fact_values)
                 pred_labels.append(pred_fact_values)
 
-        # If scores are averaged after each scroll, calculate scores
-        # and store the averages
-        if score_after_scroll:
-            # Collect scores for the batch
-            logging.getLogger(INFO_LOGGER).info(f"Evaluating batch {i+1}/{n_batches}...")
-            batch_scores = get_scores(true_labels, pred_labels, classes, average, add_individual_results)
-            bin_batch_scores = batch_scores.pop("bin_scores")
-
-            scores = update_scores(scores, batch_scores)
-
-            # For multiclass and multilabel classification, calculate individal scores per each label
-            if add_individual_results and bin_batch_scores:
-
-                # Iterate over all labels
-                for label_class in bin_batch_scores:
-                    bin_scores[label_class] = update_scores(bin_scores[label_class], bin_batch_scores[label_class])
-
-
-            # Update model
-            evaluator_object.precision = scores["precision"]
-            evaluator_object.recall = scores["recall"]
-            evaluator_object.f1_score = scores["f1_score"]
-            evaluator_object.accuracy = scores["accuracy"]
-            evaluator_object.confusion_matrix = json.dumps(scores["confusion_matrix"])
-            evaluator_object.individual_results = json.dumps(bin_scores, ensure_ascii=False)
-            evaluator_object.save()
-
-    if not score_after_scroll:
-        logging.getLogger(INFO_LOGGER).info(f"Start evaluation...")
-        scores = get_scores(true_labels, pred_labels, classes, average, add_individual_results)
-        # Convert confusion matrix to list so that in can be later be later dumpes as JSON
-        scores["confusion_matrix"] = scores["confusion_matrix"].astype("int").tolist()
-        bin_scores = scores.pop("bin_scores")
-
-        # convert bin labels confusion matrix from numpy array to list
-        for label in bin_scores:
-            bin_scores[label]["confusion_matrix"] = bin_scores[label]["confusion_matrix"].astype("int").tolist()
+        accumulator.update(true_labels, pred_labels)
+
+    logging.getLogger(INFO_LOGGER).info(f"Start evaluation...")
+    scores = accumulator.get_scores(average)
+
+    # Calculate scores for each individual label in multiclass and multilabel evaluation
+    bin_scores = accumulator.get_individual_scores() if (add_individual_results and not binary) else {}
 
     return (scores, bin_scores)
@@ -14,11 +14,10 @@ from texta_elastic.searcher import ElasticSearcher
 
 from toolkit.base_tasks import TransactionAwareTask
 from toolkit.evaluator import choices
-from toolkit.evaluator.helpers.binary_and_multilabel_evaluator import (delete_empty_rows_and_cols, get_memory_imprint, is_enough_memory_available, remove_not_found, scroll_and_score)
+from toolkit.evaluator.helpers.binary_and_multilabel_evaluator import delete_empty_rows_and_cols, remove_not_found, scroll_and_score
 from toolkit.evaluator.helpers.entity_evaluator import scroll_and_score_entity
 from toolkit.evaluator.models import Evaluator
-from toolkit.helper_functions import calculate_memory_buffer, get_core_setting
-from toolkit.settings import CELERY_LONG_TERM_TASK_QUEUE, EVALUATOR_MEMORY_BUFFER_RATIO, INFO_LOGGER, MEDIA_URL
+from toolkit.settings import CELERY_LONG_TERM_TASK_QUEUE, INFO_LOGGER, MEDIA_URL
 from toolkit.tools.plots import create_confusion_plot
 from toolkit.tools.show_progress import ShowProgress
 
@@ -146,7 +145,7 @@ def evaluate_tags_task(object_id: int, indices: List[str], query: dict, es_timeo
             es_aggregator = ElasticAggregator(indices=indices, query=deepcopy(query))
 
             # Get all fact values corresponding to true and predicted facts to construct total set of labels
-            # needed for confusion matrix, individual score calculations and memory imprint calculations
+            # needed for confusion matrix and individual score calculations
             true_fact_values = es_aggregator.facts(size=choices.DEFAULT_MAX_AGGREGATION_SIZE, filter_by_fact_name=true_fact)
             pred_fact_values = es_aggregator.facts(size=choices.DEFAULT_MAX_AGGREGATION_SIZE, filter_by_fact_name=pred_fact)
 
@@ -164,43 +163,25 @@ def evaluate_tags_task(object_id: int, indices: List[str], query: dict, es_timeo
 
             classes.sort(key=lambda x: x[0].lower())
 
-        # Get number of documents in the query to estimate memory imprint
+        # Get number of documents in the query
         n_docs = searcher.count()
         task_object.total = n_docs
         task_object.save()
 
         logger.info(f"Number of documents: {n_docs} | Number of classes: {len(classes)}")
 
-        # Get the memory buffer value from core variables
-        core_memory_buffer_value_gb = get_core_setting("TEXTA_EVALUATOR_MEMORY_BUFFER_GB")
-
-        # Calculate the value based on given ratio if the core variable is empty
-        memory_buffer_gb = calculate_memory_buffer(memory_buffer=core_memory_buffer_value_gb, ratio=EVALUATOR_MEMORY_BUFFER_RATIO, unit="gb")
-
-        required_memory = get_memory_imprint(n_docs=n_docs, n_classes=len(classes), eval_type=evaluator_object.evaluation_type, unit="gb", int_size=64)
-        enough_memory = is_enough_memory_available(required_memory=required_memory, memory_buffer=memory_buffer_gb, unit="gb")
-
-        # Enable scoring after each scroll if there isn't enough memory
-        # for calculating the scores for the whole set of documents at once.
-        score_after_scroll = False if enough_memory else True
-
-        # If scoring after each scroll is enabled and scores are averaged after each scroll
-        # the results for each averaging function besides `micro` are imprecise
-        scores_imprecise = True if (score_after_scroll and average != "micro") else False
-
-        # Store document counts, labels' class counts and indicatior if scores are imprecise
+        # Store document counts and labels' class counts. Scores are accumulated
+        # exactly over the scroll batches, so they are never imprecise.
         evaluator_object.document_count = n_docs
         evaluator_object.n_true_classes = len(true_set)
         evaluator_object.n_predicted_classes = len(pred_set)
         evaluator_object.n_total_classes = n_total_classes
-        evaluator_object.scores_imprecise = scores_imprecise
-        evaluator_object.score_after_scroll = score_after_scroll
+        evaluator_object.scores_imprecise = False
+        evaluator_object.score_after_scroll = False
 
         # Save model updates
         evaluator_object.save()
 
-        logger.info(f"Enough available memory: {enough_memory} | Score after scroll: {score_after_scroll}")
-
         # Get number of batches for the logger
         n_batches = math.ceil(n_docs / scroll_size)
 
@@ -214,7 +195,6 @@ def evaluate_tags_task(object_id: int, indices: List[str], query: dict, es_timeo
             pred_fact_value=pred_fact_value,
             classes=classes,
             average=average,
-            score_after_scroll=score_after_scroll,
             n_batches=n_batches,
             add_individual_results=add_individual_results
         )
@@ -13,7 +13,7 @@ from toolkit.core.task.models import Task
 from texta_elastic.query import Query
 from toolkit.evaluator import choices
 from toolkit.evaluator.models import Evaluator as EvaluatorObject
-from toolkit.helper_functions import reindex_test_dataset, set_core_setting
+from toolkit.helper_functions import reindex_test_dataset
 from toolkit.test_settings import (TEST_INDEX_EVALUATOR, TEST_KEEP_PLOT_FILES, TEST_VERSION_PREFIX)
 from toolkit.tools.utils_for_tests import (
     create_test_user,
@@ -40,8 +40,7 @@ class BinaryAndMultilabelEvaluatorObjectViewTests(APITransactionTestCase):
         self.multilabel_evaluators = {avg: None for avg in self.multilabel_avg_functions}
         self.binary_evaluators = {avg: None for avg in self.binary_avg_functions}
 
-        self.memory_optimized_multilabel_evaluators = {avg: None for avg in self.multilabel_avg_functions}
-        self.memory_optimized_binary_evaluators = {avg: None for avg in self.binary_avg_functions}
+        self.small_scroll_multilabel_evaluators = {avg: None for avg in self.multilabel_avg_functions}
 
         self.true_fact_name = "TRUE_TAG"
         self.pred_fact_name = "PREDICTED_TAG"
@@ -78,10 +77,10 @@ class BinaryAndMultilabelEvaluatorObjectViewTests(APITransactionTestCase):
         self.run_test_multilabel_evaluation(add_individual_results=True)
         self.run_test_multilabel_evaluation(add_individual_results=False)
 
-        self.run_test_multilabel_evaluation_with_scoring_after_each_scroll(add_individual_results=True)
-        self.run_test_multilabel_evaluation_with_scoring_after_each_scroll(add_individual_results=False)
+        self.run_test_multilabel_evaluation_with_small_scroll_size(add_individual_results=True)
+        self.run_test_multilabel_evaluation_with_small_scroll_size(add_individual_results=False)
 
-        self.run_test_individual_results_enabled(self.memory_optimized_multilabel_evaluators.values())
+        self.run_test_individual_results_enabled(self.small_scroll_multilabel_evaluators.values())
         self.run_test_individual_results_enabled(self.multilabel_evaluators.values())
         self.run_test_individual_results_disabled(self.binary_evaluators.values())
 
@@ -586,21 +585,18 @@ class BinaryAndMultilabelEvaluatorObjectViewTests(APITransactionTestCase):
             self.add_cleanup_files(evaluator_id)
 
 
-    def run_test_multilabel_evaluation_with_scoring_after_each_scroll(self, add_individual_results: bool):
+    def run_test_multilabel_evaluation_with_small_scroll_size(self, add_individual_results: bool):
         """
-        Test multilabel evaluation with averaging functions set in self.multilabel_avg_functions and
-        calculating and averaging scores after each scroll.
+        Test that multilabel evaluation with averaging functions set in self.multilabel_avg_functions
+        gives exactly the same scores when they are accumulated over many small scroll batches.
         """
 
-        # Set required memory buffer high
-        set_core_setting("TEXTA_EVALUATOR_MEMORY_BUFFER_GB", "100")
-
         main_payload = {
             "description": "Test Multilabel Evaluator",
             "indices": [{"name": self.test_index}],
             "true_fact": self.true_fact_name,
             "predicted_fact": self.pred_fact_name,
-            "scroll_size": 500,
+            "scroll_size": 50,
             "add_individual_results": add_individual_results,
 
         }
@@ -610,7 +606,7 @@ class BinaryAndMultilabelEvaluatorObjectViewTests(APITransactionTestCase):
             payload = {**main_payload, **avg_function_payload}
 
             response = self.client.post(self.url, payload, format="json")
-            print_output(f"evaluator:run_test_multilabel_evaluation_with_scoring_after_each_scroll:avg:{avg_function}:response.data", response.data)
+            print_output(f"evaluator:run_test_multilabel_evaluation_with_small_scroll_size:avg:{avg_function}:response.data", response.data)
 
             self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
@@ -618,18 +614,18 @@ class BinaryAndMultilabelEvaluatorObjectViewTests(APITransactionTestCase):
             evaluator_object = EvaluatorObject.objects.get(pk=evaluator_id)
             task_objects = evaluator_object.tasks.last()
             while task_objects.status != Task.STATUS_COMPLETED:
-                print_output(f"evaluator:run_test_multilabel_evaluation_with_scoring_after_each_scroll:avg:{avg_function}: waiting for evaluation task to finish, current status:", task_objects.status)
+                print_output(f"evaluator:run_test_multilabel_evaluation_with_small_scroll_size:avg:{avg_function}: waiting for evaluation task to finish, current status:", task_objects.status)
                 sleep(1)
 
             evaluator_json = evaluator_object.to_json()
             evaluator_json.pop("individual_results")
 
-            print_output(f"evaluator:run_test_multilabel_evaluation_with_scoring_after_each_scroll:avg:{avg_function}:evaluator_object.json:", evaluator_json)
+            # Scores must match the ones calculated with a larger scroll size
+            reference_json = EvaluatorObject.objects.get(pk=self.multilabel_evaluators[avg_function]).to_json()
+
+            print_output(f"evaluator:run_test_multilabel_evaluation_with_small_scroll_size:avg:{avg_function}:evaluator_object.json:", evaluator_json)
             for metric in choices.METRICS:
-                if metric == "accuracy":
-                    self.assertEqual(evaluator_json[metric], 0)
-                else:
-                    self.assertTrue(0.5 <= evaluator_json[metric] <= 0.8)
+                self.assertAlmostEqual(evaluator_json[metric], reference_json[metric])
 
             self.assertEqual(evaluator_object.n_total_classes, 10)
             self.assertEqual(evaluator_object.n_true_classes, 10)
@@ -640,26 +636,22 @@ class BinaryAndMultilabelEvaluatorObjectViewTests(APITransactionTestCase):
 
             self.assertEqual(evaluator_object.n_total_classes, cm_size[0])
             self.assertEqual(evaluator_object.n_total_classes, cm_size[1])
-
-            scores_imprecise = True if avg_function != "micro" else False
+            self.assertEqual(json.loads(evaluator_object.confusion_matrix), json.loads(reference_json["confusion_matrix"]))
 
             self.assertEqual(evaluator_object.document_count, 2000)
             self.assertEqual(evaluator_object.add_individual_results, add_individual_results)
-            self.assertEqual(evaluator_object.scores_imprecise, scores_imprecise)
+            self.assertEqual(evaluator_object.scores_imprecise, False)
             self.assertEqual(evaluator_object.evaluation_type, "multilabel")
             self.assertEqual(evaluator_object.average_function, avg_function)
 
             if add_individual_results:
                 self.assertEqual(len(json.loads(evaluator_object.individual_results)), evaluator_object.n_total_classes)
-                self.memory_optimized_multilabel_evaluators[avg_function] = evaluator_id
+                self.small_scroll_multilabel_evaluators[avg_function] = evaluator_id
             else:
                 self.assertEqual(len(json.loads(evaluator_object.individual_results)), 0)
 
             self.add_cleanup_files(evaluator_id)
 
-        # Set memory buffer back to default
-        set_core_setting("TEXTA_EVALUATOR_MEMORY_BUFFER_GB", "")
-
 
     def run_export_import(self, evaluator_id: int):
         """Tests endpoint for model export and import."""
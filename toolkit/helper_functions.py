@@ -9,7 +9,6 @@ from functools import partial, wraps
 from typing import List, Optional
 
 import elasticsearch_dsl
-import psutil
 from cryptography.fernet import Fernet
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
@@ -342,18 +341,6 @@ def load_stop_words(stop_words_string: str) -> List[str]:
     return stop_words
 
 
-def calculate_memory_buffer(memory_buffer: str = "", ratio: float = 0.5, unit: str = "gb"):
-    """
-    Calculate memory buffer based on available memory and given ratio
-    if the buffer isn't specified, otherwise return the buffer.
-    """
-    unit_map = {"gb": 1024 ** 3, "mb": 1024 ** 2, "kb": 1024 ** 1, "b": 1024 ** 0}
-    if not memory_buffer:
-        available_memory = psutil.virtual_memory().available / unit_map[unit]
-        memory_buffer = available_memory * ratio
-    return float(memory_buffer)
-
-
 def parse_bool_env(env_name: str, default: bool):
     value = os.getenv(env_name, str(default)).lower()
     if value in ["true"]:
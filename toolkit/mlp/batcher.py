@@ -0,0 +1,155 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import redis
+from celery.result import allow_join_result
+
+from toolkit.mlp.tasks import apply_mlp_on_docs, apply_mlp_on_list
+from toolkit.settings import BROKER_URL, CELERY_MLP_TASK_QUEUE, ERROR_LOGGER, MLP_BATCH_SIZE, MLP_MAX_QUEUED_REQUESTS, MLP_REQUEST_BATCH_WINDOW
+
+
+class _Batch:
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.is_full = threading.Event()
+        self.is_done = threading.Event()
+        self.results: Optional[List[Any]] = None
+        self.error: Optional[Exception] = None
+
+
+class RequestBatcher:
+    """
+    Coalesces the items of concurrent requests arriving within a short time window
+    into a single call of the processing function and scatters the results back to the callers.
+
+    The first request of a batch becomes its leader: it waits until the window has passed or
+    the batch is full, processes all the collected items and wakes up the other requests.
+    Only requests with the same key (e.g. the same analyzers) are batched together.
+    """
+
+
+    def __init__(self, process: Callable[[Hashable, List[Any]], List[Any]], window: float, max_batch_size: int):
+        self.process = process
+        self.window = window
+        self.max_batch_size = max_batch_size
+
+        self._open_batches: Dict[Hashable, _Batch] = {}
+        self._lock = threading.Lock()
+
+
+    def submit(self, key: Hashable, items: List[Any]) -> List[Any]:
+        with self._lock:
+            batch = self._open_batches.get(key)
+            # Requests that do not fit into the open batch start a new one, even if they exceed the batch size alone.
+            is_leader = batch is None or len(batch.items) + len(items) > self.max_batch_size
+            if is_leader:
+                batch = _Batch()
+                self._open_batches[key] = batch
+
+            offset = len(batch.items)
+            batch.items.extend(items)
+            if len(batch.items) >= self.max_batch_size:
+                self._close(key, batch)
+
+        if is_leader:
+            batch.is_full.wait(self.window)
+            with self._lock:
+                self._close(key, batch)
+            try:
+                batch.results = self.process(key, batch.items)
+            except Exception as e:
+                batch.error = e
+            finally:
+                batch.is_done.set()
+        else:
+            batch.is_done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.results[offset:offset + len(items)]
+
+
+    def _close(self, key: Hashable, batch: _Batch):
+        """Stops the batch from accepting new items, must be called while holding the lock."""
+        if self._open_batches.get(key) is batch:
+            del self._open_batches[key]
+        batch.is_full.set()
+
+
+class QueueAdmission:
+    """
+    Keeps count of the synchronous MLP jobs waiting in the queue inside Redis,
+    so that the API could cheaply reject requests when the workers are busy.
+    """
+    KEY = f"texta:{CELERY_MLP_TASK_QUEUE}:queued_requests"
+    # Safety net against counters left behind by killed processes.
+    EXPIRE_SECONDS = 600
+
+
+    def __init__(self, max_queued: int):
+        self.max_queued = max_queued
+        self._redis = redis.Redis.from_url(BROKER_URL, socket_timeout=3)
+
+
+    def is_admitted(self) -> bool:
+        try:
+            queued = int(self._redis.get(self.KEY) or 0)
+            return queued < self.max_queued
+        except redis.RedisError as e:
+            # The check is only an optimization, requests are not rejected when Redis is unavailable.
+            logging.getLogger(ERROR_LOGGER).exception(e)
+            return True
+
+
+    def increment(self):
+        try:
+            pipeline = self._redis.pipeline()
+            pipeline.incr(self.KEY)
+            pipeline.expire(self.KEY, self.EXPIRE_SECONDS)
+            pipeline.execute()
+        except redis.RedisError as e:
+            logging.getLogger(ERROR_LOGGER).exception(e)
+
+
+    def decrement(self):
+        try:
+            if self._redis.decr(self.KEY) < 0:
+                self._redis.set(self.KEY, 0, ex=self.EXPIRE_SECONDS)
+        except redis.RedisError as e:
+            logging.getLogger(ERROR_LOGGER).exception(e)
+
+
+admission = QueueAdmission(MLP_MAX_QUEUED_REQUESTS)
+
+
+def _run_mlp_task(task, **kwargs) -> List[Any]:
+    admission.increment()
+    try:
+        with allow_join_result():
+            return task.apply_async(kwargs=kwargs, queue=CELERY_MLP_TASK_QUEUE).get()
+    finally:
+        admission.decrement()
+
+
+def _process_texts(key: Hashable, texts: List[str]) -> List[dict]:
+    analyzers = list(key)
+    return _run_mlp_task(apply_mlp_on_list, texts=texts, analyzers=analyzers)
+
+
+def _process_docs(key: Hashable, docs: List[dict]) -> List[dict]:
+    analyzers, fields_to_parse = key
+    return _run_mlp_task(apply_mlp_on_docs, docs=docs, analyzers=list(analyzers), fields_to_parse=list(fields_to_parse))
+
+
+text_batcher = RequestBatcher(_process_texts, window=MLP_REQUEST_BATCH_WINDOW, max_batch_size=MLP_BATCH_SIZE)
+doc_batcher = RequestBatcher(_process_docs, window=MLP_REQUEST_BATCH_WINDOW, max_batch_size=MLP_BATCH_SIZE)
+
+
+def process_texts(texts: List[str], analyzers: List[str]) -> List[dict]:
+    return text_batcher.submit(tuple(analyzers), texts)
+
+
+def process_docs(docs: List[dict], analyzers: List[str], fields_to_parse: List[str]) -> List[dict]:
+    return doc_batcher.submit((tuple(analyzers), tuple(fields_to_parse)), docs)
@@ -13,4 +13,7 @@ class WorkerBusyException(APIException):
     """Raised when MLP workers are too busy to receive API request."""
     status_code = status.HTTP_503_SERVICE_UNAVAILABLE
     default_detail = ("MLP workers are busy!")
-    default_code = "mlp_worker_busy"
\ No newline at end of file
+    default_code = "mlp_worker_busy"
+
+class MLPChunksStalledError(Exception):
+    """Raised when the chunks sent to the MLP workers stop finishing while processing an index."""
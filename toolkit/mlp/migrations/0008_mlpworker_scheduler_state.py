@@ -0,0 +1,33 @@
+# Generated by Django 2.2.28 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mlp', '0007_reformat_tasks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mlpworker',
+            name='scroll_id',
+            field=models.TextField(default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='mlpworker',
+            name='is_scroll_exhausted',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='mlpworker',
+            name='dispatched_chunks',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='mlpworker',
+            name='finished_chunks',
+            field=models.IntegerField(default=0),
+        ),
+    ]
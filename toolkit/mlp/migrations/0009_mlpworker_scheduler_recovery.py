@@ -0,0 +1,33 @@
+# Generated by Django 2.2.28 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mlp', '0008_mlpworker_scheduler_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mlpworker',
+            name='pending_hits',
+            field=models.TextField(default='[]'),
+        ),
+        migrations.AddField(
+            model_name='mlpworker',
+            name='scheduler_token',
+            field=models.CharField(default=None, max_length=32, null=True),
+        ),
+        migrations.AddField(
+            model_name='mlpworker',
+            name='scheduled_at',
+            field=models.DateTimeField(default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='mlpworker',
+            name='last_progress_at',
+            field=models.DateTimeField(default=None, null=True),
+        ),
+    ]
@@ -18,12 +18,28 @@ class MLPWorker(CommonModelMixin):
     analyzers = models.TextField(default=json.dumps([]))
     es_scroll_size = models.IntegerField(default=100)
     es_timeout = models.IntegerField(default=30)
+    # State of the scheduler, kept in the database so it could resume after a worker restart.
+    scroll_id = models.TextField(null=True, default=None)
+    is_scroll_exhausted = models.BooleanField(default=False)
+    dispatched_chunks = models.IntegerField(default=0)
+    finished_chunks = models.IntegerField(default=0)
+    # Scrolled documents that haven't been sent to the MLP workers yet, saved together with the scroll cursor.
+    pending_hits = models.TextField(default=json.dumps([]))
+    # Only the scheduler holding the current token may continue, superseded ones stop themselves.
+    scheduler_token = models.CharField(max_length=32, null=True, default=None)
+    scheduled_at = models.DateTimeField(null=True, default=None)
+    last_progress_at = models.DateTimeField(null=True, default=None)
 
 
     def get_indices(self):
         return [index.name for index in self.indices.filter(is_open=True)]
 
 
+    @property
+    def in_flight_chunks(self) -> int:
+        return self.dispatched_chunks - self.finished_chunks
+
+
     def __str__(self):
         return '{0} - {1}'.format(self.pk, self.description)
 
@@ -1,20 +1,25 @@
 import json
 import logging
+import uuid
+from datetime import timedelta
 from typing import List, Optional
 
-from celery import group
 from celery.decorators import task
+from django.db import transaction
+from django.db.models import F
+from django.utils.timezone import now
+from texta_elastic.core import ElasticCore
 from texta_elastic.document import ElasticDocument
-from texta_elastic.searcher import ElasticSearcher
+from texta_elastic.searcher import EMPTY_QUERY, ElasticSearcher
 from texta_mlp.mlp import MLP
 
 from toolkit.base_tasks import BaseTask, QuietTransactionAwareTask, TransactionAwareTask
 from toolkit.core.task.models import Task
-from toolkit.helper_functions import chunks_iter
+from toolkit.mlp.exceptions import MLPChunksStalledError
 from toolkit.mlp.helpers import process_lang_actions
 from toolkit.mlp.models import ApplyLangWorker, MLPWorker
 from toolkit.settings import CELERY_LONG_TERM_TASK_QUEUE, CELERY_MLP_TASK_QUEUE, DEFAULT_MLP_LANGUAGE_CODES, ERROR_LOGGER, INFO_LOGGER, MLP_BATCH_SIZE, MLP_GPU_DEVICE_ID, \
-    MLP_MODEL_DIRECTORY, MLP_USE_GPU, TEXTA_TAGS_KEY, MLP_DEFAULT_LANGUAGE
+    MLP_CHUNK_TIMEOUT, MLP_MAX_INFLIGHT_CHUNKS, MLP_MODEL_DIRECTORY, MLP_SCHEDULER_POLL_INTERVAL, MLP_USE_GPU, TEXTA_TAGS_KEY, MLP_DEFAULT_LANGUAGE
 from toolkit.tools.show_progress import ShowProgress
 
 
@@ -99,83 +104,211 @@ def unite_source_with_meta(meta_docs, source_docs):
 
 
 @task(name="apply_mlp_on_es_doc", base=QuietTransactionAwareTask, queue=CELERY_MLP_TASK_QUEUE, bind=True)
-def apply_mlp_on_es_docs(self, source_and_meta_docs: List[str], mlp_id: int):
+def apply_mlp_on_es_docs(self, source_and_meta_docs: List[dict], mlp_id: int):
     """
     Applies MLP on documents received by previous tasks and updates them in Elasticsearch.
     :param self: Reference to the Celery Task object of this task, courtesy of the bind parameter in the decorator.
-    :param source_and_meta_docs: List of Elasticsearch document ID's to pull from Elasticsearch.
+    :param source_and_meta_docs: Raw Elasticsearch hits (_index, _id, _type and _source) scrolled by the scheduler.
     :param mlp_id: ID of the MLPObject which contains progress.
     """
-    mlp_object = get_mlp_object(mlp_id)
+    try:
+        mlp_object = get_mlp_object(mlp_id)
+        task_object = mlp_object.tasks.last()
 
-    task_object = mlp_object.tasks.last()
+        field_data = get_mlp_field_data(mlp_object)
+        analyzers: List[str] = json.loads(mlp_object.analyzers)
+
+        source_documents = [doc["_source"] for doc in source_and_meta_docs]
+        mlp_docs = apply_mlp_on_documents(source_documents, analyzers, field_data, mlp_id)
+        es_documents = unite_source_with_meta(source_and_meta_docs, mlp_docs)
+        update_documents_in_es(es_documents)
+
+        # Update progress
+        task_object.update_progress_iter(len(source_and_meta_docs))
+        return True
+
+    finally:
+        # The scheduler only counts finished chunks, failed ones must not keep the window occupied forever.
+        MLPWorker.objects.filter(pk=mlp_id).update(finished_chunks=F("finished_chunks") + 1, last_progress_at=now())
 
-    # Get the necessary fields.
+
+def get_mlp_field_data(mlp_object: MLPWorker) -> List[str]:
     field_data: List[str] = json.loads(mlp_object.fields)
     if TEXTA_TAGS_KEY not in field_data:
         # Add in existing facts so that proper duplicate filtering would be applied.
         field_data.append(TEXTA_TAGS_KEY)
+    return field_data
+
+
+def scroll_next_page(mlp_object: MLPWorker) -> List[dict]:
+    """
+    Pulls the next page of documents, either by opening a new scroll or by
+    continuing the one stored in the MLPWorker. The new cursor is left for the caller to save.
+    """
+    ec = ElasticCore()
+    scroll_timeout = f"{mlp_object.es_timeout}m"
+
+    if mlp_object.scroll_id is None:
+        query = json.loads(mlp_object.query)
+        body = {
+            "query": query.get("query", EMPTY_QUERY["query"]),
+            "_source": get_mlp_field_data(mlp_object),
+            "sort": ["_doc"]
+        }
+        response = ec.es.search(index=",".join(mlp_object.get_indices()), body=body, scroll=scroll_timeout, size=mlp_object.es_scroll_size)
+    else:
+        response = ec.es.scroll(scroll_id=mlp_object.scroll_id, scroll=scroll_timeout)
+
+    hits = response["hits"]["hits"]
+    mlp_object.scroll_id = response.get("_scroll_id")
+    if not hits:
+        ec.es.clear_scroll(scroll_id=mlp_object.scroll_id, ignore=(404,))
+        mlp_object.scroll_id = None
+        mlp_object.is_scroll_exhausted = True
+    return hits
+
+
+def report_throughput(task_object: Task):
+    task_object.refresh_from_db(fields=["num_processed", "time_started"])
+    elapsed = (now() - task_object.time_started).total_seconds()
+    docs_per_second = task_object.num_processed / elapsed if elapsed > 0 else 0.0
+    Task.objects.filter(pk=task_object.pk).update(step=f"Applying MLP ({docs_per_second:.1f} docs/s)")
+
+
+def dispatch_next_chunk(mlp_id: int) -> bool:
+    """
+    Sends the next chunk of documents to the MLP workers if the window has room for it.
+    A scrolled page is saved together with the new scroll cursor and a chunk is removed from it
+    in the same transaction that sends it, so documents of a crashed scheduler are not lost.
+    :return: Whether a chunk was sent.
+    """
+    with transaction.atomic():
+        # Locking the row keeps concurrent schedulers from sending the same documents twice.
+        mlp_object = MLPWorker.objects.select_for_update().get(pk=mlp_id)
+        if mlp_object.in_flight_chunks >= MLP_MAX_INFLIGHT_CHUNKS:
+            return False
+
+        pending_hits = json.loads(mlp_object.pending_hits)
+        if not pending_hits and not mlp_object.is_scroll_exhausted:
+            pending_hits = scroll_next_page(mlp_object)
+        if not pending_hits:
+            mlp_object.save(update_fields=["scroll_id", "is_scroll_exhausted"])
+            return False
+
+        chunk = pending_hits[:MLP_BATCH_SIZE]
+        mlp_object.pending_hits = json.dumps(pending_hits[MLP_BATCH_SIZE:])
+        mlp_object.dispatched_chunks = F("dispatched_chunks") + 1
+        mlp_object.last_progress_at = now()
+        mlp_object.save(update_fields=["scroll_id", "is_scroll_exhausted", "pending_hits", "dispatched_chunks", "last_progress_at"])
+        # The chunk is sent once the transaction has been committed.
+        apply_mlp_on_es_docs.apply_async(args=(chunk, mlp_id), queue=CELERY_MLP_TASK_QUEUE)
+        return True
 
-    analyzers: List[str] = json.loads(mlp_object.analyzers)
 
-    # retrieve document from ES
-    document_wrapper = ElasticDocument(index=None)
-    source_and_meta_docs = document_wrapper.get_bulk(doc_ids=source_and_meta_docs, fields=field_data)
+def fill_mlp_window(mlp_id: int) -> bool:
+    """
+    Scrolls new pages of documents and sends them to the MLP workers until
+    MLP_MAX_INFLIGHT_CHUNKS chunks are being processed at once.
+    :return: Whether all the documents have been processed.
+    """
+    while dispatch_next_chunk(mlp_id):
+        pass
 
-    source_documents = [doc["_source"] for doc in source_and_meta_docs]
-    mlp_docs = apply_mlp_on_documents(source_documents, analyzers, field_data, mlp_id)
-    es_documents = unite_source_with_meta(source_and_meta_docs, mlp_docs)
-    update_documents_in_es(es_documents)
+    mlp_object = get_mlp_object(mlp_id)
+    report_throughput(mlp_object.tasks.last())
+    return mlp_object.is_scroll_exhausted and not json.loads(mlp_object.pending_hits) and mlp_object.in_flight_chunks <= 0
 
-    # Update progress
-    task_object.update_progress_iter(len(source_and_meta_docs))
-    return True
+
+def check_for_stalled_chunks(mlp_object: MLPWorker):
+    """
+    Chunks lost together with a killed worker or message are never counted as finished.
+    Fails the processing instead of waiting for them forever when no chunk has finished for MLP_CHUNK_TIMEOUT seconds.
+    """
+    if mlp_object.in_flight_chunks <= 0 or mlp_object.last_progress_at is None:
+        return
+    idle_seconds = (now() - mlp_object.last_progress_at).total_seconds()
+    if idle_seconds > MLP_CHUNK_TIMEOUT:
+        raise MLPChunksStalledError(f"None of the {mlp_object.in_flight_chunks} chunks sent to the MLP workers have finished in {int(idle_seconds)} seconds, they have likely been lost!")
+
+
+def start_mlp_scheduler(mlp_id: int, previous_token: Optional[str]) -> bool:
+    """
+    Starts a new scheduler for the MLPWorker, superseding the one with the previous token.
+    :return: Whether the scheduler was started, False if another one got to replace the previous scheduler first.
+    """
+    token = uuid.uuid4().hex
+    is_claimed = MLPWorker.objects.filter(pk=mlp_id, scheduler_token=previous_token).update(scheduler_token=token, scheduled_at=now())
+    if is_claimed:
+        schedule_mlp_chunks.apply_async(args=(mlp_id, token), queue=CELERY_LONG_TERM_TASK_QUEUE)
+    return bool(is_claimed)
+
+
+def resume_mlp_schedulers():
+    """
+    Restarts the schedulers of running MLP tasks that have not been scheduled for a while,
+    for example because the worker running them was restarted.
+    """
+    stale_before = now() - timedelta(seconds=max(MLP_SCHEDULER_POLL_INTERVAL * 10, 60))
+    for mlp_object in MLPWorker.objects.filter(scheduled_at__lt=stale_before).only("pk", "scheduler_token"):
+        task_object = mlp_object.tasks.last()
+        if task_object and task_object.status == Task.STATUS_RUNNING and start_mlp_scheduler(mlp_object.pk, mlp_object.scheduler_token):
+            logging.getLogger(INFO_LOGGER).info(f"Resuming the scheduler of MLP Task ID: {mlp_object.pk}")
 
 
 @task(name="start_mlp_worker", base=TransactionAwareTask, queue=CELERY_LONG_TERM_TASK_QUEUE, bind=True)
 def start_mlp_worker(self, mlp_id: int):
     """
-    Scrolls the document ID-s and passes them to MLP worker.
+    Counts the documents to process and starts the scheduler which streams them to the MLP workers.
     """
     mlp_object = MLPWorker.objects.get(pk=mlp_id)
 
     task_object = mlp_object.tasks.last()
     try:
         logging.getLogger(INFO_LOGGER).info(f"Applying mlp on the index for MLP Task ID: {mlp_id}")
-        # init progress
-        show_progress = ShowProgress(task_object, multiplier=1)
-        show_progress.update_step('Scrolling document IDs')
-        show_progress.update_view(0)
-        # Get the necessary fields.
         indices: List[str] = mlp_object.get_indices()
-        es_scroll_size = mlp_object.es_scroll_size
-        es_timeout = mlp_object.es_timeout
 
-        # create searcher object for scrolling ids
-        searcher = ElasticSearcher(
-            query=json.loads(mlp_object.query),
-            indices=indices,
-            output=ElasticSearcher.OUT_META,
-            callback_progress=show_progress,
-            scroll_size=es_scroll_size,
-            scroll_timeout=f"{es_timeout}m"
-        )
+        # create searcher object for counting the documents
+        searcher = ElasticSearcher(query=json.loads(mlp_object.query), indices=indices, output=ElasticSearcher.OUT_META)
         # add texta facts mappings to the indices if needed
         for index in indices:
             searcher.core.add_texta_facts_mapping(index=index)
 
-        doc_chunks = list(chunks_iter(searcher, MLP_BATCH_SIZE))
-
-        # update progress
-        show_progress.update_step(f'Applying MLP to {len(doc_chunks)} documents')
-        show_progress.update_view(0)
-
         task_object.set_total(searcher.count())
         task_object.update_status(Task.STATUS_RUNNING)
 
-        # pass document id-s to the next task
-        chain = group(apply_mlp_on_es_docs.s([doc["_id"] for doc in meta_chunk], mlp_id) for meta_chunk in doc_chunks) | end_mlp_task.si(mlp_id)
-        chain.delay()
+        start_mlp_scheduler(mlp_id, mlp_object.scheduler_token)
+        return True
+
+    except Exception as e:
+        task_object.handle_failed_task(e)
+        raise
+
+
+@task(name="schedule_mlp_chunks", base=BaseTask, queue=CELERY_LONG_TERM_TASK_QUEUE, bind=True)
+def schedule_mlp_chunks(self, mlp_id: int, token: str):
+    """
+    Keeps a bounded amount of document chunks in flight, re-scheduling itself until all of them have been processed.
+    The scroll cursor, the scrolled documents and the chunk counters live in the database, so when a worker restart
+    loses the scheduler, resume_mlp_schedulers continues from where it stopped as long as the scroll has not expired.
+    """
+    try:
+        mlp_object = get_mlp_object(mlp_id)
+    except MLPWorker.DoesNotExist:
+        # The task has been cancelled by deleting the MLPWorker.
+        return False
+
+    if mlp_object.scheduler_token != token:
+        # Another scheduler has taken over, for example after this one was thought lost.
+        return False
+
+    task_object = mlp_object.tasks.last()
+    try:
+        MLPWorker.objects.filter(pk=mlp_id).update(scheduled_at=now())
+        check_for_stalled_chunks(mlp_object)
+        if fill_mlp_window(mlp_id):
+            end_mlp_task.apply_async(args=(mlp_id,), queue=CELERY_LONG_TERM_TASK_QUEUE)
+        else:
+            schedule_mlp_chunks.apply_async(args=(mlp_id, token), countdown=MLP_SCHEDULER_POLL_INTERVAL, queue=CELERY_LONG_TERM_TASK_QUEUE)
         return True
 
     except Exception as e:
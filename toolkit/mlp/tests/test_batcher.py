@@ -0,0 +1,76 @@
+import threading
+
+from django.test import SimpleTestCase
+
+from toolkit.mlp.batcher import RequestBatcher
+
+
+class RequestBatcherTests(SimpleTestCase):
+
+    def setUp(self):
+        self.calls = []
+        self.calls_lock = threading.Lock()
+
+
+    def _process(self, key, items):
+        with self.calls_lock:
+            self.calls.append((key, list(items)))
+        return [f"{key}:{item}" for item in items]
+
+
+    def _submit_concurrently(self, batcher, requests):
+        results = [None] * len(requests)
+
+        def submit(index, key, items):
+            results[index] = batcher.submit(key, items)
+
+        threads = [threading.Thread(target=submit, args=(index, key, items)) for index, (key, items) in enumerate(requests)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+
+    def test_concurrent_requests_are_coalesced(self):
+        batcher = RequestBatcher(self._process, window=0.5, max_batch_size=100)
+        requests = [("lemmas", [f"text_{i}_{j}" for j in range(3)]) for i in range(5)]
+        results = self._submit_concurrently(batcher, requests)
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(len(self.calls[0][1]), 15)
+        for (key, items), result in zip(requests, results):
+            self.assertEqual(result, [f"{key}:{item}" for item in items])
+
+
+    def test_batches_respect_the_batch_size_and_keys(self):
+        batcher = RequestBatcher(self._process, window=0.5, max_batch_size=4)
+        requests = [("lemmas", ["a", "b"]), ("lemmas", ["c", "d"]), ("lemmas", ["e", "f"]), ("pos_tags", ["g"])]
+        results = self._submit_concurrently(batcher, requests)
+
+        for key, items in self.calls:
+            self.assertLessEqual(len(items), 4)
+        self.assertEqual(sorted(item for _, items in self.calls for item in items), list("abcdefg"))
+        for (key, items), result in zip(requests, results):
+            self.assertEqual(result, [f"{key}:{item}" for item in items])
+
+
+    def test_errors_reach_every_caller_of_the_batch(self):
+        def fail(key, items):
+            raise ValueError("MLP failed")
+
+        batcher = RequestBatcher(fail, window=0.2, max_batch_size=100)
+        errors = []
+
+        def submit():
+            try:
+                batcher.submit("lemmas", ["text"])
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=submit) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(errors), 3)
@@ -1,16 +1,23 @@
 # Create your tests here.
 import json
 import uuid
+from datetime import timedelta
 
 from django.test import override_settings
 from django.urls import reverse
+from django.utils.timezone import now
 from rest_framework import status
 from rest_framework.test import APITestCase, APITransactionTestCase
 
+from toolkit.core.task.models import Task
 from toolkit.elastic.index.models import Index
 from texta_elastic.core import ElasticCore
 from texta_elastic.searcher import ElasticSearcher
 from toolkit.helper_functions import reindex_test_dataset
+from toolkit.mlp.exceptions import MLPChunksStalledError
+from toolkit.mlp.models import MLPWorker
+from toolkit.mlp.tasks import schedule_mlp_chunks
+from toolkit.settings import MLP_CHUNK_TIMEOUT
 from toolkit.test_settings import (TEST_FIELD, TEST_INDEX, VERSION_NAMESPACE)
 from toolkit.tools.utils_for_tests import create_test_user, print_output, project_creation
 
@@ -222,6 +229,32 @@ class MLPIndexProcessing(APITransactionTestCase):
         self.assertTrue(response.status_code == status.HTTP_400_BAD_REQUEST)
 
 
+    def test_processing_fails_when_chunks_stop_finishing(self):
+        mlp_object = MLPWorker.objects.create(
+            project=self.project,
+            author=self.user,
+            description="TestingStalledProcessing",
+            fields=json.dumps([TEST_FIELD]),
+            scheduler_token="current",
+            dispatched_chunks=3,
+            finished_chunks=1,
+            last_progress_at=now() - timedelta(seconds=MLP_CHUNK_TIMEOUT + 1)
+        )
+        task_object = Task.objects.create(task_type=Task.TYPE_APPLY, status=Task.STATUS_RUNNING)
+        mlp_object.tasks.add(task_object)
+
+        # Superseded schedulers stop without touching the task.
+        self.assertFalse(schedule_mlp_chunks(mlp_object.pk, "superseded"))
+        task_object.refresh_from_db()
+        self.assertEqual(task_object.status, Task.STATUS_RUNNING)
+
+        with self.assertRaises(MLPChunksStalledError):
+            schedule_mlp_chunks(mlp_object.pk, "current")
+        task_object.refresh_from_db()
+        print_output("test_processing_fails_when_chunks_stop_finishing:task.errors", task_object.errors)
+        self.assertEqual(task_object.status, Task.STATUS_FAILED)
+
+
     def test_applying_mlp_on_two_indices(self):
         query_string = "inimene"
         indices = [f"texta_test_{uuid.uuid1()}", f"texta_test_{uuid.uuid1()}"]
@@ -2,7 +2,6 @@
 import json
 
 import rest_framework.filters as drf_filters
-from celery.result import allow_join_result
 from django.db import transaction
 from django_filters import rest_framework as filters
 from rest_framework import permissions, status, viewsets
@@ -14,14 +13,12 @@ from texta_mlp.mlp import MLP
 from toolkit.core.project.models import Project
 from toolkit.elastic.choices import ES6_SNOWBALL_MAPPING, ES7_SNOWBALL_MAPPING
 from toolkit.elastic.index.models import Index
+from toolkit.mlp import batcher
 from toolkit.mlp.exceptions import CouldNotDetectLanguageException, WorkerBusyException
 from toolkit.mlp.models import ApplyLangWorker, MLPWorker
 from toolkit.mlp.serializers import ApplyLangOnIndicesSerializer, LangDetectSerializer, MLPDocsSerializer, MLPListSerializer, MLPWorkerSerializer
-from toolkit.mlp.tasks import apply_mlp_on_docs, apply_mlp_on_list
 from toolkit.permissions.project_permissions import ProjectAccessInApplicationsAllowed
-from toolkit.settings import CELERY_MLP_TASK_QUEUE
 from toolkit.view_constants import BulkDelete
-from toolkit.mlp.helpers import check_celery_tasks
 
 
 class LangDetectView(APIView):
@@ -73,12 +70,11 @@ class MlpDocsProcessor(APIView):
         analyzers = list(serializer.validated_data["analyzers"])
         fields_to_parse = list(serializer.validated_data["fields_to_parse"])
 
-        # check if the MLP queue is empty to process our request
-        if not check_celery_tasks(CELERY_MLP_TASK_QUEUE):
+        # check if the MLP queue has room for our request
+        if not batcher.admission.is_admitted():
             raise WorkerBusyException()
 
-        with allow_join_result():
-            mlp = apply_mlp_on_docs.apply_async(kwargs={"docs": docs, "analyzers": analyzers, "fields_to_parse": fields_to_parse}, queue=CELERY_MLP_TASK_QUEUE).get()
+        mlp = batcher.process_docs(docs, analyzers, fields_to_parse)
         return Response(mlp)
 
 
@@ -95,12 +91,11 @@ class MLPListProcessor(APIView):
         texts = list(serializer.validated_data["texts"])
         analyzers = list(serializer.validated_data["analyzers"])
 
-        # check if the MLP queue is empty to process our request
-        if not check_celery_tasks(CELERY_MLP_TASK_QUEUE):
+        # check if the MLP queue has room for our request
+        if not batcher.admission.is_admitted():
             raise WorkerBusyException()
-        
-        with allow_join_result():
-            mlp = apply_mlp_on_list.apply_async(kwargs={"texts": texts, "analyzers": analyzers}, queue=CELERY_MLP_TASK_QUEUE).get()
+
+        mlp = batcher.process_texts(texts, analyzers)
         return Response(mlp)
 
 
@@ -0,0 +1,41 @@
+from time import time
+
+from rest_framework.test import APITestCase
+from texta_elastic.searcher import ElasticSearcher
+
+from toolkit.test_settings import TEST_FIELD, TEST_INDEX_LARGE
+from toolkit.tools.lemmatizer import ElasticAnalyzer, SnowballStemmer
+from toolkit.tools.utils_for_tests import print_output
+
+
+class StemmerPerformanceTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        searcher = ElasticSearcher(indices=[TEST_INDEX_LARGE], field_data=[TEST_FIELD], scroll_limit=1000, output=ElasticSearcher.OUT_DOC)
+        cls.texts = [doc[TEST_FIELD] for doc in searcher if isinstance(doc.get(TEST_FIELD, None), str)]
+        cls.language = "estonian"
+
+
+    def test_stemming_duration(self):
+        analyzer = ElasticAnalyzer()
+        stemmer = SnowballStemmer()
+
+        start_time = time()
+        single_results = [analyzer.stem_text(text, language=self.language) for text in self.texts]
+        print_output('test_stemming_duration:per_text_elastic', time() - start_time)
+
+        start_time = time()
+        batch_results = analyzer.stem_texts(self.texts, language=self.language)
+        print_output('test_stemming_duration:batched_elastic', time() - start_time)
+        self.assertEqual(single_results, batch_results)
+
+        # Estonian is not supported by the Snowball algorithms of NLTK.
+        start_time = time()
+        snowball_results = stemmer.stem_texts(self.texts, language="english")
+        print_output('test_stemming_duration:batched_snowball', time() - start_time)
+
+        elastic_results = analyzer.stem_texts(self.texts, language="english")
+        elastic_tokens = [token for text in elastic_results for token in text.split()]
+        snowball_tokens = [token for text in snowball_results for token in text.split()]
+        matching = sum(1 for elastic_token, snowball_token in zip(elastic_tokens, snowball_tokens) if elastic_token == snowball_token)
+        print_output('test_stemming_duration:snowball_token_agreement', matching / max(len(elastic_tokens), 1))
@@ -1,5 +1,7 @@
 import json
+from typing import List, NamedTuple, Optional
 
+from django.db.models import Exists, OuterRef
 from rest_framework import permissions
 
 from toolkit.core.project.models import Project
@@ -12,6 +14,54 @@ from toolkit.settings import UAA_PROJECT_ADMIN_SCOPE, USE_UAA
 """
 
 
+class ProjectRole(NamedTuple):
+    is_author: bool
+    is_admin: bool
+    is_user: bool
+    project_scopes: List[str]
+
+
+def get_user_scopes(request) -> List[str]:
+    if not hasattr(request, "_user_scopes"):
+        request._user_scopes = json.loads(request.user.profile.scopes)
+    return request._user_scopes
+
+
+def has_scope_access(request, role: ProjectRole) -> bool:
+    if not USE_UAA:
+        return False
+    user_scopes = get_user_scopes(request)
+    return any(project_scope in user_scopes for project_scope in role.project_scopes)
+
+
+def get_project_role(request, view) -> Optional[ProjectRole]:
+    """
+    Resolves the relation of the requesting user to the project of the view with a single query.
+    The result is memoized on the request, as DRF checks several permissions per request.
+    :return: Role of the user or None if the project doesn't exist.
+    """
+    try:
+        pk = int(view.kwargs['project_pk'] if "project_pk" in view.kwargs else view.kwargs["pk"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    roles = request.__dict__.setdefault("_project_roles", {})
+    if pk not in roles:
+        user_pk = request.user.pk
+        project = Project.objects.filter(pk=pk).annotate(
+            is_admin=Exists(Project.administrators.through.objects.filter(project_id=OuterRef("pk"), user_id=user_pk)),
+            is_user=Exists(Project.users.through.objects.filter(project_id=OuterRef("pk"), user_id=user_pk))
+        ).values("author_id", "scopes", "is_admin", "is_user").first()
+
+        roles[pk] = None if project is None else ProjectRole(
+            is_author=project["author_id"] == user_pk,
+            is_admin=project["is_admin"],
+            is_user=project["is_user"],
+            project_scopes=json.loads(project["scopes"])
+        )
+    return roles[pk]
+
+
 # Everyone except a plebian user.
 class AuthorProjAdminSuperadminAllowed(permissions.BasePermission):
     message = 'Only authors, superusers and project administrators have access to this resource.'
@@ -31,16 +81,11 @@ class AuthorProjAdminSuperadminAllowed(permissions.BasePermission):
         if request.user.is_authenticated is False:
             return False
 
-        try:
-            pk = view.kwargs['project_pk'] if "project_pk" in view.kwargs else view.kwargs["pk"]
-            project_object = Project.objects.get(id=pk)
-        except:
+        role = get_project_role(request, view)
+        if role is None:
             return False
 
-        if request.user == project_object.author:
-            return True
-
-        if request.user in project_object.administrators.all():
+        if role.is_author or role.is_admin:
             return True
 
         # check if user is superuser
@@ -48,8 +93,7 @@ class AuthorProjAdminSuperadminAllowed(permissions.BasePermission):
             return True
 
         if USE_UAA:
-            user_scopes = json.loads(request.user.profile.scopes)
-            if UAA_PROJECT_ADMIN_SCOPE in user_scopes:
+            if UAA_PROJECT_ADMIN_SCOPE in get_user_scopes(request):
                 return True
 
         # nah, not gonna see anything!
@@ -74,10 +118,7 @@ class OnlySuperadminAllowed(permissions.BasePermission):
         if request.user.is_authenticated is False:
             return False
 
-        try:
-            pk = view.kwargs['project_pk'] if "project_pk" in view.kwargs else view.kwargs["pk"]
-            project_object = Project.objects.get(id=pk)
-        except:
+        if get_project_role(request, view) is None:
             return False
 
         # check if user is superuser
@@ -106,30 +147,19 @@ class ProjectAccessInApplicationsAllowed(permissions.BasePermission):
             return False
 
         # retrieve project object
-
-        try:
-            pk = view.kwargs['project_pk'] if "project_pk" in view.kwargs else view.kwargs["pk"]
-            project_object = Project.objects.get(id=pk)
-        except:
+        role = get_project_role(request, view)
+        if role is None:
             return False
 
         # check if user is superuser
         if request.user.is_superuser:
             return True
 
-        if USE_UAA:
-            user_scopes = json.loads(request.user.profile.scopes)
-            project_scopes = json.loads(project_object.scopes)
-
-            for project_scope in project_scopes:
-                if project_scope in user_scopes:
-                    return True
-
-        # check if user is listed among project users
-        if request.user in project_object.users.all():
+        if has_scope_access(request, role):
             return True
 
-        if request.user in project_object.administrators.all():
+        # check if user is listed among project users or administrators
+        if role.is_user or role.is_admin:
             return True
 
         # nah, not gonna see anything!
@@ -156,26 +186,19 @@ class ProjectEditAccessAllowed(permissions.BasePermission):
             return True
 
         # retrieve project object
-        try:
-            pk = view.kwargs['project_pk'] if "project_pk" in view.kwargs else view.kwargs["pk"]
-            project_object = Project.objects.get(id=pk)
-        except:
+        role = get_project_role(request, view)
+        if role is None:
             return False
 
-        if USE_UAA:
-            user_scopes = json.loads(request.user.profile.scopes)
-            project_scopes = json.loads(project_object.scopes)
-
-            for project_scope in project_scopes:
-                if project_scope in user_scopes:
-                    return True
+        if has_scope_access(request, role):
+            return True
 
         # Project admins have the right to edit project information.
-        if request.user in project_object.administrators.all():
+        if role.is_admin:
             return True
 
         # Project users are permitted safe access to project list_view
-        if request.user in project_object.users.all() and request.method in permissions.SAFE_METHODS:
+        if role.is_user and request.method in permissions.SAFE_METHODS:
             return True
 
         return False
@@ -205,28 +228,19 @@ class ExtraActionAccessInApplications(ProjectAccessInApplicationsAllowed):
         if request.user.is_authenticated is False:
             return False
 
-        try:
-            pk = view.kwargs['project_pk'] if "project_pk" in view.kwargs else view.kwargs["pk"]
-            project_object = Project.objects.get(id=pk)
-        except:
+        role = get_project_role(request, view)
+        if role is None:
             return False
 
         # check if user is superuser
         if request.user.is_superuser:
             return True
 
-        if USE_UAA:
-            user_scopes = json.loads(request.user.profile.scopes)
-            project_scopes = json.loads(project_object.scopes)
-
-            for project_scope in project_scopes:
-                if project_scope in user_scopes:
-                    return True
-
-        # check if user is listed among project users
-        if request.user in project_object.users.all():
+        if has_scope_access(request, role):
             return True
-        if request.user in project_object.administrators.all():
+
+        # check if user is listed among project users or administrators
+        if role.is_user or role.is_admin:
             return True
 
         # nah, not goa see anything!
@@ -1,6 +1,9 @@
+from types import SimpleNamespace
+
 from rest_framework import status
-from rest_framework.test import APIClient, APITestCase
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase
 
+from toolkit.permissions.project_permissions import get_project_role
 from toolkit.test_settings import TEST_INDEX, TEST_VERSION_PREFIX
 from toolkit.tools.utils_for_tests import create_test_user, print_output, project_creation
 from toolkit.urls_v2 import project_router
@@ -100,3 +103,45 @@ class ProjectPermissionsTests(APITestCase):
         if SAFE_FORBIDDEN is True and UNSAFE_FORBIDDEN is True:
             print_output(f'{username} update permissions at: {url}', response.status_code)
             self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ProjectRoleResolutionTests(APITestCase):
+
+    def setUp(self):
+        self.author = create_test_user(name='author', password='pw')
+        self.project_user = create_test_user(name='project_user', password='pw')
+        self.project_admin = create_test_user(name='project_admin', password='pw')
+        self.outsider = create_test_user(name='outsider', password='pw')
+
+        self.project = project_creation("roleProject", TEST_INDEX, self.author)
+        self.project.users.add(self.project_user)
+        self.project.administrators.add(self.project_admin)
+        self.view = SimpleNamespace(kwargs={"project_pk": str(self.project.pk)})
+
+
+    def _get_request(self, user):
+        request = APIRequestFactory().get("/")
+        request.user = user
+        return request
+
+
+    def test_role_is_resolved_with_a_single_query(self):
+        request = self._get_request(self.project_user)
+        with self.assertNumQueries(1):
+            for _ in range(3):
+                role = get_project_role(request, self.view)
+        self.assertTrue(role.is_user)
+        self.assertFalse(role.is_admin)
+        self.assertFalse(role.is_author)
+
+
+    def test_roles_of_different_users(self):
+        self.assertTrue(get_project_role(self._get_request(self.author), self.view).is_author)
+        self.assertTrue(get_project_role(self._get_request(self.project_admin), self.view).is_admin)
+        role = get_project_role(self._get_request(self.outsider), self.view)
+        self.assertFalse(role.is_author or role.is_admin or role.is_user)
+
+
+    def test_missing_project_has_no_role(self):
+        view = SimpleNamespace(kwargs={"project_pk": str(self.project.pk + 1000)})
+        self.assertIsNone(get_project_role(self._get_request(self.author), view))
@@ -44,7 +44,7 @@ def start_rakun_task(self, object_id: int):
     task_object = rakun.tasks.last()
     show_progress = ShowProgress(task_object, multiplier=1)
     show_progress.update_step('starting rakun')
-    show_progress.update_view(0)
+    show_progress.update_view()
     return object_id
 
 
@@ -0,0 +1,81 @@
+from collections import deque
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton for finding which of many keywords occur
+    inside a text with a single pass over it.
+    Every keyword carries a set of labels, the search returns the union of
+    the labels of all the keywords found in the text.
+    """
+
+
+    def __init__(self, keywords: Iterable[Tuple[str, Hashable]] = ()):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Set[Hashable]] = [set()]
+        self._is_built = False
+
+        for keyword, label in keywords:
+            self.add(keyword, label)
+
+
+    def __len__(self):
+        return len(self._goto)
+
+
+    def add(self, keyword: str, label: Hashable):
+        if not keyword:
+            return
+
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(set())
+            state = next_state
+
+        self._output[state].add(label)
+        self._is_built = False
+
+
+    def build(self):
+        """Computes the failure links with a breadth-first pass over the trie."""
+        queue = deque()
+        for state in self._goto[0].values():
+            self._fail[state] = 0
+            queue.append(state)
+
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail_state = self._fail[state]
+                while fail_state and char not in self._goto[fail_state]:
+                    fail_state = self._fail[fail_state]
+                self._fail[next_state] = self._goto[fail_state].get(char, 0)
+                self._output[next_state] |= self._output[self._fail[next_state]]
+
+        self._is_built = True
+
+
+    def search(self, text: str) -> Set[Hashable]:
+        """Returns the labels of all the keywords present in the text."""
+        if not self._is_built:
+            self.build()
+
+        found = set()
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return found
@@ -1,8 +1,10 @@
 import json
+import re
 import tempfile
 import zipfile
-from typing import List, Optional
+from typing import List, Optional, Set
 
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core import serializers
 from django.db import models, transaction
@@ -12,9 +14,91 @@ from texta_lexicon_matcher.lexicon_matcher import LexiconMatcher
 
 from toolkit.core.project.models import Project
 from toolkit.core.task.models import Task
+from toolkit.helper_functions import hash_string
 from toolkit.model_constants import CommonModelMixin, FavoriteModelMixin
 from toolkit.regex_tagger import choices
+from toolkit.regex_tagger.automaton import KeywordAutomaton
 from toolkit.settings import TEXTA_TAGS_KEY
+from toolkit.tools.model_cache import ModelCache
+
+
+# Compiled matchers of Regex Taggers and Regex Tagger Groups, keyed on their configuration.
+MATCHER_CACHE = ModelCache("regex_tagger", max_items=settings.REGEX_TAGGER_CACHE_MAX_ITEMS, max_bytes=0)
+GROUP_MATCHER_CACHE = ModelCache("regex_tagger_group", max_items=settings.REGEX_TAGGER_CACHE_MAX_ITEMS, max_bytes=0)
+
+MATCHER_FIELDS = (
+    "lexicon", "counter_lexicon", "operator", "match_type", "required_words", "phrase_slop",
+    "counter_slop", "n_allowed_edits", "return_fuzzy_match", "ignore_case", "ignore_punctuation"
+)
+
+WORD_PATTERN = re.compile(r"\w+")
+REGEX_SPECIAL_CHARACTERS = set("\\[](){}.*+?^$|")
+
+
+def get_matcher_version(regex_tagger_object) -> str:
+    """Hash of the fields that affect matching, changes whenever the tagger is edited."""
+    config = [getattr(regex_tagger_object, field) for field in MATCHER_FIELDS]
+    return hash_string(json.dumps(config, ensure_ascii=False))
+
+
+def load_cached_matcher(regex_tagger_object) -> LexiconMatcher:
+    cache_key = (regex_tagger_object.pk, get_matcher_version(regex_tagger_object))
+    return MATCHER_CACHE.get_or_load(cache_key, loader=lambda: load_matcher(regex_tagger_object), size=lambda matcher: 0)
+
+
+def get_prefilter_keywords(regex_tagger_object) -> Optional[Set[str]]:
+    """
+    Returns the words of which at least one has to be present in a text for the tagger to match it
+    or None if the tagger can not be prefiltered, e.g. when fuzzy matching is allowed.
+    """
+    if regex_tagger_object.n_allowed_edits > 0 or regex_tagger_object.required_words <= 0:
+        return None
+
+    keywords = set()
+    for entry in json.loads(regex_tagger_object.lexicon):
+        words = WORD_PATTERN.findall(entry)
+        # Entries consisting only of punctuation or containing regex syntax can not be prefiltered.
+        if not words or REGEX_SPECIAL_CHARACTERS.intersection(entry):
+            return None
+        keywords.update(word.lower() if regex_tagger_object.ignore_case else word for word in words)
+    return keywords
+
+
+class CompiledRegexTaggerGroup:
+    """
+    All the matchers of a Regex Tagger Group compiled at once.
+    Lexicon words of the exact matching taggers are combined into a single keyword automaton,
+    so only the taggers with at least one of their words present in a text are run on it.
+    Taggers that allow fuzzy matches are always run.
+    """
+
+
+    def __init__(self, regex_taggers: List["RegexTagger"]):
+        self.taggers = []
+        self.always_run = set()
+        case_sensitive = []
+        case_insensitive = []
+
+        for index, regex_tagger in enumerate(regex_taggers):
+            self.taggers.append((regex_tagger, load_cached_matcher(regex_tagger)))
+            keywords = get_prefilter_keywords(regex_tagger)
+            if keywords is None:
+                self.always_run.add(index)
+            else:
+                container = case_insensitive if regex_tagger.ignore_case else case_sensitive
+                container.extend((keyword, index) for keyword in keywords)
+
+        self.case_sensitive = KeywordAutomaton(case_sensitive)
+        self.case_insensitive = KeywordAutomaton(case_insensitive)
+        self.case_sensitive.build()
+        self.case_insensitive.build()
+
+
+    def get_candidates(self, text: str):
+        """Yields the taggers and matchers that can match the text, in the order of the group."""
+        candidates = self.always_run | self.case_sensitive.search(text) | self.case_insensitive.search(text.lower())
+        for index in sorted(candidates):
+            yield self.taggers[index]
 
 
 def load_matcher(regex_tagger_object):
@@ -76,7 +160,7 @@ class RegexTagger(FavoriteModelMixin, CommonModelMixin):
 
     def match_texts(self, texts: List[str], as_texta_facts: bool = False, field: str = "", matcher: Optional[LexiconMatcher] = None, add_source: bool = True, fact_name: str = "", fact_value: str = "", add_spans: bool = True):
         results = []
-        matcher = matcher or load_matcher(self)  # Optionally, you can insert another matcher of your choice.
+        matcher = matcher or load_cached_matcher(self)  # Optionally, you can insert another matcher of your choice.
         for text in texts:
             if text and isinstance(text, str):
                 matches = matcher.get_matches(text)
@@ -142,12 +226,24 @@ class RegexTaggerGroup(FavoriteModelMixin, CommonModelMixin):
     regex_taggers = models.ManyToManyField(RegexTagger, default=None)
 
 
-    def apply(self, texts: List[str] = [], field_path: Optional[str] = None, fact_name: str = "", fact_value: str = "", add_spans: bool = True):
+    def get_compiled_matchers(self) -> CompiledRegexTaggerGroup:
+        """
+        Compiles all the member taggers at once, the result is cached until any of them changes.
+        The cached taggers also give the facts their values, so their descriptions are a part of the version.
+        """
+        regex_taggers = list(self.regex_taggers.all())
+        version = hash_string("".join(f"{tagger.pk}:{tagger.description}:{get_matcher_version(tagger)}" for tagger in regex_taggers))
+        cache_key = (self.pk, version)
+        return GROUP_MATCHER_CACHE.get_or_load(cache_key, loader=lambda: CompiledRegexTaggerGroup(regex_taggers), size=lambda compiled: 0)
+
+
+    def apply(self, texts: List[str] = [], field_path: Optional[str] = None, fact_name: str = "", fact_value: str = "", add_spans: bool = True,
+              compiled: Optional[CompiledRegexTaggerGroup] = None):
         results = []
+        compiled = compiled or self.get_compiled_matchers()
         for text in texts:
             if isinstance(text, str) and text:
-                for tagger in self.regex_taggers.all():
-                    matcher = load_matcher(tagger)
+                for tagger, matcher in compiled.get_candidates(text):
                     matches = matcher.get_matches(text)
                     if field_path:
                         texta_facts = [{"str_val": tagger.description, "spans": json.dumps([match["span"]]), "fact": self.description, "doc_path": field_path, "sent_index": 0} for match in matches]
@@ -157,12 +253,13 @@ class RegexTaggerGroup(FavoriteModelMixin, CommonModelMixin):
         return results
 
 
-    def match_texts(self, texts: List[str], as_texta_facts: bool = False, field: str = ""):
+    def match_texts(self, texts: List[str], as_texta_facts: bool = False, field: str = "", compiled: Optional[CompiledRegexTaggerGroup] = None):
         results = []
-        for tagger in self.regex_taggers.all():
-            matcher = load_matcher(tagger)
-            for text in texts:
-                if text and isinstance(text, str):
+        compiled = compiled or self.get_compiled_matchers()
+        candidates = [(text, {tagger.pk for tagger, matcher in compiled.get_candidates(text)}) for text in texts if text and isinstance(text, str)]
+        for tagger, matcher in compiled.taggers:
+            for text, text_candidates in candidates:
+                if tagger.pk in text_candidates:
                     matches = matcher.get_matches(text)
                     if as_texta_facts:
                         new_facts = []
@@ -186,12 +283,13 @@ class RegexTaggerGroup(FavoriteModelMixin, CommonModelMixin):
 
 
     def tag_docs(self, fields: List[str], docs: List[dict]):
+        compiled = self.get_compiled_matchers()
         # apply tagger
         for doc in docs:
             for field in fields:
                 flattened_doc = ElasticCore(check_connection=False).flatten(doc)
                 text = flattened_doc.get(field, None)
-                matches_as_facts = self.match_texts([text], as_texta_facts=True, field=field)
+                matches_as_facts = self.match_texts([text], as_texta_facts=True, field=field, compiled=compiled)
                 for fact in matches_as_facts:
                     fact.update(fact=self.description)
 
@@ -10,7 +10,7 @@ from texta_elastic.searcher import ElasticSearcher
 
 from toolkit.base_tasks import TransactionAwareTask
 from toolkit.regex_tagger.choices import PRIORITY_CHOICES
-from toolkit.regex_tagger.models import RegexTagger, RegexTaggerGroup, load_matcher
+from toolkit.regex_tagger.models import RegexTagger, RegexTaggerGroup, load_cached_matcher
 from toolkit.settings import CELERY_LONG_TERM_TASK_QUEUE, ERROR_LOGGER
 from toolkit.tools.show_progress import ShowProgress
 
@@ -18,7 +18,7 @@ from toolkit.tools.show_progress import ShowProgress
 def load_taggers(tagger_object: RegexTaggerGroup):
     taggers = []
     for regex_tagger in tagger_object.regex_taggers.all():
-        matcher = load_matcher(regex_tagger)
+        matcher = load_cached_matcher(regex_tagger)
 
         taggers.append({
             "tagger_id": regex_tagger.id,
@@ -39,6 +39,12 @@ def process_texta_facts(facts: List[str], priority: Optional[str] = None):
 
 
 def update_generator(generator: ElasticSearcher, ec: ElasticCore, fields: List[str], tagger_object: Union[RegexTagger, RegexTaggerGroup], fact_name: str, fact_value: str, add_spans: bool):
+    # Compile the matchers only once for the whole index.
+    if isinstance(tagger_object, RegexTaggerGroup):
+        apply_kwargs = {"compiled": tagger_object.get_compiled_matchers()}
+    else:
+        apply_kwargs = {}
+
     for scroll_batch in generator:
         for raw_doc in scroll_batch:
             hit = raw_doc["_source"]
@@ -48,7 +54,7 @@ def update_generator(generator: ElasticSearcher, ec: ElasticCore, fields: List[s
             for field in fields:
                 text = flat_hit.get(field, None)
                 if text and isinstance(text, str):
-                    results = tagger_object.apply([text], field_path=field, fact_name=fact_name, fact_value=fact_value, add_spans=add_spans)
+                    results = tagger_object.apply([text], field_path=field, fact_name=fact_name, fact_value=fact_value, add_spans=add_spans, **apply_kwargs)
                     existing_facts.extend(results)
 
                 if existing_facts:
@@ -99,6 +99,30 @@ class RegexGroupTaggerTests(APITransactionTestCase):
         self.assertTrue("tuletõrje" in matches)
 
 
+    def test_compiled_matchers_give_the_same_results_as_separate_taggers(self):
+        tagger_group = RegexTaggerGroup.objects.get(pk=self.emergency_tagger_group_id)
+        text = "Eile kell 10 õhtul sisenes VARAS keemiatehasesse, tema hooletuse tõttu tekkis põleng!"
+
+        expected = []
+        for tagger in tagger_group.regex_taggers.all():
+            expected.extend(tagger.description for match in tagger.match_texts([text]))
+
+        results = tagger_group.apply([text], field_path=TEST_FIELD)
+        print_output('test_compiled_matchers_give_the_same_results_as_separate_taggers:results', results)
+        self.assertEqual([fact["str_val"] for fact in results], expected)
+        self.assertEqual(len(list(tagger_group.get_compiled_matchers().get_candidates("midagi muud"))), 0)
+
+        # Editing a member tagger must result in a freshly compiled matcher.
+        compiled = tagger_group.get_compiled_matchers()
+        RegexTagger.objects.filter(pk=self.firefighter_id).update(lexicon=json.dumps(["tulekahju"]))
+        self.assertIsNot(compiled, tagger_group.get_compiled_matchers())
+        self.assertTrue("tuletõrje" not in [fact["str_val"] for fact in tagger_group.apply([text])])
+
+        # Renaming a member tagger must change the values of its facts.
+        RegexTagger.objects.filter(pk=self.police_id).update(description="politseinik")
+        self.assertEqual([fact["str_val"] for fact in tagger_group.apply(["Eile sisenes varas keemiatehasesse."])], ["politseinik"])
+
+
     def test_regex_tagger_group_tag_text_empty(self):
         url = reverse(f"{VERSION_NAMESPACE}:regex_tagger_group-tag-text",
                       kwargs={"project_pk": self.project.pk, "pk": self.emergency_tagger_group_id})
@@ -399,9 +399,9 @@ class RegexTaggerGroupViewSet(viewsets.ModelViewSet, BulkDelete, FavoriteModelVi
         result = []
         for regex_tagger_group in regex_taggers_groups:
             tags = []
-            for regex_tagger in regex_tagger_group.regex_taggers.all():
+            for regex_tagger, matcher in regex_tagger_group.get_compiled_matchers().get_candidates(text):
 
-                matches = regex_tagger.match_texts([text], as_texta_facts=False)
+                matches = regex_tagger.match_texts([text], as_texta_facts=False, matcher=matcher)
 
                 if matches:
                     new_tag = {
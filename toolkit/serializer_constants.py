@@ -19,6 +19,8 @@ from toolkit.settings import DESCRIPTION_CHAR_LIMIT, ES_BULK_SIZE_MAX, ES_TIMEOU
 
 BULK_SIZE_HELPTEXT = "How many documents should be sent into Elasticsearch in a single batch for update."
 ES_TIMEOUT_HELPTEXT = "How many seconds should be allowed for the the update request to Elasticsearch."
+CPU_FAST_INFERENCE_HELPTEXT = "Whether to predict with an int8 quantized copy of the model on the CPU. The accuracy lost by the quantization is reported in quantized_accuracy_delta after training. It's measured on a sample of the training examples, so it shows how much the predictions change rather than the accuracy on unseen documents."
+UPDATE_BY_QUERY_HELPTEXT = "Whether to update the documents inside Elasticsearch with a sliced _update_by_query instead of scrolling them through Toolkit."
 DESCRIPTION_HELPTEXT = "Description of the task to distinguish it from others."
 QUERY_HELPTEXT = "Elasticsearch query for subsetting in JSON format"
 FIELDS_HELPTEXT = "Which fields to parse the content from."
@@ -113,7 +115,8 @@ class FavoriteModelSerializerMixin(metaclass=serializers.SerializerMetaclass):
     is_favorited = serializers.SerializerMethodField(read_only=True)
 
     def get_is_favorited(self, instance):
-        return instance.favorited_users.filter(username=instance.author.username).exists()
+        # Iterating over all() makes use of the favorited users when they have been prefetched.
+        return any(user.username == instance.author.username for user in instance.favorited_users.all())
 
 
 class TasksMixinSerializer(metaclass=serializers.SerializerMetaclass):
@@ -51,7 +51,6 @@ CORE_SETTINGS = {
     "TEXTA_ES_PREFIX": env("TEXTA_ES_PREFIX", default=""),
     "TEXTA_ES_USERNAME": env("TEXTA_ES_USER", default=""),
     "TEXTA_ES_PASSWORD": env("TEXTA_ES_PASSWORD", default=""),
-    "TEXTA_EVALUATOR_MEMORY_BUFFER_GB": env("TEXTA_EVALUATOR_MEMORY_BUFFER_GB", default=""),
     "TEXTA_ES_MAX_DOCS_PER_INDEX": env.int("TEXTA_ES_MAX_DOCS_PER_INDEX", default=100000),
     # Default is set to long term task-queue to be backwards compatible.
     "TEXTA_LONG_TERM_GPU_TASK_QUEUE": env("TEXTA_LONG_TERM_GPU_TASK_QUEUE", default=CELERY_LONG_TERM_TASK_QUEUE),
@@ -70,8 +69,6 @@ AES_KEY_ENV = "TEXTA_AES_KEY_FILE_PATH"
 AES_KEYFILE_PATH = env.str(AES_KEY_ENV, default="secret.key")
 validate_aes_file(AES_KEYFILE_PATH, AES_KEY_ENV)
 
-EVALUATOR_MEMORY_BUFFER_RATIO = 0.5
-
 TEXTA_TAGS_KEY = "texta_facts"
 TEXTA_ANNOTATOR_KEY = "texta_annotator"
 
@@ -178,6 +175,13 @@ UAA_FRONT_REDIRECT_URL = env("TEXTA_UAA_FRONT_REDIRECT_URL", default="http://loc
 # OAuth client application (eg texta_toolkit) id and secret.
 UAA_CLIENT_ID = env("TEXTA_UAA_CLIENT_ID", default="login")
 UAA_CLIENT_SECRET = env("TEXTA_UAA_CLIENT_SECRET", default="loginsecret")
+
+# Validated access tokens are cached until they expire, but no longer than UAA_TOKEN_CACHE_TTL seconds,
+# and rejected ones for UAA_TOKEN_NEGATIVE_CACHE_TTL seconds. Redis can be used to share the cache between processes.
+UAA_TOKEN_CACHE_MAX_ITEMS = env.int("TEXTA_UAA_TOKEN_CACHE_MAX_ITEMS", default=10000)
+UAA_TOKEN_CACHE_TTL = env.float("TEXTA_UAA_TOKEN_CACHE_TTL", default=300.0)
+UAA_TOKEN_NEGATIVE_CACHE_TTL = env.float("TEXTA_UAA_TOKEN_NEGATIVE_CACHE_TTL", default=10.0)
+UAA_TOKEN_CACHE_USE_REDIS = env.bool("TEXTA_UAA_TOKEN_CACHE_USE_REDIS", default=False)
 # For reference:
 # https://docs.cloudfoundry.org/concepts/architecture/uaa.html
 # https://docs.cloudfoundry.org/api/uaa/version/74.24.0/index.html
@@ -323,6 +327,17 @@ ES_CONNECTION_PARAMETERS = {
 # or a whole article.
 MLP_BATCH_SIZE = env.int("TEXTA_MLP_BATCH_SIZE", default=25)
 MLP_DEFAULT_LANGUAGE = env.str("TEXTA_MLP_DEFAULT_LANGUAGE", default="en")
+# Maximum amount of document chunks sent to the MLP workers at once while processing an index,
+# and how often (in seconds) the scheduler checks whether new chunks could be sent.
+MLP_MAX_INFLIGHT_CHUNKS = env.int("TEXTA_MLP_MAX_INFLIGHT_CHUNKS", default=50)
+MLP_SCHEDULER_POLL_INTERVAL = env.float("TEXTA_MLP_SCHEDULER_POLL_INTERVAL", default=5.0)
+# Seconds without any chunk finishing after which the processing of an index is failed, as its chunks have likely been lost.
+MLP_CHUNK_TIMEOUT = env.int("TEXTA_MLP_CHUNK_TIMEOUT", default=3600)
+# Synchronous MLP requests arriving within this many seconds of each other are processed as one batch
+# (only requests served by the threads of the same uWSGI worker are batched, see docker/conf/texta-rest.ini),
+# requests are rejected once this many batches are waiting in the MLP queue.
+MLP_REQUEST_BATCH_WINDOW = env.float("TEXTA_MLP_REQUEST_BATCH_WINDOW", default=0.01)
+MLP_MAX_QUEUED_REQUESTS = env.int("TEXTA_MLP_MAX_QUEUED_REQUESTS", default=10)
 
 # By default, the DB with number 0 is used in Redis. Other applications or instances of TTK should avoid using the same DB number.
 BROKER_URL = env('TEXTA_REDIS_URL', default='redis://localhost:6379')
@@ -438,6 +453,74 @@ ALLOW_BERT_MODEL_DOWNLOADS = env.bool("TEXTA_ALLOW_BERT_MODEL_DOWNLOADS", defaul
 
 RELATIVE_PROJECT_DATA_PATH = env("TOOLKIT_PROJECT_DATA_PATH", default=os.path.join(DATA_DIR, "projects"))
 
+### MODEL CACHES
+# Loaded models are kept in memory per process to avoid reading them from the disk on every request.
+# Setting the amount of items to 0 disables the cache.
+TAGGER_CACHE_MAX_ITEMS = env.int("TEXTA_TAGGER_CACHE_MAX_ITEMS", default=50)
+TAGGER_CACHE_MAX_BYTES = env.int("TEXTA_TAGGER_CACHE_MAX_BYTES", default=2 * 1024 ** 3)
+REGEX_TAGGER_CACHE_MAX_ITEMS = env.int("TEXTA_REGEX_TAGGER_CACHE_MAX_ITEMS", default=1000)
+# BERT taggers are measured by the size of their tensors in memory.
+BERT_TAGGER_CACHE_MAX_ITEMS = env.int("TEXTA_BERT_TAGGER_CACHE_MAX_ITEMS", default=10)
+BERT_TAGGER_CACHE_MAX_BYTES = env.int("TEXTA_BERT_TAGGER_CACHE_MAX_BYTES", default=4 * 1024 ** 3)
+# How many texts are passed through a BERT tagger at once when applying it to an index.
+BERT_TAGGER_INFERENCE_BATCH_SIZE = env.int("TEXTA_BERT_TAGGER_INFERENCE_BATCH_SIZE", default=32)
+# Torch taggers are measured by the size of their tensors and the files of their embedding.
+TORCHTAGGER_CACHE_MAX_ITEMS = env.int("TEXTA_TORCHTAGGER_CACHE_MAX_ITEMS", default=10)
+TORCHTAGGER_CACHE_MAX_BYTES = env.int("TEXTA_TORCHTAGGER_CACHE_MAX_BYTES", default=2 * 1024 ** 3)
+# How many texts are passed through a Torch tagger at once when applying it to an index.
+TORCHTAGGER_INFERENCE_BATCH_SIZE = env.int("TEXTA_TORCHTAGGER_INFERENCE_BATCH_SIZE", default=64)
+EMBEDDING_CACHE_MAX_ITEMS = env.int("TEXTA_EMBEDDING_CACHE_MAX_ITEMS", default=5)
+EMBEDDING_CACHE_MAX_BYTES = env.int("TEXTA_EMBEDDING_CACHE_MAX_BYTES", default=4 * 1024 ** 3)
+# Word vectors of embeddings are memory-mapped, vocabularies of at least this size also get
+# an approximate nearest neighbour index at training time, in which this many clusters are searched per query.
+EMBEDDING_ANN_MIN_VOCAB_SIZE = env.int("TEXTA_EMBEDDING_ANN_MIN_VOCAB_SIZE", default=50000)
+EMBEDDING_ANN_PROBES = env.int("TEXTA_EMBEDDING_ANN_PROBES", default=8)
+CRF_EXTRACTOR_CACHE_MAX_ITEMS = env.int("TEXTA_CRF_EXTRACTOR_CACHE_MAX_ITEMS", default=20)
+CRF_EXTRACTOR_CACHE_MAX_BYTES = env.int("TEXTA_CRF_EXTRACTOR_CACHE_MAX_BYTES", default=1024 ** 3)
+# How many processes tag the scroll batches when applying a CRF extractor to an index, 1 tags them inside the task itself.
+# Every process of the long term task worker may run a pool of its own, so by default the cores are divided between them.
+CRF_EXTRACTOR_PROCESS_COUNT = env.int("TEXTA_CRF_EXTRACTOR_PROCESS_COUNT", default=max(1, (os.cpu_count() or 1) // env.int("TEXTA_LONG_TASK_WORKERS", default=4)))
+
+### CPU INFERENCE
+# How many threads a single PyTorch forward pass may use inside a worker process, 0 uses all the cores.
+# Lower it when several worker processes share the cores of the same machine.
+TORCH_INTRA_OP_THREADS = env.int("TEXTA_TORCH_INTRA_OP_THREADS", default=0)
+# Maximum amount of examples per class used to compare the accuracy of quantized taggers against the full precision ones.
+QUANTIZATION_EVALUATION_SAMPLE_SIZE = env.int("TEXTA_QUANTIZATION_EVALUATION_SAMPLE_SIZE", default=250)
+
+# Tagger Groups with more candidate taggers than this are split into shards
+# of this size and predicted in parallel by Celery workers, smaller ones are predicted in-process.
+TAGGER_GROUP_SHARD_SIZE = env.int("TEXTA_TAGGER_GROUP_SHARD_SIZE", default=50)
+
+### TASK PROGRESS
+# Progress of long-running tasks is buffered and written into the database
+# at most once per this many seconds or after this many percent of progress.
+SHOW_PROGRESS_FLUSH_INTERVAL = env.float("TEXTA_SHOW_PROGRESS_FLUSH_INTERVAL", default=5.0)
+SHOW_PROGRESS_FLUSH_PERCENTAGE = env.float("TEXTA_SHOW_PROGRESS_FLUSH_PERCENTAGE", default=5.0)
+
+### DATASET IMPORT
+# Uploaded files are parsed and indexed in chunks of this many rows by this many threads.
+DATASET_IMPORT_CHUNK_SIZE = env.int("TEXTA_DATASET_IMPORT_CHUNK_SIZE", default=500)
+DATASET_IMPORT_THREAD_COUNT = env.int("TEXTA_DATASET_IMPORT_THREAD_COUNT", default=4)
+
+### ANNOTATOR
+# How many threads copy the source documents into the indices of the annotating users.
+ANNOTATOR_BULK_THREAD_COUNT = env.int("TEXTA_ANNOTATOR_BULK_THREAD_COUNT", default=4)
+# Documents served to the annotators are prefetched into Redis in shuffled batches of this size,
+# the next batch is fetched in the background once fewer than ANNOTATOR_QUEUE_LOW_WATERMARK are left.
+ANNOTATOR_QUEUE_BATCH_SIZE = env.int("TEXTA_ANNOTATOR_QUEUE_BATCH_SIZE", default=100)
+ANNOTATOR_QUEUE_LOW_WATERMARK = env.int("TEXTA_ANNOTATOR_QUEUE_LOW_WATERMARK", default=20)
+ANNOTATOR_QUEUE_EXPIRE_SECONDS = env.int("TEXTA_ANNOTATOR_QUEUE_EXPIRE_SECONDS", default=3600)
+# How long pulling a document from an empty queue waits for a running refill before serving a random document instead.
+ANNOTATOR_QUEUE_REFILL_WAIT_SECONDS = env.int("TEXTA_ANNOTATOR_QUEUE_REFILL_WAIT_SECONDS", default=10)
+
+### REINDEXER
+REINDEXER_MAX_SLICES = env.int("TEXTA_REINDEXER_MAX_SLICES", default=32)
+# How often the progress of server-side reindexing is checked, in seconds.
+REINDEXER_PROGRESS_POLL_INTERVAL = env.float("TEXTA_REINDEXER_PROGRESS_POLL_INTERVAL", default=2.0)
+# How often the progress of editing or deleting facts with _update_by_query is checked, in seconds.
+FACTS_UPDATE_PROGRESS_POLL_INTERVAL = env.float("TEXTA_FACTS_UPDATE_PROGRESS_POLL_INTERVAL", default=2.0)
+
 # Different types of models
 MODEL_TYPES = ["embedding", "tagger", "torchtagger", "bert_tagger", "crf"]
 
@@ -31,7 +31,7 @@ def start_summarizer_worker(self, summarizer_id: int):
     task_objects = summarizer_object.tasks.last()
     show_progress = ShowProgress(task_objects, multiplier=1)
     show_progress.update_step('running summarizer')
-    show_progress.update_view(0)
+    show_progress.update_view()
     return summarizer_id
 
 
@@ -78,6 +78,7 @@ DEFAULT_SCORING_OPTIONS = get_scoring_choices()
 DEFAULT_SCORING_FUNCTION = get_scoring_choices()[0][0]
 DEFAULT_USE_NER = False
 DEFAULT_LEMMATIZE = False
+DEFAULT_USE_BATCHES = True
 DEFAULT_IGNORE_NUMBERS = True
 
 DEFAULT_OVERWRITE_EXISTING_STOPWORDS = True
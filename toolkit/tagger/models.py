@@ -24,14 +24,19 @@ from toolkit.constants import MAX_DESC_LEN
 from toolkit.core.lexicon.models import Lexicon
 from toolkit.core.project.models import Project
 from toolkit.core.task.models import Task
-from toolkit.elastic.choices import DEFAULT_SNOWBALL_LANGUAGE, get_snowball_choices
+from toolkit.elastic.choices import DEFAULT_SNOWBALL_LANGUAGE, DEFAULT_STEMMER_BACKEND, STEMMER_BACKEND_CHOICES, get_snowball_choices
 from toolkit.elastic.index.models import Index
 from toolkit.elastic.tools.feedback import Feedback
 from toolkit.embedding.models import Embedding
 from toolkit.helper_functions import load_stop_words, get_core_setting, get_minio_client
 from toolkit.model_constants import CommonModelMixin, FavoriteModelMixin, S3ModelMixin
 from toolkit.tagger import choices
-from toolkit.tools.lemmatizer import CeleryLemmatizer, ElasticAnalyzer
+from toolkit.tools.lemmatizer import CeleryLemmatizer, get_stemmer
+from toolkit.tools.model_cache import ModelCache, get_file_mtime, get_file_size
+
+
+# Loaded taggers shared by the apply functions of the current process.
+TAGGER_CACHE = ModelCache("tagger", max_items=settings.TAGGER_CACHE_MAX_ITEMS, max_bytes=settings.TAGGER_CACHE_MAX_BYTES)
 
 
 class Tagger(FavoriteModelMixin, CommonModelMixin, S3ModelMixin):
@@ -55,6 +60,7 @@ class Tagger(FavoriteModelMixin, CommonModelMixin, S3ModelMixin):
     score_threshold = models.FloatField(default=choices.DEFAULT_SCORE_THRESHOLD, blank=True)
     snowball_language = models.CharField(choices=get_snowball_choices(), default=DEFAULT_SNOWBALL_LANGUAGE, null=True, max_length=MAX_DESC_LEN)
     detect_lang = models.BooleanField(default=False)
+    stemmer_backend = models.CharField(max_length=MAX_DESC_LEN, choices=STEMMER_BACKEND_CHOICES, default=DEFAULT_STEMMER_BACKEND)
     precision = models.FloatField(default=None, null=True)
     recall = models.FloatField(default=None, null=True)
     f1_score = models.FloatField(default=None, null=True)
@@ -195,7 +201,7 @@ class Tagger(FavoriteModelMixin, CommonModelMixin, S3ModelMixin):
         #    logging.getLogger(INFO_LOGGER).info(f"Loading tagger with ID: {tagger_id} with params (lemmatize: {lemmatize})")
         # get lemmatizer/stemmer
         if self.snowball_language:
-            lemmatizer = ElasticAnalyzer(language=self.snowball_language)
+            lemmatizer = get_stemmer(language=self.snowball_language, backend=self.stemmer_backend)
         elif lemmatize:
             lemmatizer = CeleryLemmatizer()
         else:
@@ -216,6 +222,24 @@ class Tagger(FavoriteModelMixin, CommonModelMixin, S3ModelMixin):
             return None
         return tagger
 
+    def load_cached_tagger(self, lemmatize: bool = False):
+        """
+        Loading tagger model from the per-process cache, falls back to the disc on a cache miss.
+        The cache key contains the model file and its modification time, so retrained models are never served from the cache.
+        The stemmer backend the tagger was trained with is part of the key as it is baked into the loaded tagger.
+        """
+        model_path = self.model.path if self.model else None
+        cache_key = (self.pk, model_path, get_file_mtime(model_path), lemmatize, self.stemmer_backend)
+        return TAGGER_CACHE.get_or_load(cache_key, loader=lambda: self.load_tagger(lemmatize=lemmatize), size=lambda tagger: self.get_loaded_size())
+
+    def get_loaded_size(self) -> int:
+        """Estimates the memory imprint of the loaded tagger by the size of its files on the disc."""
+        file_paths = [self.model.path] if self.model else []
+        if self.embedding and self.embedding.embedding_model:
+            embedding_path = self.embedding.embedding_model.path
+            file_paths += [embedding_path] + Embedding.get_loaded_file_names(embedding_path)
+        return get_file_size(*file_paths)
+
     def apply_loaded_tagger(self, tagger: TextTagger, content: Union[str, Dict[str, str]], input_type: str = "text", feedback: bool = False):
         """Applying loaded tagger."""
         # check input type
@@ -254,6 +278,8 @@ def auto_delete_file_on_delete(sender, instance: Tagger, **kwargs):
     Triggered on individual-queryset Tagger deletion and the deletion
     of a TaggerGroup.
     """
+    TAGGER_CACHE.invalidate(instance.pk)
+
     if instance.plot:
         if os.path.isfile(instance.plot.path):
             os.remove(instance.plot.path)
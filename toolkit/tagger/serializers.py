@@ -1,9 +1,10 @@
 import json
 import logging
+from typing import Dict, List
 
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Avg, Sum
+from django.db.models import Avg, Count, Manager, Min, Prefetch, Q, Sum
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 from texta_elastic.searcher import EMPTY_QUERY
@@ -11,6 +12,7 @@ from texta_elastic.searcher import EMPTY_QUERY
 from toolkit.core.task.models import Task
 from toolkit.core.user_profile.serializers import UserSerializer
 from toolkit.elastic.choices import DEFAULT_SNOWBALL_LANGUAGE, get_snowball_choices
+from toolkit.elastic.index.models import Index
 from toolkit.embedding.models import Embedding
 from toolkit.helper_functions import load_stop_words
 from toolkit.serializer_constants import (CommonModelSerializerMixin, ElasticScrollMixIn, FavoriteModelSerializerMixin, FieldParseSerializer, IndicesSerializerMixin,
@@ -70,6 +72,8 @@ class ApplyTaggerGroupSerializer(FieldParseSerializer, IndicesSerializerMixin, E
     n_candidate_tags = serializers.IntegerField(default=choices.DEFAULT_NUM_CANDIDATES,
                                                 help_text=f"Number of tag candidates retrieved from unsupervised prefiltering. Default:{choices.DEFAULT_NUM_CANDIDATES}.")
     max_tags = serializers.IntegerField(default=choices.DEFAULT_MAX_TAGS, help_text=f"Maximum number of tags per one document. Default:{choices.DEFAULT_MAX_TAGS}.")
+    use_batches = serializers.BooleanField(default=choices.DEFAULT_USE_BATCHES,
+                                           help_text=f"Process whole scroll batches at once instead of single documents to reduce the amount of network calls. Default:{choices.DEFAULT_USE_BATCHES}.")
 
 
 class StopWordSerializer(serializers.Serializer):
@@ -182,10 +186,10 @@ class TaggerSerializer(FieldParseSerializer, serializers.ModelSerializer, Indice
             'maximum_sample_size', 'minimum_sample_size', 'is_favorited', 'score_threshold',
             'negative_multiplier', 'precision', 'recall', 'f1_score', 'snowball_language', 'scoring_function',
             'num_features', 'num_examples', 'confusion_matrix', 'is_favorited', 'plot', 'tasks', 'tagger_groups',
-            'ignore_numbers', 'balance', 'balance_to_max_limit', 'pos_label', 'classes')
+            'ignore_numbers', 'balance', 'balance_to_max_limit', 'pos_label', 'classes', 'stemmer_backend')
         read_only_fields = (
             'precision', 'recall', 'f1_score', 'num_features', 'num_examples', 'tagger_groups', 'confusion_matrix',
-            'classes')
+            'classes', 'stemmer_backend')
         fields_to_parse = ('fields', 'classes',)
 
     def validate(self, data):
@@ -214,6 +218,52 @@ class TaggerSerializer(FieldParseSerializer, serializers.ModelSerializer, Indice
         return json.loads(value.tagger_groups)
 
 
+def get_tagger_group_statistics(group_ids: List[int]) -> Dict[int, dict]:
+    """
+    Computes the tagger statuses, statistics and the representative (first) tagger
+    of all the given Tagger Groups with a constant amount of queries.
+    """
+    through = TaggerGroup.taggers.through
+    train_tasks = {"tagger__tasks__task_type": Task.TYPE_TRAIN}
+    status_counts = through.objects.filter(taggergroup_id__in=group_ids).values("taggergroup_id").annotate(
+        completed=Count("tagger_id", filter=Q(tagger__tasks__status=Task.STATUS_COMPLETED, **train_tasks), distinct=True),
+        training=Count("tagger_id", filter=Q(tagger__tasks__status=Task.STATUS_RUNNING, **train_tasks), distinct=True),
+        created=Count("tagger_id", filter=Q(tagger__tasks__status=Task.STATUS_CREATED, **train_tasks), distinct=True),
+        failed=Count("tagger_id", filter=Q(tagger__tasks__status=Task.STATUS_FAILED, **train_tasks), distinct=True),
+    )
+    # Aggregated separately from the statuses as joining the tasks would multiply the rows of the taggers.
+    aggregates = through.objects.filter(taggergroup_id__in=group_ids).values("taggergroup_id").annotate(
+        avg_precision=Avg("tagger__precision"),
+        avg_recall=Avg("tagger__recall"),
+        avg_f1_score=Avg("tagger__f1_score"),
+        sum_size=Sum("tagger__model_size"),
+        first_tagger_id=Min("tagger_id")
+    )
+
+    statistics = {group_id: {"completed": 0, "training": 0, "created": 0, "failed": 0, "aggregates": None, "first_tagger": None} for group_id in group_ids}
+    for row in status_counts:
+        statistics[row.pop("taggergroup_id")].update(row)
+    for row in aggregates:
+        statistics[row.pop("taggergroup_id")]["aggregates"] = row
+
+    first_tagger_ids = [group["aggregates"]["first_tagger_id"] for group in statistics.values() if group["aggregates"]]
+    open_indices = Prefetch("indices", queryset=Index.objects.filter(is_open=True), to_attr="open_indices")
+    first_taggers = Tagger.objects.filter(pk__in=first_tagger_ids).select_related("embedding").prefetch_related(open_indices).in_bulk()
+    for group in statistics.values():
+        if group["aggregates"]:
+            group["first_tagger"] = first_taggers.get(group["aggregates"]["first_tagger_id"])
+    return statistics
+
+
+class TaggerGroupListSerializer(serializers.ListSerializer):
+
+    def to_representation(self, data):
+        # Compute the statistics of the whole page at once instead of per Tagger Group.
+        groups = list(data.all() if isinstance(data, Manager) else data)
+        self.child.statistics = get_tagger_group_statistics([group.pk for group in groups])
+        return super(TaggerGroupListSerializer, self).to_representation(groups)
+
+
 class TaggerGroupSerializer(serializers.ModelSerializer, ProjectResourceUrlSerializer, FavoriteModelSerializerMixin, CommonModelSerializerMixin):
     minimum_sample_size = serializers.IntegerField(default=choices.DEFAULT_MIN_SAMPLE_SIZE,
                                                    help_text=f'Minimum number of documents required to train a model. Default: {choices.DEFAULT_MIN_SAMPLE_SIZE}')
@@ -239,30 +289,35 @@ class TaggerGroupSerializer(serializers.ModelSerializer, ProjectResourceUrlSeria
         model = TaggerGroup
         fields = ('id', 'url', 'author', 'description', 'fact_name', 'num_tags', 'blacklisted_facts', 'minimum_sample_size',
                   'tagger_status', 'tagger_params', 'tagger', 'tagger_statistics', 'is_favorited', 'tasks')
+        list_serializer_class = TaggerGroupListSerializer
+
+    def _get_statistics(self, obj: TaggerGroup) -> dict:
+        statistics = getattr(self, "statistics", {})
+        if obj.pk not in statistics:
+            # Serializing a single Tagger Group.
+            statistics = get_tagger_group_statistics([obj.pk])
+        return statistics[obj.pk]
 
-    # TODO This can be optimised into a single query.
     def get_tagger_status(self, obj: TaggerGroup):
+        statistics = self._get_statistics(obj)
         tagger_status = {
             'total': obj.num_tags,
-            'completed': obj.taggers.filter(tasks__task_type=Task.TYPE_TRAIN, tasks__status=Task.STATUS_COMPLETED).distinct().count(),
-            'training': obj.taggers.filter(tasks__task_type=Task.TYPE_TRAIN, tasks__status=Task.STATUS_RUNNING).distinct().count(),
-            'created': obj.taggers.filter(tasks__task_type=Task.TYPE_TRAIN, tasks__status=Task.STATUS_CREATED).distinct().count(),
-            'failed': obj.taggers.filter(tasks__task_type=Task.TYPE_TRAIN, tasks__status=Task.STATUS_FAILED).distinct().count(),
+            'completed': statistics["completed"],
+            'training': statistics["training"],
+            'created': statistics["created"],
+            'failed': statistics["failed"],
         }
         return tagger_status
 
     def get_tagger_statistics(self, obj):
-        tagger_objects = obj.taggers
-        if tagger_objects.exists():
-            try:
-                tagger_size_sum = round(tagger_objects.filter(model_size__isnull=False).aggregate(Sum('model_size'))['model_size__sum'], 1)
-            except TypeError as e:
-                # if models are not ready
-                tagger_size_sum = 0
+        aggregates = self._get_statistics(obj)["aggregates"]
+        if aggregates:
+            # if models are not ready
+            tagger_size_sum = round(aggregates["sum_size"], 1) if aggregates["sum_size"] is not None else 0
             tagger_stats = {
-                'avg_precision': tagger_objects.aggregate(Avg('precision'))['precision__avg'],
-                'avg_recall': tagger_objects.aggregate(Avg('recall'))['recall__avg'],
-                'avg_f1_score': tagger_objects.aggregate(Avg('f1_score'))['f1_score__avg'],
+                'avg_precision': aggregates["avg_precision"],
+                'avg_recall': aggregates["avg_recall"],
+                'avg_f1_score': aggregates["avg_f1_score"],
                 'sum_size': {"size": tagger_size_sum, "unit": "mb"}
             }
             return tagger_stats
@@ -274,8 +329,8 @@ class TaggerGroupSerializer(serializers.ModelSerializer, ProjectResourceUrlSeria
             return None
 
     def get_tagger_params(self, obj):
-        if obj.taggers.exists():
-            first_tagger: Tagger = obj.taggers.first()
+        first_tagger: Tagger = self._get_statistics(obj)["first_tagger"]
+        if first_tagger:
             params = {
                 'fields': json.loads(first_tagger.fields),
                 'detect_lang': first_tagger.detect_lang,
@@ -284,7 +339,7 @@ class TaggerGroupSerializer(serializers.ModelSerializer, ProjectResourceUrlSeria
                 'negative_multiplier': first_tagger.negative_multiplier,
                 'snowball_language': first_tagger.snowball_language,
                 'embedding': self._embedding_details(first_tagger),
-                'indices': first_tagger.get_indices(),
+                'indices': [index.name for index in first_tagger.open_indices],
                 'vectorizer': first_tagger.vectorizer,
                 'classifier': first_tagger.classifier,
                 'analyzer': first_tagger.analyzer,
@@ -60,7 +60,7 @@ class TaggerGroupViewSet(mixins.CreateModelMixin,
     ordering_fields = ('id', 'author__username', 'description', 'fact_name', 'minimum_sample_size', 'num_tags')
 
     def get_queryset(self):
-        return TaggerGroup.objects.filter(project=self.kwargs['project_pk']).order_by('-id')
+        return TaggerGroup.objects.filter(project=self.kwargs['project_pk']).select_related('author__profile').prefetch_related('tasks', 'favorited_users').order_by('-id')
 
     def create(self, request, *args, **kwargs):
         # add dummy value to tagger so serializer is happy
@@ -357,12 +357,14 @@ class TaggerGroupViewSet(mixins.CreateModelMixin,
             n_similar_docs = serializer.validated_data["n_similar_docs"]
             n_candidate_tags = serializer.validated_data["n_candidate_tags"]
             max_tags = serializer.validated_data["max_tags"]
+            use_batches = serializer.validated_data["use_batches"]
 
             object_args = {
                 "n_similar_docs": n_similar_docs,
                 "n_candidate_tags": n_candidate_tags,
                 "lemmatize": lemmatize,
-                "use_ner": use_ner
+                "use_ner": use_ner,
+                "use_batches": use_batches
             }
 
             # fact value is always tagger description when applying the tagger group
@@ -9,6 +9,7 @@ from celery import group, chain
 from celery.decorators import task
 from celery.result import allow_join_result
 from django.conf import settings
+from django.db.models import OuterRef, Subquery
 from elasticsearch.helpers import streaming_bulk
 from minio.error import MinioException
 from texta_elastic.core import ElasticCore
@@ -24,7 +25,7 @@ from toolkit.elastic.tools.data_sample import DataSample
 from toolkit.embedding.models import Embedding
 from toolkit.helper_functions import add_finite_url_to_feedback, get_indices_from_object, load_stop_words
 from toolkit.mlp.tasks import apply_mlp_on_list
-from toolkit.tagger.models import Tagger, TaggerGroup
+from toolkit.tagger.models import TAGGER_CACHE, Tagger, TaggerGroup
 from toolkit.tools.plots import create_tagger_plot
 from toolkit.tools.show_progress import ShowProgress
 
@@ -120,7 +121,7 @@ def start_tagger_task(tagger_id: int):
     task_object = tagger.tasks.last()
     show_progress = ShowProgress(task_object, multiplier=1)
     show_progress.update_step('starting tagging')
-    show_progress.update_view(0)
+    show_progress.update_view()
     return tagger_id
 
 
@@ -136,7 +137,7 @@ def train_tagger_task(tagger_id: int):
         # create progress object
         show_progress = ShowProgress(task_object, multiplier=1)
         show_progress.update_step('scrolling positives')
-        show_progress.update_view(0)
+        show_progress.update_view()
 
         # retrieve indices & field data
         indices = get_indices_from_object(tagger_object)
@@ -160,6 +161,8 @@ def train_tagger_task(tagger_id: int):
             embedding.load_django(tagger_object.embedding)
         else:
             embedding = None
+        # the stemmer backend is stored with the model, so later changes in the project don't affect it
+        stemmer_backend = tagger_object.project.stemmer_backend
         # create Datasample object for retrieving positive and negative sample
         data_sample = DataSample(
             tagger_object,
@@ -167,13 +170,14 @@ def train_tagger_task(tagger_id: int):
             field_data=field_data,
             show_progress=show_progress,
             snowball_language=tagger_object.snowball_language,
+            stemmer_backend=stemmer_backend,
             detect_lang=tagger_object.detect_lang,
             balance=tagger_object.balance,
             balance_to_max_limit=tagger_object.balance_to_max_limit
         )
         # update status to training
         show_progress.update_step("training")
-        show_progress.update_view(0)
+        show_progress.update_view()
         # train model
         tagger = TextTagger(
             embedding=embedding,
@@ -213,7 +217,8 @@ def train_tagger_task(tagger_id: int):
             "confusion_matrix": tagger.report.confusion.tolist(),
             "model_size": round(float(os.path.getsize(tagger_full_path)) / 1000000, 1),  # bytes to mb
             "plot": str(image_path),
-            "classes": tagger.report.classes
+            "classes": tagger.report.classes,
+            "stemmer_backend": stemmer_backend
         }
 
 
@@ -321,7 +326,7 @@ def save_tagger_results(result_data: dict):
         show_progress = ShowProgress(task_object, multiplier=1)
         # update status to saving
         show_progress.update_step('saving')
-        show_progress.update_view(0)
+        show_progress.update_view()
         tagger_object.model.name = result_data["tagger_path"]
         tagger_object.precision = result_data["precision"]
         tagger_object.recall = result_data["recall"]
@@ -332,9 +337,13 @@ def save_tagger_results(result_data: dict):
         tagger_object.plot.name = result_data["plot"]
         tagger_object.confusion_matrix = result_data["confusion_matrix"]
         tagger_object.classes = json.dumps(result_data["classes"], ensure_ascii=False)
+        tagger_object.stemmer_backend = result_data["stemmer_backend"]
         tagger_object.save()
         task_object.complete()
 
+        # Drop the previous version of a retrained model from the cache.
+        TAGGER_CACHE.invalidate(tagger_object.pk)
+
         # Cleanup after the transaction to ensure integrity database records.
         if model_path and model_path.exists():
             model_path.unlink(missing_ok=True)
@@ -370,23 +379,34 @@ def get_mlp(tagger_group_id: int, text: str, lemmatize: bool = False, use_ner: b
 
     # retrieve tags
     if use_ner and mlp_result:
-        seen_tags = {}
-        for fact in mlp_result["texta_facts"]:
-            fact_val = fact["str_val"].lower().strip()
-            if fact_val in taggers and fact_val not in seen_tags:
-                fact_val_dict = {
-                    "tag": taggers[fact_val]["tag"],
-                    "probability": 1.0,
-                    "tagger_id": taggers[fact_val]["id"],
-                    "ner_match": True
-                }
-                tags.append(fact_val_dict)
-                seen_tags[fact_val] = True
+        tags = get_ner_tags(mlp_result, taggers)
         logging.getLogger(settings.INFO_LOGGER).info(f"[Get MLP] Detected {len(tags)} with NER.")
 
     return text, tags
 
 
+def get_ner_tags(mlp_result: dict, taggers: Dict[str, dict]) -> List[dict]:
+    """
+    Retrieves tags predicted by MLP NER that are present in models.
+    :param mlp_result: MLP output of a single text.
+    :param taggers: Lowercase tagger descriptions mapped to their tags and ids.
+    """
+    tags = []
+    seen_tags = {}
+    for fact in mlp_result["texta_facts"]:
+        fact_val = fact["str_val"].lower().strip()
+        if fact_val in taggers and fact_val not in seen_tags:
+            fact_val_dict = {
+                "tag": taggers[fact_val]["tag"],
+                "probability": 1.0,
+                "tagger_id": taggers[fact_val]["id"],
+                "ner_match": True
+            }
+            tags.append(fact_val_dict)
+            seen_tags[fact_val] = True
+    return tags
+
+
 def get_tag_candidates(tagger_group_id: int, text: str, ignore_tags: List[str] = [], n_similar_docs: int = 10, max_candidates: int = 10):
     """
     Finds frequent tags from documents similar to input document.
@@ -407,22 +427,57 @@ def get_tag_candidates(tagger_group_id: int, text: str, ignore_tags: List[str] =
     info_logger.info(f"[Get Tag Candidates] Trying to retrieve {n_similar_docs} documents from Elastic...")
     docs = es_s.search(size=n_similar_docs)
     info_logger.info(f"[Get Tag Candidates] Successfully retrieved {len(docs)} documents from Elastic.")
+    tag_candidates = count_tag_candidates(docs, hybrid_tagger_object.fact_name, ignore_tags, max_candidates)
+    info_logger.info(f"[Get Tag Candidates] Retrieved {len(tag_candidates)} tag candidates.")
+    return tag_candidates
+
+
+def count_tag_candidates(docs: List[dict], fact_name: str, ignore_tags: Dict[str, bool], max_candidates: int) -> List[str]:
+    """Returns the most frequent values of the Tagger Group fact in the given similar documents."""
     # dict for tag candidates from elastic
     tag_candidates = {}
     # retrieve tags from elastic response
     for doc in docs:
         if "texta_facts" in doc:
             for fact in doc["texta_facts"]:
-                if fact["fact"] == hybrid_tagger_object.fact_name:
+                if fact["fact"] == fact_name:
                     fact_val = fact["str_val"]
                     if fact_val not in ignore_tags:
                         if fact_val not in tag_candidates:
                             tag_candidates[fact_val] = 0
                         tag_candidates[fact_val] += 1
     # sort and limit candidates
-    tag_candidates = [item[0] for item in sorted(tag_candidates.items(), key=lambda k: k[1], reverse=True)][:max_candidates]
-    info_logger.info(f"[Get Tag Candidates] Retrieved {len(tag_candidates)} tag candidates.")
-    return tag_candidates
+    return [item[0] for item in sorted(tag_candidates.items(), key=lambda k: k[1], reverse=True)][:max_candidates]
+
+
+def get_tag_candidates_batch(tagger_group_object: TaggerGroup, texts: List[str], ignore_tags: List[List[dict]], ec: ElasticCore, field_paths: List[str],
+                             indices: List[str], n_similar_docs: int = 10, max_candidates: int = 10) -> List[List[str]]:
+    """
+    Finds frequent tags from documents similar to every input text
+    with a single More-Like-This multi-search request.
+    """
+    if not texts:
+        return []
+
+    body = []
+    for text in texts:
+        query = Query()
+        query.add_mlt(field_paths, text)
+        body.append({"index": ",".join(indices)})
+        body.append({**query.query, "size": n_similar_docs, "_source": ["texta_facts"]})
+
+    responses = ec.es.msearch(body=body)["responses"]
+
+    candidates = []
+    for response, text_ignore_tags in zip(responses, ignore_tags):
+        if "error" in response:
+            logging.getLogger(settings.ERROR_LOGGER).error(f"[Get Tag Candidates] Multi-search failed: {json.dumps(response['error'])}")
+            candidates.append([])
+            continue
+        docs = [hit["_source"] for hit in response["hits"]["hits"]]
+        text_ignore_tags = {tag["tag"]: True for tag in text_ignore_tags}
+        candidates.append(count_tag_candidates(docs, tagger_group_object.fact_name, text_ignore_tags, max_candidates))
+    return candidates
 
 
 @task(name="apply_tagger", base=BaseTask)
@@ -434,8 +489,8 @@ def apply_tagger(tagger_id: int, content: Union[str, Dict[str, str]], input_type
 
     tagger_object = Tagger.objects.get(pk=tagger_id)
 
-    # Load tagger model from the disc
-    tagger = tagger_object.load_tagger(lemmatize=lemmatize)
+    # Load tagger model from the cache or the disc
+    tagger = tagger_object.load_cached_tagger(lemmatize=lemmatize)
 
     # Use the loaded model for predicting
     prediction = tagger_object.apply_loaded_tagger(tagger=tagger, content=content, input_type=input_type, feedback=feedback)
@@ -443,6 +498,67 @@ def apply_tagger(tagger_id: int, content: Union[str, Dict[str, str]], input_type
     return prediction
 
 
+def lemmatize_content(content: Union[str, Dict[str, str]]) -> Union[str, Dict[str, str]]:
+    """
+    Lemmatizes the text or every text field of a document with a single MLP call
+    so that it could be shared between all the taggers of a Tagger Group.
+    """
+    if isinstance(content, str):
+        keys, texts = None, [content]
+    else:
+        keys = [key for key, value in content.items() if isinstance(value, str) and value]
+        texts = [content[key] for key in keys]
+
+    if not texts:
+        return content
+
+    with allow_join_result():
+        mlp = apply_mlp_on_list.apply_async(kwargs={"texts": texts, "analyzers": ["lemmas"]}, queue=settings.CELERY_MLP_TASK_QUEUE).get()
+    lemmas = [result["text_mlp"]["lemmas"] for result in mlp]
+
+    if keys is None:
+        return lemmas[0]
+    return {**content, **dict(zip(keys, lemmas))}
+
+
+def get_completed_taggers(tagger_group_object: TaggerGroup):
+    """Retrieves the taggers of a Tagger Group whose latest task has been completed with a single query."""
+    last_status = Task.objects.filter(tagger=OuterRef("pk")).order_by("-pk").values("status")[:1]
+    taggers = tagger_group_object.taggers.annotate(last_task_status=Subquery(last_status))
+    return taggers.filter(last_task_status=Task.STATUS_COMPLETED).select_related("embedding", "project")
+
+
+def apply_loaded_taggers(tagger_objects: List[Tagger], content: Union[str, Dict[str, str]], lemmatized_content: Union[str, Dict[str, str]], input_type: str = "text",
+                         feedback: bool = False, loaded_taggers: Dict[int, TextTagger] = None) -> List[dict]:
+    """
+    Predicts with a list of taggers inside the current process, loading their models through the tagger cache.
+    Taggers using Snowball stemming get the original content, as stemming takes precedence over lemmatization.
+    :param loaded_taggers: Optional dictionary for holding on to the loaded models between calls.
+    """
+    result_tags = []
+    for tagger_object in tagger_objects:
+        if loaded_taggers is None:
+            tagger = tagger_object.load_cached_tagger(lemmatize=False)
+        else:
+            if tagger_object.pk not in loaded_taggers:
+                loaded_taggers[tagger_object.pk] = tagger_object.load_cached_tagger(lemmatize=False)
+            tagger = loaded_taggers[tagger_object.pk]
+        if not tagger:
+            continue
+        tagger_content = content if tagger_object.snowball_language else lemmatized_content
+        result = tagger_object.apply_loaded_tagger(tagger=tagger, content=tagger_content, input_type=input_type, feedback=feedback)
+        result_tags.append(result)
+    return result_tags
+
+
+@task(name="apply_tagger_shard", base=BaseTask)
+def apply_tagger_shard(tagger_ids: List[int], content: Union[str, Dict[str, str]], lemmatized_content: Union[str, Dict[str, str]], input_type: str = "text",
+                       feedback: bool = False):
+    """Task for applying a shard of the taggers in a Tagger Group inside a single worker."""
+    tagger_objects = Tagger.objects.filter(pk__in=tagger_ids).select_related("embedding", "project")
+    return apply_loaded_taggers(tagger_objects, content, lemmatized_content, input_type=input_type, feedback=feedback)
+
+
 def apply_tagger_group(tagger_group_id: int, content: Union[str, Dict[str, str]], tag_candidates: List[str], request, input_type: str = 'text', lemmatize: bool = False,
                        feedback: bool = False, use_async: bool = True):
     # get tagger group object
@@ -450,24 +566,27 @@ def apply_tagger_group(tagger_group_id: int, content: Union[str, Dict[str, str]]
     tagger_group_object = TaggerGroup.objects.get(pk=tagger_group_id)
     # get tagger objects
     candidates_str = "|".join(tag_candidates)
-    tagger_objects = tagger_group_object.taggers.filter(description__iregex=f"^({candidates_str})$")
     # filter out completed
-    tagger_objects = [tagger for tagger in tagger_objects if tagger.tasks.last().status == Task.STATUS_COMPLETED]
+    tagger_objects = list(get_completed_taggers(tagger_group_object).filter(description__iregex=f"^({candidates_str})$"))
     logging.getLogger(settings.INFO_LOGGER).info(f"[Apply Tagger Group] Loaded {len(tagger_objects)} tagger objects.")
-    # predict tags
-    if use_async:
+
+    # lemmatize the content just once before giving it to taggers
+    needs_lemmas = lemmatize and any(not tagger.snowball_language for tagger in tagger_objects)
+    lemmatized_content = lemmatize_content(content) if needs_lemmas else content
+
+    # predict tags, large groups are split into shards which are predicted in parallel
+    shard_size = max(settings.TAGGER_GROUP_SHARD_SIZE, 1)
+    if use_async and len(tagger_objects) > shard_size:
+        shards = [tagger_objects[i:i + shard_size] for i in range(0, len(tagger_objects), shard_size)]
         with allow_join_result():
-            group_task = group(apply_tagger.s(tagger.pk, content, input_type=input_type, lemmatize=lemmatize, feedback=feedback, use_logger=False) for tagger in tagger_objects)
+            group_task = group(apply_tagger_shard.s([tagger.pk for tagger in shard], content, lemmatized_content, input_type=input_type, feedback=feedback) for shard in shards)
             group_results = group_task.apply_async(queue=settings.CELERY_SHORT_TERM_TASK_QUEUE)
-            result_tags = group_results.get()
+            result_tags = [result for shard_result in group_results.get() for result in shard_result]
 
-            logging.getLogger(settings.INFO_LOGGER).info(f"[Apply Tagger Group] Group task applied.")
+            logging.getLogger(settings.INFO_LOGGER).info(f"[Apply Tagger Group] Group task applied in {len(shards)} shards.")
 
     else:
-        result_tags = []
-        for tagger in tagger_objects:
-            result = apply_tagger(tagger.pk, content, input_type=input_type, lemmatize=lemmatize, feedback=feedback, use_logger=False)
-            result_tags.append(result)
+        result_tags = apply_loaded_taggers(tagger_objects, content, lemmatized_content, input_type=input_type, feedback=feedback)
 
     # retrieve results & remove non-hits
     tags = [tag for tag in result_tags if tag]
@@ -533,17 +652,79 @@ def update_generator(generator: ElasticSearcher, ec: ElasticCore, fields: List[s
                     if new_facts:
                         existing_facts.extend(new_facts)
 
-            if existing_facts:
-                # Remove duplicates to avoid adding the same facts with repetitive use.
-                existing_facts = ElasticDocument.remove_duplicate_facts(existing_facts)
+            yield to_update_action(raw_doc, existing_facts)
+
+
+def to_update_action(raw_doc: dict, existing_facts: List[dict]) -> dict:
+    if existing_facts:
+        # Remove duplicates to avoid adding the same facts with repetitive use.
+        existing_facts = ElasticDocument.remove_duplicate_facts(existing_facts)
+
+    return {
+        "_index": raw_doc["_index"],
+        "_id": raw_doc["_id"],
+        "_type": raw_doc.get("_type", "_doc"),
+        "_op_type": "update",
+        "_source": {"doc": {"texta_facts": existing_facts}}
+    }
 
-            yield {
-                "_index": raw_doc["_index"],
-                "_id": raw_doc["_id"],
-                "_type": raw_doc.get("_type", "_doc"),
-                "_op_type": "update",
-                "_source": {"doc": {"texta_facts": existing_facts}}
-            }
+
+def batch_update_generator(generator: ElasticSearcher, ec: ElasticCore, fields: List[str], fact_name: str, fact_value: str, max_tags: int, tagger_group_object: TaggerGroup,
+                           object_args: Dict):
+    """
+    Applies a Tagger Group to whole scroll batches at once: MLP is applied with a single call per batch,
+    tag candidates are retrieved with a single multi-search and the models are loaded only once per run.
+    """
+    info_logger = logging.getLogger(settings.INFO_LOGGER)
+    lemmatize = object_args["lemmatize"]
+    use_ner = object_args["use_ner"]
+
+    tagger_objects = {tagger.description.lower(): tagger for tagger in get_completed_taggers(tagger_group_object)}
+    ner_taggers = {description: {"tag": tagger.description, "id": tagger.pk} for description, tagger in tagger_objects.items()}
+    field_paths = json.loads(tagger_group_object.taggers.first().fields)
+    indices = tagger_group_object.get_indices()
+    loaded_taggers = {}
+
+    for i, scroll_batch in enumerate(generator):
+        info_logger.info(f"[Tagger] Appyling tagger_group with ID {tagger_group_object.pk} to batch {i + 1}...")
+
+        # collect texts of all the documents and fields in the batch
+        hits = [raw_doc["_source"] for raw_doc in scroll_batch]
+        items = []
+        for doc_index, hit in enumerate(hits):
+            flat_hit = ec.flatten(hit)
+            for field in fields:
+                text = flat_hit.get(field, None)
+                if text and isinstance(text, str):
+                    items.append((doc_index, field, text))
+        texts = [text for _, _, text in items]
+
+        # update texts and tags with MLP
+        lemmas, ner_tags = texts, [[] for _ in texts]
+        if texts and (lemmatize or use_ner):
+            with allow_join_result():
+                mlp = apply_mlp_on_list.apply_async(kwargs={"texts": texts, "analyzers": ["all"]}, queue=settings.CELERY_MLP_TASK_QUEUE).get()
+            if lemmatize:
+                lemmas = [mlp_result["text_mlp"]["lemmas"] if mlp_result else text for mlp_result, text in zip(mlp, texts)]
+            if use_ner:
+                ner_tags = [get_ner_tags(mlp_result, ner_taggers) if mlp_result else [] for mlp_result in mlp]
+
+        # retrieve tag candidates
+        tag_candidates = get_tag_candidates_batch(tagger_group_object, texts, ner_tags, ec, field_paths, indices, n_similar_docs=object_args["n_similar_docs"],
+                                                  max_candidates=object_args["n_candidate_tags"])
+
+        new_facts = [[] for _ in hits]
+        for (doc_index, field, text), text_lemmas, text_ner_tags, candidates in zip(items, lemmas, ner_tags, tag_candidates):
+            candidate_taggers = [tagger_objects[candidate.lower()] for candidate in candidates if candidate.lower() in tagger_objects]
+            results = apply_loaded_taggers(candidate_taggers, text, text_lemmas, input_type="text", loaded_taggers=loaded_taggers)
+            # take only `max_tags` first tags (sorted by probability in descending order)
+            tagger_group_tags = sorted([result for result in results if result and result["result"]], key=lambda k: k["probability"], reverse=True)
+            tags = text_ner_tags + tagger_group_tags[:max_tags]
+            new_facts[doc_index].extend(to_texta_fact(tags, field, fact_name, fact_value))
+
+        for raw_doc, hit, doc_facts in zip(scroll_batch, hits, new_facts):
+            existing_facts = hit.get("texta_facts", []) + doc_facts
+            yield to_update_action(raw_doc, existing_facts)
 
 
 @task(name="apply_tagger_to_index", base=TransactionAwareTask, queue=settings.CELERY_LONG_TERM_TASK_QUEUE)
@@ -554,7 +735,7 @@ def apply_tagger_to_index(object_id: int, indices: List[str], fields: List[str],
         tagger = None
         if object_type == "tagger":
             tagger_object = Tagger.objects.get(pk=object_id)
-            tagger = tagger_object.load_tagger(lemmatize=object_args["lemmatize"], use_logger=True)
+            tagger = tagger_object.load_cached_tagger(lemmatize=object_args["lemmatize"])
         else:
             tagger_object = TaggerGroup.objects.get(pk=object_id)
 
@@ -573,8 +754,12 @@ def apply_tagger_to_index(object_id: int, indices: List[str], fields: List[str],
             callback_progress=progress,
         )
 
-        actions = update_generator(generator=searcher, ec=ec, fields=fields, fact_name=fact_name, fact_value=fact_value, max_tags=max_tags, object_id=object_id,
-                                   object_type=object_type, tagger_object=tagger_object, object_args=object_args, tagger=tagger)
+        if object_type != "tagger" and object_args.get("use_batches", False):
+            actions = batch_update_generator(generator=searcher, ec=ec, fields=fields, fact_name=fact_name, fact_value=fact_value, max_tags=max_tags,
+                                             tagger_group_object=tagger_object, object_args=object_args)
+        else:
+            actions = update_generator(generator=searcher, ec=ec, fields=fields, fact_name=fact_name, fact_value=fact_value, max_tags=max_tags, object_id=object_id,
+                                       object_type=object_type, tagger_object=tagger_object, object_args=object_args, tagger=tagger)
         for success, info in streaming_bulk(client=ec.es, actions=actions, refresh="wait_for", chunk_size=bulk_size, max_chunk_bytes=max_chunk_bytes, max_retries=3):
             if not success:
                 logging.getLogger(settings.ERROR_LOGGER).exception(json.dumps(info))
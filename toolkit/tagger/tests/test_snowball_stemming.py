@@ -8,10 +8,12 @@ from rest_framework import status
 from rest_framework.test import APITransactionTestCase
 
 from texta_elastic.core import ElasticCore
+from toolkit.core.task.models import Task
+from toolkit.elastic.choices import STEMMER_BACKEND_ELASTIC, STEMMER_BACKEND_SNOWBALL
 from toolkit.helper_functions import reindex_test_dataset
 from toolkit.tagger.models import Tagger
 from toolkit.test_settings import (TEST_FIELD, TEST_QUERY, VERSION_NAMESPACE)
-from toolkit.tools.utils_for_tests import create_test_user, print_output, project_creation
+from toolkit.tools.utils_for_tests import create_test_user, print_output, project_creation, remove_file
 
 
 def skip_for_es6():
@@ -111,6 +113,44 @@ class TaggerSnowballStemmerTests(APITransactionTestCase):
         self.assertTrue(response.status_code == status.HTTP_201_CREATED)
 
 
+    @skipIf(skip_for_es6(), "This test only works for ES7 which has an Estonian stemmer!")
+    def test_snowball_backend_falls_back_to_elasticsearch_for_unsupported_languages(self):
+        self.project.stemmer_backend = STEMMER_BACKEND_SNOWBALL
+        self.project.save()
+        payload = {
+            "description": "TestTagger",
+            "fields": [TEST_FIELD],
+            "vectorizer": "TfIdf Vectorizer",
+            "classifier": "LinearSVC",
+            "query": json.dumps(TEST_QUERY, ensure_ascii=False),
+            "maximum_sample_size": 500,
+            "negative_multiplier": 1.0,
+            "score_threshold": 0.1,
+            "snowball_language": "estonian"
+        }
+        url = reverse(f"{VERSION_NAMESPACE}:tagger-list", kwargs={"project_pk": self.project.pk})
+        response = self.client.post(url, data=payload, format="json")
+        print_output("test_snowball_backend_falls_back_to_elasticsearch_for_unsupported_languages:response.data", response.data)
+        self.assertTrue(response.status_code == status.HTTP_201_CREATED)
+
+        tagger = Tagger.objects.get(pk=response.data["id"])
+        self.addCleanup(remove_file, tagger.model.path)
+        self.addCleanup(remove_file, tagger.plot.path)
+        self.assertEqual(tagger.tasks.last().status, Task.STATUS_COMPLETED)
+        self.assertEqual(tagger.stemmer_backend, STEMMER_BACKEND_SNOWBALL)
+        # Blanked out examples would leave the tagger without any features.
+        self.assertTrue(tagger.num_features > 0)
+
+        # Changing the backend of the project does not change the features of trained taggers.
+        self.project.stemmer_backend = STEMMER_BACKEND_ELASTIC
+        self.project.save()
+        tagger.refresh_from_db()
+        self.assertEqual(tagger.stemmer_backend, STEMMER_BACKEND_SNOWBALL)
+        url = reverse(f"{VERSION_NAMESPACE}:tagger-tag-text", kwargs={"project_pk": self.project.pk, "pk": tagger.pk})
+        response = self.client.post(url, data={"text": "Autoriteetidega ei vaielda."}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
     def test_running_snowball_stemmer_with_a_wrong_language_value(self):
         payload = {
             "description": "TestTagger",
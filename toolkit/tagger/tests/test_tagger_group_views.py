@@ -4,7 +4,9 @@ import uuid
 from io import BytesIO
 from time import sleep
 
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITransactionTestCase
@@ -37,6 +39,7 @@ class TaggerGroupViewTests(APITransactionTestCase):
         # new fact name and value used when applying tagger to index
         self.new_fact_name = "TEST_TAGGER_GROUP_NAME"
         self.new_fact_name_tag_limit = "TEST_TAGGER_GROUP_NAME_LIMITED_TAGS"
+        self.new_fact_name_no_batches = "TEST_TAGGER_GROUP_NAME_NO_BATCHES"
 
         # Create copy of test index
         self.reindex_url = f'{TEST_VERSION_PREFIX}/projects/{self.project.id}/elastic/reindexer/'
@@ -80,10 +83,12 @@ class TaggerGroupViewTests(APITransactionTestCase):
         self.create_taggers_with_empty_fields()
         self.run_apply_tagger_group_to_index()
         self.run_apply_tagger_group_to_index_with_tag_limit()
+        self.run_apply_tagger_group_to_index_without_batches()
         self.run_apply_tagger_group_to_index_invalid_input()
         self.run_model_export_import()
         self.run_tagger_instances_have_mention_to_tagger_group()
         self.run_check_that_filtering_taggers_by_tagger_group_description_works()
+        self.run_check_that_list_query_count_does_not_depend_on_page_size()
 
         # Ordering here is important.
         self.run_simple_check_that_you_can_import_models_into_s3()
@@ -399,6 +404,38 @@ class TaggerGroupViewTests(APITransactionTestCase):
             self.add_cleanup_files(tagger.id)
 
 
+    def run_apply_tagger_group_to_index_without_batches(self):
+        """Tests applying tagger group to index one document at a time using apply_to_index endpoint."""
+        url = f'{self.url}{self.test_imported_tagger_group_id}/apply_to_index/'
+
+        payload = {
+            "description": "apply tagger test task",
+            "new_fact_name": self.new_fact_name_no_batches,
+            "indices": [{"name": self.test_index_copy}],
+            "fields": [TEST_FIELD],
+            "lemmatize": False,
+            "n_similar_docs": 10,
+            "n_candidate_tags": 10,
+            "use_batches": False
+        }
+        response = self.client.post(url, payload, format='json')
+        print_output('test_apply_tagger_group_to_index_without_batches:response.data', response.data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        tagger_group_object = TaggerGroup.objects.get(pk=self.test_imported_tagger_group_id)
+
+        # Wait til the task has finished
+        task_object = tagger_group_object.tasks.last()
+        while task_object.status != Task.STATUS_COMPLETED:
+            print_output('test_apply_tagger_group_to_index_without_batches: waiting for applying tagger task to finish, current status:', task_object.status)
+            sleep(2)
+
+        results = ElasticAggregator(indices=[self.test_index_copy]).get_fact_values_distribution(self.new_fact_name_no_batches)
+        print_output("test_apply_tagger_group_to_index_without_batches:elastic aggerator results:", results)
+
+        # Check if at least one new fact is added
+        self.assertTrue(len(results) >= 1)
+
+
     def run_apply_tagger_group_to_index_invalid_input(self):
         """Tests applying tagger group to index with invalid input using apply_to_index endpoint."""
 
@@ -574,6 +611,36 @@ class TaggerGroupViewTests(APITransactionTestCase):
         self.assertTrue(len(response.data["results"]) == 0)
 
 
+    def run_check_that_list_query_count_does_not_depend_on_page_size(self):
+        tagger_group = TaggerGroup.objects.get(pk=self.test_tagger_group_id)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        initial_queries = context.captured_queries
+
+        new_groups = []
+        for i in range(3):
+            new_group = TaggerGroup.objects.create(description=f"QueryCount{i}", fact_name=TEST_FACT_NAME, project=self.project, author=self.user)
+            new_group.taggers.add(*tagger_group.taggers.all())
+            new_groups.append(new_group)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(context.captured_queries), len(initial_queries))
+
+        listed_group = [group for group in response.data["results"] if group["description"] == "QueryCount0"][0]
+        original_group = [group for group in response.data["results"] if group["id"] == tagger_group.pk][0]
+        self.assertEqual(listed_group["tagger_statistics"], original_group["tagger_statistics"])
+        self.assertEqual(listed_group["tagger_params"], original_group["tagger_params"])
+        print_output("run_check_that_list_query_count_does_not_depend_on_page_size:response.data", len(context.captured_queries))
+
+        # Detach the shared taggers first, otherwise deleting the groups would delete them too.
+        for new_group in new_groups:
+            new_group.taggers.clear()
+            new_group.delete()
+
+
     def run_check_for_downloading_model_from_s3_that_doesnt_exist(self):
         url = reverse("v2:tagger_group-download-from-s3", kwargs={"project_pk": self.project.pk})
         response = self.client.post(url, data={"minio_path": "this simply doesn't exist.zip"}, format="json")
@@ -17,7 +17,7 @@ from texta_elastic.core import ElasticCore
 from toolkit.core.task.models import Task
 from toolkit.elastic.reindexer.models import Reindexer
 from toolkit.helper_functions import reindex_test_dataset, get_core_setting, get_minio_client, set_core_setting
-from toolkit.tagger.models import Tagger
+from toolkit.tagger.models import TAGGER_CACHE, Tagger
 from toolkit.test_settings import (TEST_FIELD, TEST_FIELD_CHOICE, TEST_KEEP_PLOT_FILES, TEST_MATCH_TEXT, TEST_QUERY,
                                    TEST_TAGGER_BINARY, TEST_VERSION_PREFIX, VERSION_NAMESPACE)
 from toolkit.tools.utils_for_tests import create_test_user, print_output, project_creation, remove_file
@@ -122,6 +122,7 @@ class TaggerViewTests(APITransactionTestCase):
         self.run_create_tagger_with_incorrect_fields()
         self.run_tag_text(self.test_tagger_ids)
         self.run_tag_text_result_check([self.test_tagger_ids[-1]])
+        self.run_tag_text_uses_model_cache()
         self.run_tag_text_with_lemmatization()
         self.run_tag_doc()
         self.run_tag_doc_with_lemmatization()
@@ -317,6 +318,24 @@ class TaggerViewTests(APITransactionTestCase):
                 self.assertEqual(response.status_code, status.HTTP_200_OK)
                 self.assertEqual(response.data['result'], label)
 
+    def run_tag_text_uses_model_cache(self):
+        """Tests that repeated predictions are served from the tagger cache and that deletion invalidates it."""
+        test_tagger_id = self.test_tagger_ids[-1]
+        tag_text_url = f'{self.list_url}{test_tagger_id}/tag_text/'
+        TAGGER_CACHE.clear()
+
+        hits = TAGGER_CACHE.hits
+        for i in range(2):
+            response = self.client.post(tag_text_url, {"text": "This is some test text for the Tagger Test"})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        print_output('test_tag_text_uses_model_cache:cache_stats', TAGGER_CACHE.stats())
+        self.assertEqual(TAGGER_CACHE.hits, hits + 1)
+        self.assertEqual(TAGGER_CACHE.stats()["items"], 1)
+
+        TAGGER_CACHE.invalidate(test_tagger_id)
+        self.assertEqual(TAGGER_CACHE.stats()["items"], 0)
+
     def run_tag_text_with_lemmatization(self):
         """Tests the endpoint for the tag_text action"""
         payload = {
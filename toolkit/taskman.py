@@ -2,6 +2,7 @@ import os
 import pathlib
 
 from celery import Celery
+from celery.signals import worker_process_init, worker_ready
 
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'toolkit.settings')
@@ -19,6 +20,24 @@ for path in pathlib.Path("toolkit/elastic/").rglob("*"):
 app.autodiscover_tasks(['toolkit.beat_tasks'])
 
 
+@worker_process_init.connect
+def configure_worker_process(**kwargs):
+    from django.conf import settings
+    from toolkit.tools.quantization import set_intra_op_threads
+    set_intra_op_threads(settings.TORCH_INTRA_OP_THREADS)
+
+
+@worker_ready.connect
+def resume_interrupted_tasks(**kwargs):
+    import logging
+    from django.conf import settings
+    from toolkit.mlp.tasks import resume_mlp_schedulers
+    try:
+        resume_mlp_schedulers()
+    except Exception as e:
+        logging.getLogger(settings.ERROR_LOGGER).exception(e)
+
+
 @app.task(bind=True)
 def debug_task(self):
     print('Request: {0!r}'.format(self.request))
@@ -1,16 +1,25 @@
+import bisect
+import html
 import logging
-from typing import Optional
+import re
+from typing import List, Optional
 
 import elasticsearch
 from celery.result import allow_join_result
 from elasticsearch.client import IndicesClient
+from nltk.stem.snowball import SnowballStemmer as NLTKSnowballStemmer
 from texta_tools.text_splitter import TextSplitter
 
 from texta_elastic.core import ElasticCore
+from toolkit.elastic.choices import STEMMER_BACKEND_ELASTIC, STEMMER_BACKEND_SNOWBALL
 from toolkit.mlp.tasks import apply_mlp_on_list
 from toolkit.settings import CELERY_MLP_TASK_QUEUE, ERROR_LOGGER
 
 
+# Elasticsearch refuses to analyze more than 10K tokens in a single request.
+MAX_WORDS_PER_REQUEST = 5000
+
+
 class CeleryLemmatizer:
 
     def __init__(self):
@@ -78,6 +87,81 @@ class ElasticAnalyzer:
         return " ".join(analysed_chunks)
 
 
+    @staticmethod
+    def _java_length(text: str) -> int:
+        """Length of the text in UTF-16 code units, which Elasticsearch uses for token offsets."""
+        return len(text.encode("utf-16-le")) // 2
+
+
+    def _split_tokens_by_text(self, texts: List[str], tokens: List[dict]) -> List[str]:
+        """
+        Splits the tokens of a multi-text analysis back into separate texts.
+        Offsets of each following text start after the previous one plus an offset gap of one.
+        """
+        text_starts = []
+        offset = 0
+        for text in texts:
+            text_starts.append(offset)
+            offset += self._java_length(text) + 1
+
+        analysed_texts = [[] for _ in texts]
+        for token in tokens:
+            text_index = bisect.bisect_right(text_starts, token["start_offset"]) - 1
+            analysed_texts[max(text_index, 0)].append(token["token"])
+        return [" ".join(text_tokens) for text_tokens in analysed_texts]
+
+
+    def apply_batch_analyzer(self, texts: List[str], body: dict) -> List[str]:
+        try:
+            analysis = self.indices_client.analyze(body={**body, "text": texts})
+            return self._split_tokens_by_text(texts, analysis["tokens"])
+        except elasticsearch.exceptions.RequestError as e:
+            reason = e.info["error"]["reason"]
+            if "Invalid stemmer class" in reason:
+                logging.getLogger(ERROR_LOGGER).warning(e)
+            else:
+                logging.getLogger(ERROR_LOGGER).exception(e)
+            return ["" for _ in texts]
+        except Exception as e:
+            logging.getLogger(ERROR_LOGGER).exception(e)
+            return ["" for _ in texts]
+
+
+    def stem_texts(self, texts: List[str], language: Optional[str], strip_html=True, tokenizer="standard") -> List[str]:
+        """
+        Stems many texts with as few requests as possible by packing them into
+        multi-text analysis requests. Texts too long for a single request are chunked like in stem_text.
+        """
+        analysed_texts = [""] * len(texts)
+        body = self._prepare_stem_body(None, language, strip_html, tokenizer)
+        batch_indices = []
+        batch_words = 0
+
+        for index, text in enumerate(texts):
+            word_count = len(text.split())
+            if word_count > MAX_WORDS_PER_REQUEST:
+                analysed_texts[index] = self.stem_text(text, language, strip_html=strip_html, tokenizer=tokenizer)
+                continue
+
+            if batch_indices and batch_words + word_count > MAX_WORDS_PER_REQUEST:
+                self._flush_batch(texts, batch_indices, body, analysed_texts)
+                batch_indices, batch_words = [], 0
+
+            batch_indices.append(index)
+            batch_words += word_count
+
+        if batch_indices:
+            self._flush_batch(texts, batch_indices, body, analysed_texts)
+
+        return analysed_texts
+
+
+    def _flush_batch(self, texts: List[str], batch_indices: List[int], body: dict, analysed_texts: List[str]):
+        batch_texts = [texts[index] for index in batch_indices]
+        for index, analysed_text in zip(batch_indices, self.apply_batch_analyzer(batch_texts, body)):
+            analysed_texts[index] = analysed_text
+
+
     def _prepare_tokenizer_body(self, text, tokenizer="standard", strip_html: bool = True):
         body = {"text": text, "tokenizer": tokenizer}
         if strip_html:
@@ -109,3 +193,101 @@ class ElasticAnalyzer:
     # with the texta-tools library that send there as the lemmatizer.
     def lemmatize(self, text):
         return self.stem_text(text=text, language=self.language, strip_html=True)
+
+
+class SnowballStemmer:
+    """
+    In-process alternative to stemming through Elasticsearch with the same Snowball algorithms through NLTK.
+    Mirrors the html_strip character filter, the standard tokenizer and the snowball token filter of Elasticsearch:
+    tokens are split by the word boundary rules of the standard tokenizer and their case is kept as it is.
+    Scripts without spaces between words (e.g. Thai) are not segmented the way Elasticsearch does it.
+    """
+    # Contents of these elements are dropped by the html_strip character filter, the rest of the tags by themselves.
+    HTML_SKIPPED_ELEMENT_PATTERN = re.compile(r"<(script|style)\b[^>]*>.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+    HTML_BLOCK_TAG_PATTERN = re.compile(r"</?(?:address|article|aside|blockquote|br|dd|div|dl|dt|footer|form|h[1-6]|header|hr|li|nav|ol|p|pre|section|table|td|th|tr|ul)\b[^>]*>", re.IGNORECASE)
+    HTML_TAG_PATTERN = re.compile(r"<[^>]+>")
+
+    # Ideographs and hiragana are tokens by themselves, the other letters and digits form words.
+    IDEOGRAPHS = "\u3040-\u309f\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+    WORD_CHARACTER = rf"[^\W{IDEOGRAPHS}]"
+    LETTER = rf"[^\W\d_{IDEOGRAPHS}]"
+    # Letters are joined over apostrophes, full stops and colons, digits over commas, full stops and semicolons.
+    TOKEN_PATTERN = re.compile(rf"[{IDEOGRAPHS}]|{WORD_CHARACTER}+(?:(?:(?<={LETTER})['’.:](?={LETTER})|(?<=\d)['’.,;](?=\d)){WORD_CHARACTER}+)*")
+    MAX_TOKEN_LENGTH = 255
+
+    # Stand-in for upper case letters, the Snowball algorithms only know lower case letters.
+    # NLTK lowercases the words, this keeps them out of the vowels and suffixes like in Elasticsearch.
+    UPPER_CASE_PLACEHOLDER = "\ue000"
+
+
+    def __init__(self, language="english"):
+        self.language = language
+        self._stemmers = {}
+
+
+    @staticmethod
+    def supports(language: Optional[str]) -> bool:
+        return language in NLTKSnowballStemmer.languages
+
+
+    def _get_stemmer(self, language: str) -> NLTKSnowballStemmer:
+        if language not in self._stemmers:
+            self._stemmers[language] = NLTKSnowballStemmer(language)
+        return self._stemmers[language]
+
+
+    def strip_html(self, text: str) -> str:
+        text = self.HTML_SKIPPED_ELEMENT_PATTERN.sub("", text)
+        text = self.HTML_BLOCK_TAG_PATTERN.sub("\n", text)
+        return html.unescape(self.HTML_TAG_PATTERN.sub("", text))
+
+
+    def tokenize_text(self, text: str, strip_html=True) -> List[str]:
+        if strip_html:
+            text = self.strip_html(text)
+        tokens = []
+        for token in self.TOKEN_PATTERN.findall(text):
+            # The standard tokenizer splits tokens longer than its maximum length.
+            tokens.extend(token[start:start + self.MAX_TOKEN_LENGTH] for start in range(0, len(token), self.MAX_TOKEN_LENGTH))
+        return tokens
+
+
+    def stem_token(self, stemmer: NLTKSnowballStemmer, token: str) -> str:
+        upper_case_letters = [character for character in token if character != character.lower()]
+        if not upper_case_letters:
+            return stemmer.stem(token)
+
+        masked_token = "".join(self.UPPER_CASE_PLACEHOLDER if character != character.lower() else character for character in token)
+        stem = stemmer.stem(masked_token)
+        # Suffixes never contain the placeholders, so they are all still there in their original order.
+        upper_case_letters = iter(upper_case_letters)
+        return "".join(next(upper_case_letters) if character == self.UPPER_CASE_PLACEHOLDER else character for character in stem)
+
+
+    def stem_text(self, text: str, language: Optional[str], strip_html=True, tokenizer="standard"):
+        language = language or self.language
+        if not self.supports(language):
+            logging.getLogger(ERROR_LOGGER).warning(f"Snowball stemmer does not support language '{language}'!")
+            return ""
+
+        stemmer = self._get_stemmer(language)
+        return " ".join(self.stem_token(stemmer, token) for token in self.tokenize_text(text, strip_html=strip_html))
+
+
+    def stem_texts(self, texts: List[str], language: Optional[str], strip_html=True, tokenizer="standard") -> List[str]:
+        return [self.stem_text(text, language, strip_html=strip_html, tokenizer=tokenizer) for text in texts]
+
+
+    # Same interface as ElasticAnalyzer for the texta-tools libraries.
+    def lemmatize(self, text):
+        return self.stem_text(text=text, language=self.language, strip_html=True)
+
+
+def get_stemmer(language: Optional[str] = None, backend: str = STEMMER_BACKEND_ELASTIC):
+    """
+    Returns the stemmer of the chosen backend, falls back to Elasticsearch
+    for languages the in-process Snowball stemmer does not support.
+    """
+    if backend == STEMMER_BACKEND_SNOWBALL and (language is None or SnowballStemmer.supports(language)):
+        return SnowballStemmer(language=language)
+    return ElasticAnalyzer(language=language)
@@ -0,0 +1,153 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from django.conf import settings
+
+
+# Registry of every cache living inside the current process,
+# used by the health endpoint to report their statistics.
+_CACHE_REGISTRY: Dict[str, "ModelCache"] = {}
+
+
+class ModelCache:
+    """
+    Per-process LRU cache for loaded models, bounded by both the amount of
+    items and their (estimated) total size in bytes.
+
+    Keys are tuples where the first element is the primary key of the model object,
+    which makes it possible to invalidate all versions of a model at once.
+    Items can optionally expire after a given amount of seconds.
+    """
+
+
+    def __init__(self, name: str, max_items: int, max_bytes: int):
+        self.name = name
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+
+        self._items = OrderedDict()
+        self._sizes = {}
+        self._expires = {}
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        _CACHE_REGISTRY[name] = self
+
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key in self._expires and self._expires[key] <= time.monotonic():
+                self._remove(key)
+
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+
+            self.misses += 1
+            return None
+
+
+    def put(self, key: Hashable, value: Any, size: int = 0, ttl: Optional[float] = None):
+        # Items that would not fit even into an empty cache are never stored.
+        if self.max_items <= 0 or (self.max_bytes and size > self.max_bytes):
+            return
+
+        with self._lock:
+            # Older versions of the same model are useless once a new one has been loaded.
+            self.invalidate(key[0])
+
+            self._items[key] = value
+            self._sizes[key] = size
+            if ttl is not None:
+                self._expires[key] = time.monotonic() + ttl
+
+            while len(self._items) > self.max_items or (self.max_bytes and self.total_bytes > self.max_bytes):
+                evicted_key = next(iter(self._items))
+                self._remove(evicted_key)
+                self.evictions += 1
+
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], size: Callable[[Any], int]) -> Any:
+        """
+        Returns the cached value for the key or loads it with the loader function.
+        :param key: Cache key, the first element of which must be the model id.
+        :param loader: Function without arguments that loads the model.
+        :param size: Function that estimates the size of the loaded model in bytes.
+        """
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            # Failed loads are not cached so that they could be retried.
+            if value is not None:
+                self.put(key, value, size(value))
+        return value
+
+
+    def invalidate(self, model_id: Any):
+        """Removes all the cached versions of the model with the given id."""
+        with self._lock:
+            for key in [key for key in self._items if key[0] == model_id]:
+                self._remove(key)
+
+
+    def _remove(self, key: Hashable):
+        self._items.pop(key, None)
+        self._sizes.pop(key, None)
+        self._expires.pop(key, None)
+
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._sizes.clear()
+            self._expires.clear()
+
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "items": len(self._items),
+                "max_items": self.max_items,
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / (self.hits + self.misses), 4) if self.hits + self.misses else 0.0,
+                "evictions": self.evictions
+            }
+
+
+def get_file_size(*file_paths: str) -> int:
+    """Sums up the size of the given files on disk, ignoring missing ones."""
+    total = 0
+    for file_path in file_paths:
+        try:
+            total += os.path.getsize(file_path)
+        except (OSError, TypeError):
+            logging.getLogger(settings.INFO_LOGGER).info(f"[Model Cache] Could not read the size of file {file_path}.")
+    return total
+
+
+def get_file_mtime(file_path: str) -> float:
+    try:
+        return os.path.getmtime(file_path)
+    except (OSError, TypeError):
+        return 0.0
+
+
+def get_cache_statistics() -> dict:
+    """Returns hit/miss/eviction counters of all the model caches of the current process."""
+    return {name: cache.stats() for name, cache in _CACHE_REGISTRY.items()}
@@ -0,0 +1,74 @@
+import logging
+import random
+from typing import Any, Callable, Dict, List, Set
+
+import torch
+from django.conf import settings
+
+
+def set_intra_op_threads(thread_count: int):
+    """Limits the threads a single forward pass may use, 0 keeps the default of PyTorch (all the cores)."""
+    if thread_count > 0:
+        torch.set_num_threads(thread_count)
+
+
+def quantize_tagger(tagger: Any) -> bool:
+    """
+    Replaces the model of a loaded BERT or Torch tagger with a dynamically quantized
+    copy where the weights of the linear layers are stored as int8. Quantized models only run on the CPU.
+    Returns whether the tagger was quantized.
+    """
+    model = getattr(tagger, "model", None)
+    if not isinstance(model, torch.nn.Module):
+        logging.getLogger(settings.INFO_LOGGER).info(f"[Quantization] Tagger {type(tagger).__name__} has no model to quantize, using full precision.")
+        return False
+
+    model = model.to("cpu")
+    model.eval()
+    tagger.model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    # The inputs are moved to the device of the tagger, which has to match the model.
+    if hasattr(tagger, "device"):
+        tagger.device = torch.device("cpu")
+    return True
+
+
+def _get_tensors_size(value: Any, seen: Set[tuple]) -> int:
+    if isinstance(value, torch.Tensor):
+        # Tied weights are listed under every module using them.
+        key = (value.data_ptr(), value.numel(), value.dtype)
+        if key in seen:
+            return 0
+        seen.add(key)
+        return value.numel() * value.element_size()
+    if isinstance(value, (tuple, list)):
+        return sum(_get_tensors_size(item, seen) for item in value)
+    return 0
+
+
+def get_model_size(model: torch.nn.Module) -> int:
+    """
+    Measures the tensors of the model in bytes. The state dict is used instead of the parameters and buffers,
+    as the int8 weights of quantized layers are only kept inside their packed params.
+    """
+    seen = set()
+    return sum(_get_tensors_size(value, seen) for value in model.state_dict().values())
+
+
+def sample_examples(data: Dict[str, List[str]], size: int, seed: int = 42) -> Dict[str, List[str]]:
+    """Draws a reproducible sample of at most size examples from the examples of every class."""
+    rng = random.Random(seed)
+    return {label: rng.sample(examples, min(size, len(examples))) for label, examples in data.items()}
+
+
+def get_accuracy(predict: Callable[[List[str]], List[str]], examples: Dict[str, List[str]]) -> float:
+    texts = [text for class_examples in examples.values() for text in class_examples]
+    labels = [label for label, class_examples in examples.items() for _ in class_examples]
+    if not texts:
+        return 0.0
+    predictions = predict(texts)
+    return sum(prediction == label for prediction, label in zip(predictions, labels)) / len(texts)
+
+
+def get_quantized_accuracy_delta(full_predict: Callable[[List[str]], List[str]], quantized_predict: Callable[[List[str]], List[str]], examples: Dict[str, List[str]]) -> float:
+    """Returns the accuracy of the quantized tagger minus the accuracy of the full precision one on the same examples."""
+    return round(get_accuracy(quantized_predict, examples) - get_accuracy(full_predict, examples), 4)
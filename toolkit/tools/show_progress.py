@@ -1,19 +1,57 @@
+import logging
+import weakref
+from time import monotonic
+
+from django.db.models import F
+from django.utils.timezone import now
+
 from toolkit.core.task.models import Task
 from toolkit.helper_functions import avoid_db_timeout
+from toolkit.settings import ERROR_LOGGER, SHOW_PROGRESS_FLUSH_INTERVAL, SHOW_PROGRESS_FLUSH_PERCENTAGE
+
+
+# Reporters that might still hold unsaved progress, used to flush
+# them before the task gets completed or marked as failed.
+_ACTIVE_REPORTERS = weakref.WeakSet()
+
+
+def flush_task_progress(task_id: int):
+    """
+    Writes the buffered progress of all the reporters of the given task in this process into the database.
+    Reporters in other processes (e.g. the members of a chord) write their progress when they're garbage collected.
+    """
+    for reporter in list(_ACTIVE_REPORTERS):
+        if reporter.task_id == task_id:
+            reporter.flush()
 
 
 class ShowProgress(object):
     """ Show model training progress
+
+    Processed counts are buffered in memory and written into the database
+    at most once per flush interval or after every flush percentage of progress.
+    Whatever is left in the buffer is written when the reporter is garbage collected,
+    reporters that outlive the task they report for have to be flushed by their owner.
     """
 
 
-    def __init__(self, task: Task, multiplier=None):
+    def __init__(self, task: Task, multiplier=None, flush_interval: float = SHOW_PROGRESS_FLUSH_INTERVAL, flush_percentage: float = SHOW_PROGRESS_FLUSH_PERCENTAGE):
         self.n_total = None
         self.n_count = 0
         self.task_id = task.id
         self.multiplier = multiplier
         self.step = ''
 
+        self.flush_interval = flush_interval
+        self.flush_percentage = flush_percentage
+        self._pending_count = 0
+        self._flushed_step = None
+        self._flushed_percentage = 0.0
+        self._flushed_at = monotonic()
+        self._is_running = False
+
+        _ACTIVE_REPORTERS.add(self)
+
 
     def set_total(self, total):
         self.n_count = 0
@@ -30,20 +68,63 @@ class ShowProgress(object):
         if amount == 0:
             return
         self.n_count += amount
-        percentage = 100.0 * (self.n_count / self.n_total)
+        self._pending_count += amount
 
-        self.update_view(percentage)
+        if self._should_flush():
+            self.flush()
+
+
+    def _should_flush(self) -> bool:
+        if monotonic() - self._flushed_at >= self.flush_interval:
+            return True
+        if self.n_total:
+            percentage = 100.0 * (self.n_count / self.n_total)
+            return percentage - self._flushed_percentage >= self.flush_percentage
+        return False
 
 
     @avoid_db_timeout
-    def update_view(self, percentage):
-        task = Task.objects.get(pk=self.task_id)
-        if task.status != task.STATUS_RUNNING:
-            task.update_status(task.STATUS_RUNNING)
-        task.update_progress(percentage, self.step)
+    def flush(self):
+        """Writes the buffered progress into the database with a single UPDATE query."""
+        changes = {}
+        if self._pending_count:
+            changes["num_processed"] = F("num_processed") + self._pending_count
+        if self.step != self._flushed_step:
+            changes["step"] = self.step
+        if not self._is_running:
+            changes["status"] = Task.STATUS_RUNNING
+
+        if changes:
+            Task.objects.filter(pk=self.task_id).update(last_update=now(), **changes)
+
+        self._pending_count = 0
+        self._flushed_step = self.step
+        self._flushed_at = monotonic()
+        self._flushed_percentage = 100.0 * (self.n_count / self.n_total) if self.n_total else 0.0
+        self._is_running = True
+
+
+    def __del__(self):
+        if not self._pending_count:
+            return
+        try:
+            # Progress of finished tasks has already been finalized and their status must not be changed back to running.
+            Task.objects.filter(pk=self.task_id).exclude(status__in=[Task.STATUS_COMPLETED, Task.STATUS_FAILED, Task.STATUS_CANCELLED]).update(
+                last_update=now(),
+                num_processed=F("num_processed") + self._pending_count
+            )
+            self._pending_count = 0
+        except Exception as e:
+            logging.getLogger(ERROR_LOGGER).exception(e)
+
+
+    def update_view(self):
+        """Forces the buffered progress and the current step to be written into the database."""
+        self.flush()
 
 
     @avoid_db_timeout
     def update_errors(self, error: str):
+        self.flush()
         task = Task.objects.get(pk=self.task_id)
         task.add_error(error)
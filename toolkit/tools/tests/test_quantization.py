@@ -0,0 +1,60 @@
+import torch
+from django.test import SimpleTestCase
+
+from toolkit.tools.quantization import get_accuracy, get_model_size, get_quantized_accuracy_delta, quantize_tagger, sample_examples
+
+
+class FakeTagger:
+
+    def __init__(self):
+        torch.manual_seed(0)
+        self.model = torch.nn.Sequential(torch.nn.Linear(16, 32), torch.nn.ReLU(), torch.nn.Linear(32, 2))
+        self.device = torch.device("cpu")
+
+
+class QuantizationTests(SimpleTestCase):
+
+    def test_linear_layers_are_quantized(self):
+        tagger = FakeTagger()
+        inputs = torch.rand(8, 16)
+        with torch.no_grad():
+            full_output = tagger.model(inputs)
+
+        self.assertTrue(quantize_tagger(tagger))
+        self.assertTrue(all(not isinstance(module, torch.nn.Linear) or type(module).__module__.startswith("torch.nn.quantized") for module in tagger.model.modules()))
+        with torch.no_grad():
+            quantized_output = tagger.model(inputs)
+        self.assertTrue(torch.allclose(full_output, quantized_output, atol=0.05))
+
+
+    def test_model_size_includes_packed_weights_of_quantized_layers(self):
+        tagger = FakeTagger()
+        full_size = get_model_size(tagger.model)
+        self.assertEqual(full_size, sum(tensor.numel() * tensor.element_size() for tensor in tagger.model.parameters()))
+
+        quantize_tagger(tagger)
+        # The quantized linear layers have no parameters left, their int8 weights are only in the state dict.
+        self.assertEqual(list(tagger.model.parameters()), [])
+        weights_size = 16 * 32 + 32 * 2
+        self.assertTrue(weights_size < get_model_size(tagger.model) < full_size)
+
+
+    def test_taggers_without_a_model_are_left_alone(self):
+        tagger = object()
+        self.assertFalse(quantize_tagger(tagger))
+
+
+    def test_sample_is_reproducible_and_bounded(self):
+        data = {"true": [f"positive {i}" for i in range(100)], "false": [f"negative {i}" for i in range(5)]}
+        sample = sample_examples(data, 10)
+        self.assertEqual(sample, sample_examples(data, 10))
+        self.assertEqual(len(sample["true"]), 10)
+        self.assertEqual(len(sample["false"]), 5)
+
+
+    def test_accuracy_delta(self):
+        examples = {"true": ["a", "b"], "false": ["c", "d"]}
+        always_true = lambda texts: ["true" for _ in texts]
+        perfect = lambda texts: ["true" if text in ("a", "b") else "false" for text in texts]
+        self.assertEqual(get_accuracy(always_true, examples), 0.5)
+        self.assertEqual(get_quantized_accuracy_delta(full_predict=perfect, quantized_predict=always_true, examples=examples), -0.5)
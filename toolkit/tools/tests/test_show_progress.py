@@ -0,0 +1,60 @@
+from django.test import TestCase
+
+from toolkit.core.task.models import Task
+from toolkit.tools.show_progress import ShowProgress
+
+
+class ShowProgressTests(TestCase):
+
+    def setUp(self):
+        self.task = Task.objects.create(status=Task.STATUS_CREATED, total=1000)
+
+
+    def test_progress_is_buffered_until_the_threshold(self):
+        progress = ShowProgress(self.task, flush_interval=3600, flush_percentage=10)
+        progress.set_total(1000)
+        progress.update_step("scrolling")
+
+        progress.update(50)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.num_processed, 0)
+        self.assertEqual(self.task.status, Task.STATUS_CREATED)
+
+        progress.update(50)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.num_processed, 100)
+        self.assertEqual(self.task.status, Task.STATUS_RUNNING)
+        self.assertEqual(self.task.step, "scrolling")
+
+
+    def test_pending_progress_is_flushed_on_failure(self):
+        progress = ShowProgress(self.task, flush_interval=3600, flush_percentage=10)
+        progress.set_total(1000)
+        progress.update(30)
+
+        self.task.handle_failed_task(Exception("Failure."))
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.num_processed, 30)
+        self.assertEqual(self.task.status, Task.STATUS_FAILED)
+
+
+    def test_pending_progress_is_flushed_when_the_reporter_is_collected(self):
+        progress = ShowProgress(self.task, flush_interval=3600, flush_percentage=10)
+        progress.set_total(1000)
+        progress.update(30)
+        del progress
+
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.num_processed, 30)
+
+
+    def test_collected_reporter_does_not_change_finished_tasks(self):
+        progress = ShowProgress(self.task, flush_interval=3600, flush_percentage=10)
+        progress.set_total(1000)
+        self.task.complete()
+        progress.update(30)
+        del progress
+
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.num_processed, 1000)
+        self.assertEqual(self.task.status, Task.STATUS_COMPLETED)
@@ -0,0 +1,31 @@
+from django.test import SimpleTestCase
+
+from toolkit.elastic.choices import STEMMER_BACKEND_ELASTIC, STEMMER_BACKEND_SNOWBALL
+from toolkit.tools.lemmatizer import ElasticAnalyzer, SnowballStemmer, get_stemmer
+
+
+class SnowballStemmerTests(SimpleTestCase):
+
+    def test_tokenization_follows_the_standard_tokenizer(self):
+        tokens = SnowballStemmer().tokenize_text("Foxes can't jump 1,000.5 metres: U.S.A. <b>bo</b>ld<p>para</p>graph 東京")
+        self.assertEqual(tokens, ["Foxes", "can't", "jump", "1,000.5", "metres", "U.S.A", "bold", "para", "graph", "東", "京"])
+
+
+    def test_case_is_kept_like_in_elasticsearch(self):
+        stemmed = SnowballStemmer().stem_text("Foxes running RUNNING Skies", language="english")
+        self.assertEqual(stemmed, "Fox run RUNNING Ski")
+
+
+    def test_unsupported_languages_fall_back_to_elasticsearch(self):
+        self.assertIsInstance(get_stemmer(language="english", backend=STEMMER_BACKEND_SNOWBALL), SnowballStemmer)
+        self.assertIsInstance(get_stemmer(language="estonian", backend=STEMMER_BACKEND_SNOWBALL), ElasticAnalyzer)
+        self.assertIsInstance(get_stemmer(language="english", backend=STEMMER_BACKEND_ELASTIC), ElasticAnalyzer)
+
+
+    def test_tokens_match_elasticsearch(self):
+        texts = [
+            "The Quick brown foxes JUMPED over the lazy dogs' kennels in 2021.",
+            "<p>Running <b>hurriedly</b>, they couldn't catch the U.S.A. delegation at 10:30.</p>",
+            "Generalizations, nationalities and happily connected relational databases.",
+        ]
+        self.assertEqual(SnowballStemmer().stem_texts(texts, language="english"), ElasticAnalyzer().stem_texts(texts, language="english"))
@@ -7,8 +7,11 @@ import numpy as np
 from gensim import corpora, models, utils
 from gensim.matutils import corpus2csc
 from gensim.parsing.preprocessing import preprocess_string, strip_short, strip_tags
+from scipy import sparse
 from sklearn.cluster import KMeans, MiniBatchKMeans
-from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
+
+from toolkit.topic_analyzer.vector_store import SparseVectorStore
 
 
 class Clustering:
@@ -39,7 +42,7 @@ class Clustering:
         self.tfidf_model = None
         self.lsi_model = None
         self.dictionary = None
-        self.doc_vectors = {}
+        self.doc_vectors = None
 
 
     def to_json(self):
@@ -53,8 +56,7 @@ class Clustering:
             "use_lsi": self.use_lsi,
             "num_topics": self.num_topics,
             "ignore_doc_ids": self.ignore_doc_ids,
-            "clustering_result": self.clustering_result,
-            "doc_vectors": self.doc_vectors
+            "clustering_result": self.clustering_result
         }
 
 
@@ -126,7 +128,7 @@ class Clustering:
 
         for ix, doc in enumerate(self.docs):
             self.clustering_result[int(labels[ix])].append(doc["id"])
-            self.doc_vectors[doc["id"]] = vectors[ix].toarray()[0]
+        self.doc_vectors = vectors.tocsr()
 
 
     def exclude_doc_from_cluster(self, cluster_id, document_id):
@@ -159,10 +161,10 @@ class Clustering:
             pickle.dump({
                 "tfidf_model": self.tfidf_model,
                 "lsi_model": self.lsi_model,
-                "dictionary": self.dictionary,
-                "doc_vectors": self.doc_vectors
+                "dictionary": self.dictionary
             }, f)
 
+        SparseVectorStore.create(SparseVectorStore.get_path(file_path), self.doc_vectors, [doc["id"] for doc in self.docs])
         return True
 
 
@@ -175,25 +177,50 @@ class ClusterContent:
 
     def _get_models(self, models, vectors_filepath):
         if models is None:
-            return self._load_models(vectors_filepath)
+            return self.load_models(vectors_filepath)
         else:
             return models
 
 
-    def _load_models(self, file_path):
+    @staticmethod
+    def load_models(file_path):
+        """
+        Loads the vectorizer models saved during clustering and opens the store of document vectors.
+        Load them once and pass them to every ClusterContent when working with many clusters.
+        """
         with open(file_path, "rb") as f:
             models = pickle.load(f)
+
+        store_path = SparseVectorStore.get_path(file_path)
+        if "doc_vectors" in models or "doc_matrix" in models:
+            ClusterContent._migrate_vectors(file_path, models)
+        models["doc_vectors"] = SparseVectorStore(store_path)
         return models
 
 
-    def _save_updated_models(self):
-        with open(self.vectors_filepath, "wb") as f:
-            pickle.dump(self.models, f)
+    @staticmethod
+    def _migrate_vectors(file_path, models):
+        """ Moves the vectors pickled together with the models by older versions into a vector store."""
+        if "doc_vectors" in models:
+            doc_vectors = models.pop("doc_vectors")
+            doc_ids = list(doc_vectors.keys())
+            matrix = sparse.csr_matrix(np.vstack([doc_vectors[doc_id] for doc_id in doc_ids]))
+        else:
+            matrix = models.pop("doc_matrix")
+            doc_index = models.pop("doc_index")
+            doc_ids = sorted(doc_index, key=doc_index.get)
+            matrix = matrix[[doc_index[doc_id] for doc_id in doc_ids]]
+
+        SparseVectorStore.create(SparseVectorStore.get_path(file_path), matrix, doc_ids)
+
+        with open(file_path, "wb") as f:
+            pickle.dump(models, f)
 
 
     def get_intracluster_similarity(self, new_documents=[], phraser=None):
         if len(new_documents) > 0:
             dictionary = self.models["dictionary"]
+            new_vectors = []
 
             for doc in new_documents:
                 processed_text = Clustering._tokenize(doc["text"], phraser=phraser)
@@ -206,16 +233,16 @@ class ClusterContent:
                     doc_vec = self.models["lsi_model"][doc_vec]
 
                 full_vec = corpus2csc(doc_vec, num_terms=len(dictionary.keys()), num_docs=dictionary.num_docs)
-                full_vec = full_vec.transpose()
-                self.models["doc_vectors"][doc["id"]] = full_vec[0].toarray()[0]
+                new_vectors.append(full_vec.transpose().tocsr()[0])
 
-            self._save_updated_models()
+            # Only the new rows are written, the rest of the store is left untouched.
+            self.models["doc_vectors"].append(sparse.vstack(new_vectors, format="csr"), [doc["id"] for doc in new_documents])
 
         if self.doc_ids:
-            cluster_vectors = []
-            for doc_id in self.doc_ids:
-                cluster_vectors.append(self.models["doc_vectors"][doc_id])
-            similarities = cosine_similarity(cluster_vectors)
-            return np.mean(similarities)
+            # Mean of all the pairwise cosine similarities equals the squared norm
+            # of the sum of the normalized vectors divided by the number of pairs.
+            cluster_vectors = normalize(self.models["doc_vectors"].get_vectors(self.doc_ids))
+            vector_sum = np.asarray(cluster_vectors.sum(axis=0)).ravel()
+            return float(np.dot(vector_sum, vector_sum) / len(self.doc_ids) ** 2)
         else:
             return 0
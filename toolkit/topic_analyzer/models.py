@@ -21,6 +21,7 @@ from toolkit.model_constants import CommonModelMixin
 from toolkit.settings import BASE_DIR, CELERY_LONG_TERM_TASK_QUEUE, ERROR_LOGGER, RELATIVE_MODELS_PATH
 from texta_tools.text_processor import StopWords
 from toolkit.topic_analyzer.choices import CLUSTERING_ALGORITHMS, VECTORIZERS
+from toolkit.topic_analyzer.vector_store import SparseVectorStore
 
 
 class Cluster(models.Model):
@@ -116,6 +117,14 @@ class ClusteringResult(CommonModelMixin):
         return [index.name for index in self.indices.filter(is_open=True)]
 
 
+    def delete_vector_files(self):
+        """Removes the vector model file and the directory of document vectors stored next to it."""
+        if self.vector_model:
+            if os.path.isfile(self.vector_model.path):
+                os.remove(self.vector_model.path)
+            SparseVectorStore.delete(SparseVectorStore.get_path(self.vector_model.path))
+
+
     def train(self):
         # Ensure nothing is saved into the DB if anything within this
         # context manager throws an exception.
@@ -141,8 +150,6 @@ def auto_delete_file_on_delete(sender, instance: ClusteringResult, **kwargs):
 
     """
     try:
-        if instance.vector_model:
-            if os.path.isfile(instance.vector_model.path):
-                os.remove(instance.vector_model.path)
+        instance.delete_vector_files()
     except Exception as e:
         logging.getLogger(ERROR_LOGGER).exception(e)
@@ -31,7 +31,7 @@ def start_clustering_task(clustering_id: int):
     task_object = clustering_obj.tasks.last()
     show_progress = ShowProgress(task_object, multiplier=1)
     show_progress.update_step('starting clustering')
-    show_progress.update_view(0)
+    show_progress.update_view()
 
     return clustering_id
 
@@ -61,7 +61,7 @@ def perform_data_clustering(clustering_id):
         # Removing stopwords, ignored ids while fetching the documents.
         show_progress = ShowProgress(task_object, multiplier=1)
         show_progress.update_step("scrolling data")
-        show_progress.update_view(0)
+        show_progress.update_view()
 
         # load phraser from embedding
         if clustering_model.embedding:
@@ -140,12 +140,15 @@ def save_clustering_results(clustering_result: dict):
     clustering_obj.vector_model.name = vectors_filepath
     clustering_obj.save()
 
+    # Load the document vectors only once for all the clusters.
+    models = ClusterContent.load_models(vectors_filepath)
+
     clusters = []
     for cluster_id, document_ids in clustering_results:
         document_ids_json = json.dumps(document_ids)
 
         sw = Cluster.get_significant_words(indices=indices, document_ids=document_ids, fields=fields, stop_words=stop_words, exclude=significant_words_filter)
-        cluster_content = ClusterContent(document_ids, vectors_filepath=vectors_filepath)
+        cluster_content = ClusterContent(document_ids, models=models, vectors_filepath=vectors_filepath)
 
         label = Cluster.objects.create(
             significant_words=json.dumps(sw),
@@ -0,0 +1,54 @@
+import tempfile
+
+import numpy as np
+from django.test import TestCase
+from scipy import sparse
+
+from toolkit.topic_analyzer.vector_store import SparseVectorStore
+
+
+class SparseVectorStoreTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.matrix = sparse.csr_matrix(np.array([[0, 1, 0, 2], [0, 0, 0, 0], [3, 0, 0, 0]], dtype=np.float32))
+        self.doc_ids = ["a", "b", "c"]
+
+
+    def tearDown(self):
+        SparseVectorStore.delete(self.directory)
+
+
+    def test_stored_vectors_are_read_back(self):
+        SparseVectorStore.create(self.directory, self.matrix, self.doc_ids)
+        store = SparseVectorStore(self.directory)
+        self.assertEqual(store.matrix.shape, (3, 4))
+        self.assertTrue(np.array_equal(store.get_vectors(["c", "a"]).toarray(), self.matrix[[2, 0]].toarray()))
+
+
+    def test_appending_documents_adds_rows(self):
+        store = SparseVectorStore.create(self.directory, self.matrix, self.doc_ids)
+        new_vectors = sparse.csr_matrix(np.array([[0, 0, 5, 0], [1, 1, 1, 1]], dtype=np.float32))
+        store.append(new_vectors, ["d", "a"])
+
+        store = SparseVectorStore(self.directory)
+        self.assertEqual(store.matrix.shape, (5, 4))
+        self.assertTrue(np.array_equal(store.get_vectors(["d"]).toarray(), [[0, 0, 5, 0]]))
+        # Re-added documents point to their newest vector.
+        self.assertTrue(np.array_equal(store.get_vectors(["a"]).toarray(), [[1, 1, 1, 1]]))
+        self.assertTrue(np.array_equal(store.get_vectors(["c"]).toarray(), [[3, 0, 0, 0]]))
+
+
+    def test_appends_through_stale_stores_keep_every_row(self):
+        SparseVectorStore.create(self.directory, self.matrix, self.doc_ids)
+        # Both stores are loaded before either appends, like in two separate workers.
+        first_store = SparseVectorStore(self.directory)
+        second_store = SparseVectorStore(self.directory)
+        first_store.append(sparse.csr_matrix(np.array([[0, 0, 5, 0]], dtype=np.float32)), ["d"])
+        second_store.append(sparse.csr_matrix(np.array([[0, 7, 0, 0], [1, 1, 1, 1]], dtype=np.float32)), ["e", "f"])
+
+        store = SparseVectorStore(self.directory)
+        self.assertEqual(store.matrix.shape, (6, 4))
+        self.assertEqual(list(store.index), ["a", "b", "c", "d", "e", "f"])
+        self.assertTrue(np.array_equal(store.get_vectors(["d", "e", "f"]).toarray(), [[0, 0, 5, 0], [0, 7, 0, 0], [1, 1, 1, 1]]))
+        self.assertTrue(np.array_equal(store.get_vectors(["a", "c"]).toarray(), self.matrix[[0, 2]].toarray()))
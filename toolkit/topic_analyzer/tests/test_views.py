@@ -1,5 +1,6 @@
 # Create your tests here.
 import json
+import os
 
 from django.test import override_settings
 from django.urls import reverse
@@ -12,6 +13,7 @@ from toolkit.helper_functions import reindex_test_dataset
 from toolkit.test_settings import (TEST_FIELD, TEST_VERSION_PREFIX, VERSION_NAMESPACE)
 from toolkit.tools.utils_for_tests import create_test_user, print_output, project_creation
 from toolkit.topic_analyzer.models import Cluster, ClusteringResult
+from toolkit.topic_analyzer.vector_store import SparseVectorStore
 
 
 @override_settings(CELERY_ALWAYS_EAGER=True)
@@ -357,6 +359,30 @@ class TopicAnalyzerTests(APITransactionTestCase):
         print_output("test_cluster_deletion_on_clustering_deletion", 204)
 
 
+    def test_vector_files_are_removed_on_retraining_and_deletion(self):
+        clustering = ClusteringResult.objects.get(pk=self.clustering_id)
+        vector_model_path = clustering.vector_model.path
+        vector_store_path = SparseVectorStore.get_path(vector_model_path)
+        self.assertTrue(os.path.isdir(vector_store_path))
+
+        url = reverse(f"{VERSION_NAMESPACE}:topic_analyzer-retrain", kwargs={"project_pk": self.project.pk, "pk": self.clustering_id})
+        response = self.client.post(url, format="json")
+        print_output("test_vector_files_are_removed_on_retraining_and_deletion:response.data", response.data)
+        self.assertTrue(response.status_code == status.HTTP_200_OK)
+        self.assertFalse(os.path.exists(vector_model_path))
+        self.assertFalse(os.path.exists(vector_store_path))
+
+        clustering.refresh_from_db()
+        vector_model_path = clustering.vector_model.path
+        vector_store_path = SparseVectorStore.get_path(vector_model_path)
+        self.assertTrue(os.path.isdir(vector_store_path))
+        url = reverse(f"{VERSION_NAMESPACE}:topic_analyzer-detail", kwargs={"project_pk": self.project.pk, "pk": self.clustering_id})
+        response = self.client.delete(url)
+        self.assertTrue(response.status_code == status.HTTP_204_NO_CONTENT)
+        self.assertFalse(os.path.exists(vector_model_path))
+        self.assertFalse(os.path.exists(vector_store_path))
+
+
     def test_updating_clustering_instances_stop_words(self):
         stop_words = ["ja", "siis", "kui", "ka"]
         url = reverse(f"{VERSION_NAMESPACE}:topic_analyzer-detail", kwargs={"project_pk": self.project.pk, "pk": self.clustering_id})
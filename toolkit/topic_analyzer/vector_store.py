@@ -0,0 +1,145 @@
+import fcntl
+import json
+import os
+import shutil
+from contextlib import contextmanager
+from typing import List, Tuple
+
+import numpy as np
+from scipy import sparse
+
+
+class SparseVectorStore:
+    """
+    Append-only store of sparse document vectors, kept on the disk in CSR layout.
+
+    The arrays are memory-mapped when the store is opened, so loading it copies nothing
+    into memory and adding documents only appends to the ends of the files.
+    Document ids are stored in the order of the rows, a re-added document id points to its newest row.
+    """
+    DATA_FILE = "data.bin"
+    INDICES_FILE = "indices.bin"
+    INDPTR_FILE = "indptr.bin"
+    IDS_FILE = "ids.txt"
+    META_FILE = "meta.json"
+
+    DATA_DTYPE = np.float32
+    # scipy keeps int32 index arrays as they are, int64 ones would be copied on load.
+    INDEX_DTYPE = np.int32
+
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.matrix = None
+        self.index = {}
+        self._load()
+
+
+    @staticmethod
+    def get_path(model_path: str) -> str:
+        """Returns the directory of the vector store belonging to the clustering model file."""
+        return f"{model_path}_vectors"
+
+
+    @classmethod
+    def create(cls, directory: str, matrix: sparse.spmatrix, doc_ids: List[str]) -> "SparseVectorStore":
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, cls.META_FILE), "w") as f:
+            json.dump({"num_columns": int(matrix.shape[1])}, f)
+
+        np.zeros(1, dtype=cls.INDEX_DTYPE).tofile(os.path.join(directory, cls.INDPTR_FILE))
+        for file_name in (cls.DATA_FILE, cls.INDICES_FILE, cls.IDS_FILE):
+            open(os.path.join(directory, file_name), "wb").close()
+
+        store = cls(directory)
+        store.append(matrix, doc_ids)
+        return store
+
+
+    @staticmethod
+    def delete(directory: str):
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+    def _path(self, file_name: str) -> str:
+        return os.path.join(self.directory, file_name)
+
+
+    def _map(self, file_name: str, dtype) -> np.array:
+        file_path = self._path(file_name)
+        if os.path.getsize(file_path) == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(file_path, dtype=dtype, mode="r")
+
+
+    def _load(self):
+        with open(self._path(self.META_FILE)) as f:
+            num_columns = json.load(f)["num_columns"]
+        with open(self._path(self.IDS_FILE), encoding="utf8") as f:
+            doc_ids = f.read().splitlines()
+
+        # Ids are written last, so rows of an interrupted append are ignored.
+        num_rows = len(doc_ids)
+        indptr = self._map(self.INDPTR_FILE, self.INDEX_DTYPE)[:num_rows + 1]
+        num_values = int(indptr[-1])
+        data = self._map(self.DATA_FILE, self.DATA_DTYPE)[:num_values]
+        indices = self._map(self.INDICES_FILE, self.INDEX_DTYPE)[:num_values]
+
+        self.matrix = sparse.csr_matrix((data, indices, indptr), shape=(num_rows, num_columns), copy=False)
+        self.index = {doc_id: row for row, doc_id in enumerate(doc_ids)}
+
+
+    @contextmanager
+    def _lock(self):
+        """Holds an exclusive lock on the directory of the store, so only one process appends at a time."""
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+
+    def _get_stored_size(self) -> Tuple[int, int, int]:
+        """
+        Reads the size of the completely written part of the store from the disk,
+        as other processes might have appended to it since this one loaded it.
+        :return: Amount of rows, amount of values and the size of the ids file in bytes.
+        """
+        with open(self._path(self.IDS_FILE), "rb") as f:
+            content = f.read()
+        ids_size = content.rfind(b"\n") + 1
+        num_rows = content.count(b"\n", 0, ids_size)
+        indptr = np.fromfile(self._path(self.INDPTR_FILE), dtype=self.INDEX_DTYPE, count=num_rows + 1)
+        return num_rows, int(indptr[num_rows]), ids_size
+
+
+    def append(self, matrix: sparse.spmatrix, doc_ids: List[str]):
+        """Appends the rows of the matrix as the vectors of the given documents."""
+        matrix = sparse.csr_matrix(matrix, dtype=self.DATA_DTYPE)
+        matrix.sort_indices()
+
+        with self._lock():
+            num_rows, offset, ids_size = self._get_stored_size()
+
+            # Drop whatever an interrupted append might have left behind.
+            os.truncate(self._path(self.DATA_FILE), offset * np.dtype(self.DATA_DTYPE).itemsize)
+            os.truncate(self._path(self.INDICES_FILE), offset * np.dtype(self.INDEX_DTYPE).itemsize)
+            os.truncate(self._path(self.INDPTR_FILE), (num_rows + 1) * np.dtype(self.INDEX_DTYPE).itemsize)
+            os.truncate(self._path(self.IDS_FILE), ids_size)
+
+            with open(self._path(self.DATA_FILE), "ab") as f:
+                f.write(matrix.data.astype(self.DATA_DTYPE).tobytes())
+            with open(self._path(self.INDICES_FILE), "ab") as f:
+                f.write(matrix.indices.astype(self.INDEX_DTYPE).tobytes())
+            with open(self._path(self.INDPTR_FILE), "ab") as f:
+                f.write((matrix.indptr[1:] + offset).astype(self.INDEX_DTYPE).tobytes())
+            with open(self._path(self.IDS_FILE), "a", encoding="utf8") as f:
+                f.writelines(f"{doc_id}\n" for doc_id in doc_ids)
+
+        self._load()
+
+
+    def get_vectors(self, doc_ids: List[str]) -> sparse.csr_matrix:
+        return self.matrix[[self.index[doc_id] for doc_id in doc_ids]]
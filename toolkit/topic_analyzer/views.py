@@ -1,6 +1,5 @@
 # Create your views here.
 import json
-import pathlib
 from typing import List
 
 import rest_framework.filters as drf_filters
@@ -523,9 +522,8 @@ class TopicAnalyzerViewset(viewsets.ModelViewSet, BulkDelete):
     @action(detail=True, methods=["post"], serializer_class=ClusteringSerializer)
     def retrain(self, *args, **kwargs):
         clustering_obj = ClusteringResult.objects.get(pk=kwargs["pk"])
-        vector_file = pathlib.Path(clustering_obj.vector_model.path)  # Delete the existing vectorfile as a new one will be generated.
-        if vector_file.exists():
-            vector_file.unlink()
+        # Delete the existing vector files as new ones will be generated.
+        clustering_obj.delete_vector_files()
         clustering_obj.train()
         return Response({"message": f"Started re-clustering '{clustering_obj.description}' cluster set! "})
 
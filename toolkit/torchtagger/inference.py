@@ -0,0 +1,125 @@
+import math
+from typing import Callable, Dict, List, Optional, Union
+
+import torch
+from texta_torch_tagger.models.models import RCNN, TextRNN, fastText
+from texta_torch_tagger.tagger import TorchTagger
+from torch.nn import functional as F
+from torch.nn.utils.rnn import pack_padded_sequence, pad_packed_sequence
+
+from toolkit.tools.quantization import get_model_size
+
+
+def get_loaded_size(tagger: TorchTagger) -> int:
+    """Measures the memory imprint of the loaded model by the size of its tensors, including the packed weights of quantized layers."""
+    model = getattr(tagger, "model", None)
+    if model is None:
+        return 0
+    return get_model_size(model)
+
+
+def supports_batching(tagger: TorchTagger) -> bool:
+    text_field = getattr(tagger, "text_field", None)
+    return getattr(tagger, "model", None) is not None and hasattr(tagger, "text_processor") and hasattr(text_field, "preprocess") and hasattr(text_field, "process") and bool(getattr(tagger, "label_reverse_index", None))
+
+
+def get_label(tagger: TorchTagger, label_index: int) -> str:
+    # Label indices are integers in freshly trained taggers and strings in the ones loaded from JSON.
+    label_reverse_index = tagger.label_reverse_index
+    return label_reverse_index.get(label_index, label_reverse_index.get(str(label_index)))
+
+
+def _forward_fasttext(model: fastText, x: torch.Tensor, lengths: torch.Tensor) -> torch.Tensor:
+    # Mean over the embeddings of the actual tokens only, which are gathered into one flat sequence per batch.
+    mask = torch.arange(x.shape[0], device=x.device).unsqueeze(1) < lengths.unsqueeze(0)
+    tokens = x.t()[mask.t()]
+    offsets = torch.cumsum(lengths, dim=0) - lengths
+    mean = F.embedding_bag(tokens, model.embeddings.weight, offsets, mode="mean")
+    return model.softmax(model.fc2(model.fc1(mean)))
+
+
+def _forward_text_rnn(model: TextRNN, x: torch.Tensor, lengths: torch.Tensor) -> torch.Tensor:
+    # The final hidden states of a packed sequence are taken at the last actual token of every text.
+    packed = pack_padded_sequence(model.embeddings(x), lengths.cpu(), enforce_sorted=False)
+    _, (h_n, _) = model.lstm(packed)
+    final_feature_map = model.dropout(h_n)
+    final_feature_map = torch.cat([final_feature_map[i, :, :] for i in range(final_feature_map.shape[0])], dim=1)
+    return model.softmax(model.fc(final_feature_map))
+
+
+def _forward_rcnn(model: RCNN, x: torch.Tensor, lengths: torch.Tensor) -> torch.Tensor:
+    # The backward direction of the LSTM has to start from the last actual token and padding is left out of the max-pooling.
+    embedded = model.embeddings(x)
+    packed = pack_padded_sequence(embedded, lengths.cpu(), enforce_sorted=False)
+    lstm_out, _ = model.lstm(packed)
+    lstm_out, _ = pad_packed_sequence(lstm_out, total_length=x.shape[0])
+    linear_output = model.tanh(model.W(torch.cat([lstm_out, embedded], 2)))
+    mask = (torch.arange(x.shape[0], device=x.device).unsqueeze(1) < lengths.unsqueeze(0)).unsqueeze(2)
+    max_out_features = linear_output.masked_fill(~mask, float("-inf")).max(dim=0).values
+    return model.softmax(model.fc(model.dropout(max_out_features)))
+
+
+MASKED_FORWARDS = {
+    fastText: _forward_fasttext,
+    TextRNN: _forward_text_rnn,
+    RCNN: _forward_rcnn,
+}
+
+
+def _get_masked_forward(model: torch.nn.Module) -> Optional[Callable[[torch.nn.Module, torch.Tensor, torch.Tensor], torch.Tensor]]:
+    for model_class, forward in MASKED_FORWARDS.items():
+        if isinstance(model, model_class):
+            return forward
+    return None
+
+
+def _get_sequence_length(text_field, tokens: List[str], padded_length: int) -> int:
+    """Amount of positions in the padded batch that belong to the text, including the init and eos tokens of the field."""
+    # Fields with a fixed length are padded the same way in TorchTagger.tag_text, so nothing is masked out.
+    if text_field.fix_length:
+        return padded_length
+    return len(tokens) + (text_field.init_token is not None) + (text_field.eos_token is not None)
+
+
+def tag_texts(tagger: TorchTagger, texts: List[str], batch_size: int) -> List[Dict[str, Union[str, float]]]:
+    """
+    Predicts the texts in batches, returning the same results as TorchTagger.tag_text in the order of the input texts.
+    The forward passes of the architectures (fastText, TextRNN, RCNN) don't mask out padding, so they're
+    rerun on the layers of the model with the padding left out of the pooling and the LSTMs.
+    Texts are sorted by their length beforehand to keep the padding in every batch small.
+    """
+    forward = _get_masked_forward(getattr(tagger, "model", None))
+    if not supports_batching(tagger) or forward is None:
+        return [tagger.tag_text(text) for text in texts]
+
+    model = tagger.model
+    model.eval()
+    device = next(model.parameters()).device
+    text_field = tagger.text_field
+
+    # Tokenized the same way as in TorchTagger.tag_text.
+    tokenized = [text_field.preprocess(tagger.text_processor.process(text)) for text in texts]
+    results = [None] * len(texts)
+    indices = []
+    for i, tokens in enumerate(tokenized):
+        # Empty texts can't be packed and are left to the tagger itself.
+        if tokens:
+            indices.append(i)
+        else:
+            results[i] = tagger.tag_text(texts[i])
+    indices.sort(key=lambda i: len(tokenized[i]))
+
+    for start in range(0, len(indices), batch_size):
+        bucket = indices[start:start + batch_size]
+        batch = text_field.process([tokenized[i] for i in bucket])
+        # Fields with include_lengths return the lengths alongside the tensor.
+        if isinstance(batch, tuple):
+            batch = batch[0]
+        lengths = torch.tensor([_get_sequence_length(text_field, tokenized[i], batch.shape[0]) for i in bucket], device=device)
+        with torch.no_grad():
+            log_probabilities = forward(model, batch.to(device), lengths)
+        max_log_probabilities, label_indices = log_probabilities.max(dim=1)
+
+        for i, log_probability, label_index in zip(bucket, max_log_probabilities.tolist(), label_indices.tolist()):
+            results[i] = {"prediction": get_label(tagger, label_index), "probability": math.exp(log_probability)}
+    return results
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.28 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('torchtagger', '0012_reformat_tasks_and_common_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='torchtagger',
+            name='use_cpu_fast_inference',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='torchtagger',
+            name='quantized_accuracy_delta',
+            field=models.FloatField(default=None, null=True),
+        ),
+    ]
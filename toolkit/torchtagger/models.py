@@ -5,8 +5,9 @@ import pathlib
 import secrets
 import tempfile
 import zipfile
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Union
 
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core import serializers
 from django.db import models, transaction
@@ -24,7 +25,13 @@ from toolkit.elastic.tools.feedback import Feedback
 from toolkit.embedding.models import Embedding
 from toolkit.model_constants import CommonModelMixin, FavoriteModelMixin
 from toolkit.settings import BASE_DIR, CELERY_LONG_TERM_TASK_QUEUE, RELATIVE_MODELS_PATH
+from toolkit.tools.model_cache import ModelCache, get_file_mtime, get_file_size
+from toolkit.tools.quantization import get_quantized_accuracy_delta, quantize_tagger, sample_examples
 from toolkit.torchtagger import choices
+from toolkit.torchtagger.inference import get_loaded_size, tag_texts
+
+
+TORCHTAGGER_CACHE = ModelCache("torchtagger", max_items=settings.TORCHTAGGER_CACHE_MAX_ITEMS, max_bytes=settings.TORCHTAGGER_CACHE_MAX_BYTES)
 
 
 class TorchTagger(FavoriteModelMixin, CommonModelMixin):
@@ -54,6 +61,7 @@ class TorchTagger(FavoriteModelMixin, CommonModelMixin):
     balance_to_max_limit = models.BooleanField(default=choices.DEFAULT_BALANCE_TO_MAX_LIMIT)
 
     num_examples = models.TextField(default="{}", null=True)
+    use_cpu_fast_inference = models.BooleanField(default=False)
     classes = models.TextField(default=json.dumps([]))
 
     # RESULTS
@@ -64,6 +72,8 @@ class TorchTagger(FavoriteModelMixin, CommonModelMixin):
     precision = models.FloatField(default=None, null=True)
     recall = models.FloatField(default=None, null=True)
     f1_score = models.FloatField(default=None, null=True)
+    # Accuracy of the quantized CPU model minus the accuracy of the full precision one, measured on training examples.
+    quantized_accuracy_delta = models.FloatField(default=None, null=True)
     confusion_matrix = models.TextField(default="[]", null=True, blank=True)
     model = models.FileField(null=True, verbose_name='', default=None)
     plot = models.FileField(upload_to='data/media', null=True, verbose_name='')
@@ -207,17 +217,60 @@ class TorchTagger(FavoriteModelMixin, CommonModelMixin):
         return {"plot": self.plot.path, "model": self.model.path}
 
 
-    def load_tagger(self):
-        """Load tagger from disc."""
+    def load_tagger(self, quantize: Optional[bool] = None):
+        """
+        Load tagger from disc.
+        :param quantize: Whether to quantize the model for fast CPU inference, defaults to the setting of the tagger.
+        """
+        quantize = self.use_cpu_fast_inference if quantize is None else quantize
         # load embedding & phraser
         embedding = W2VEmbedding()
         embedding.load_django(self.embedding)
         # retrieve model
         tagger = TextTorchTagger(embedding)
         tagger.load_django(self)
+        if quantize:
+            quantize_tagger(tagger)
         return tagger
 
 
+    def load_cached_tagger(self):
+        """
+        Loading tagger together with its embedding from the per-process cache, falls back to the disc on a cache miss.
+        The cache key contains the model file and its modification time, so retrained models are never served from the cache.
+        """
+        model_path = self.model.path if self.model else None
+        cache_key = (self.pk, model_path, get_file_mtime(model_path), self.use_cpu_fast_inference)
+        return TORCHTAGGER_CACHE.get_or_load(cache_key, loader=self.load_tagger, size=self.get_loaded_size)
+
+
+    def get_loaded_size(self, tagger: TextTorchTagger) -> int:
+        embedding_path = self.embedding.embedding_model.path
+        return get_loaded_size(tagger) + get_file_size(embedding_path, *Embedding.get_loaded_file_names(embedding_path))
+
+
+    def apply_loaded_tagger_to_texts(self, tagger: TextTorchTagger, texts: List[str], batch_size: int = settings.TORCHTAGGER_INFERENCE_BATCH_SIZE):
+        """Predict a list of texts with loaded tagger in batches of equally long texts."""
+        tagger_results = tag_texts(tagger, texts, batch_size=batch_size)
+        return [{'probability': result['probability'], 'tagger_id': self.pk, 'result': result['prediction']} for result in tagger_results]
+
+
+    def evaluate_quantization(self, data: Dict[str, List[str]]) -> float:
+        """
+        Compares the accuracy of the quantized tagger against the full precision one on a sample of the given examples.
+        The examples are the ones the tagger was trained on, so the delta shows how much quantization changes
+        the predictions, not how accurate either model is on unseen documents.
+        """
+        examples = sample_examples(data, settings.QUANTIZATION_EVALUATION_SAMPLE_SIZE)
+        full_tagger = self.load_tagger(quantize=False)
+        quantized_tagger = self.load_tagger(quantize=True)
+        return get_quantized_accuracy_delta(
+            full_predict=lambda texts: [prediction["result"] for prediction in self.apply_loaded_tagger_to_texts(full_tagger, texts)],
+            quantized_predict=lambda texts: [prediction["result"] for prediction in self.apply_loaded_tagger_to_texts(quantized_tagger, texts)],
+            examples=examples
+        )
+
+
     def apply_loaded_tagger(self, tagger: TextTorchTagger, tagger_input: Union[str, Dict], input_type: str = 'text', feedback: bool = False):
         """Predict with loaded tagger."""
         # tag text
@@ -247,6 +300,8 @@ def auto_delete_torchtagger_on_delete(sender, instance: TorchTagger, **kwargs):
     Delete resources on the file-system upon TorchTagger deletion.
     Triggered on individual model object and queryset TorchTagger deletion.
     """
+    TORCHTAGGER_CACHE.invalidate(instance.pk)
+
     if instance.model:
         if os.path.isfile(instance.model.path):
             os.remove(instance.model.path)
@@ -4,7 +4,7 @@ from rest_framework import serializers
 from texta_elastic.searcher import EMPTY_QUERY
 
 from toolkit.embedding.models import Embedding
-from toolkit.serializer_constants import (CommonModelSerializerMixin, ElasticScrollMixIn, FavoriteModelSerializerMixin, FieldParseSerializer, IndicesSerializerMixin, ProjectFilteredPrimaryKeyRelatedField, ProjectResourceUrlSerializer)
+from toolkit.serializer_constants import (CPU_FAST_INFERENCE_HELPTEXT, CommonModelSerializerMixin, ElasticScrollMixIn, FavoriteModelSerializerMixin, FieldParseSerializer, IndicesSerializerMixin, ProjectFilteredPrimaryKeyRelatedField, ProjectResourceUrlSerializer)
 from toolkit.torchtagger import choices
 from toolkit.torchtagger.models import TorchTagger
 from toolkit.validator_constants import validate_pos_label
@@ -36,6 +36,7 @@ class TorchTaggerSerializer(FieldParseSerializer, serializers.ModelSerializer, C
     minimum_sample_size = serializers.IntegerField(default=choices.DEFAULT_MIN_SAMPLE_SIZE, required=False)
     num_epochs = serializers.IntegerField(default=choices.DEFAULT_NUM_EPOCHS, required=False)
     embedding = ProjectFilteredPrimaryKeyRelatedField(queryset=Embedding.objects, many=False, read_only=False, required=True, help_text=f'Embedding to use, usage mandatory.')
+    use_cpu_fast_inference = serializers.BooleanField(default=False, required=False, help_text=CPU_FAST_INFERENCE_HELPTEXT)
 
     balance = serializers.BooleanField(default=choices.DEFAULT_BALANCE, required=False, help_text=f'Balance sample sizes of different classes. Only applicable for multiclass taggers. Default = {choices.DEFAULT_BALANCE}')
     use_sentence_shuffle = serializers.BooleanField(default=choices.DEFAULT_USE_SENTENCE_SHUFFLE, required=False, help_text=f'Shuffle sentences in added examples. NB! Only applicable for multiclass taggers with balance=True. Default = {choices.DEFAULT_USE_SENTENCE_SHUFFLE}')
@@ -55,8 +56,8 @@ class TorchTaggerSerializer(FieldParseSerializer, serializers.ModelSerializer, C
     class Meta:
         model = TorchTagger
         fields = (
-            'url', 'author', 'id', 'description', 'query', 'fields', 'embedding', 'f1_score', 'precision', 'recall', 'accuracy',
+            'url', 'author', 'id', 'description', 'query', 'fields', 'embedding', 'use_cpu_fast_inference', 'quantized_accuracy_delta', 'f1_score', 'precision', 'recall', 'accuracy',
             'model_architecture', 'maximum_sample_size', 'minimum_sample_size', 'is_favorited', 'num_epochs', 'plot', 'tasks', 'fact_name', 'indices', 'confusion_matrix', 'num_examples', 'balance', 'use_sentence_shuffle', 'balance_to_max_limit', 'pos_label', 'classes'
         )
-        read_only_fields = ('project', 'fields', 'f1_score', 'precision', 'recall', 'accuracy', 'plot', 'task', 'confusion_matrix', 'num_examples', 'classes')
+        read_only_fields = ('project', 'fields', 'f1_score', 'precision', 'recall', 'accuracy', 'quantized_accuracy_delta', 'plot', 'task', 'confusion_matrix', 'num_examples', 'classes')
         fields_to_parse = ['fields', 'classes']
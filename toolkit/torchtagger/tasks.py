@@ -3,6 +3,8 @@ import logging
 import os
 import pathlib
 import secrets
+import time
+from collections import defaultdict
 from typing import Dict, List, Union
 
 from celery.decorators import task
@@ -17,10 +19,10 @@ from texta_torch_tagger.tagger import TorchTagger
 from toolkit.base_tasks import TransactionAwareTask
 from toolkit.elastic.tools.data_sample import DataSample
 from toolkit.helper_functions import get_indices_from_object
-from toolkit.settings import CELERY_LONG_TERM_TASK_QUEUE, ERROR_LOGGER, INFO_LOGGER, RELATIVE_MODELS_PATH
+from toolkit.settings import CELERY_LONG_TERM_TASK_QUEUE, ERROR_LOGGER, INFO_LOGGER, RELATIVE_MODELS_PATH, TORCHTAGGER_INFERENCE_BATCH_SIZE
 from toolkit.tools.plots import create_tagger_plot
 from toolkit.tools.show_progress import ShowProgress
-from toolkit.torchtagger.models import TorchTagger as TorchTaggerObject
+from toolkit.torchtagger.models import TORCHTAGGER_CACHE, TorchTagger as TorchTaggerObject
 
 
 @task(name="train_torchtagger", base=TransactionAwareTask, queue=CELERY_LONG_TERM_TASK_QUEUE)
@@ -53,7 +55,7 @@ def train_torchtagger(tagger_id, testing=False):
             balance_to_max_limit=tagger_object.balance_to_max_limit
         )
         show_progress.update_step('training')
-        show_progress.update_view(0.0)
+        show_progress.update_view()
 
         # get num examples and save to model
         num_examples = {k: len(v) for k, v in data_sample.data.items()}
@@ -77,6 +79,12 @@ def train_torchtagger(tagger_id, testing=False):
 
         # set tagger location
         tagger_object.model.name = tagger_path
+        # report how much accuracy the quantized CPU model loses
+        if tagger_object.use_cpu_fast_inference:
+            show_progress.update_step('evaluating quantized model')
+            tagger_object.quantized_accuracy_delta = tagger_object.evaluate_quantization(data_sample.data)
+        else:
+            tagger_object.quantized_accuracy_delta = None
         # save tagger plot
         report_dict = report.to_dict()
         tagger_object.plot.save(f'{secrets.token_hex(15)}.png', create_tagger_plot(report_dict), save=False)
@@ -94,6 +102,8 @@ def train_torchtagger(tagger_id, testing=False):
 
         # save tagger object
         tagger_object.save()
+        # free the memory of the previous version in this worker
+        TORCHTAGGER_CACHE.invalidate(tagger_object.pk)
         # declare the job done
         task_object.complete()
 
@@ -110,9 +120,9 @@ def train_torchtagger(tagger_id, testing=False):
 
 
 def apply_tagger(tagger_object: TorchTaggerObject, tagger_input: Union[str, Dict], input_type: str = 'text', feedback: bool = False):
-    """Load tagger from the disc and predict with it. Wraps function load_tagger and apply_loaded_tagger."""
+    """Load tagger from the per-process cache or the disc and predict with it. Wraps function load_cached_tagger and apply_loaded_tagger."""
     # Load tagger
-    tagger = tagger_object.load_tagger()
+    tagger = tagger_object.load_cached_tagger()
     # Predict with the loaded tagger
     prediction = tagger_object.apply_loaded_tagger(tagger, tagger_input, input_type, feedback)
     return prediction
@@ -134,31 +144,48 @@ def to_texta_facts(tagger_result: List[Dict[str, Union[str, int, bool]]], field:
     return [new_fact]
 
 
-def update_generator(generator: ElasticSearcher, ec: ElasticCore, fields: List[str], fact_name: str, fact_value: str, tagger_object: TorchTaggerObject, tagger: TorchTagger = None):
+def update_generator(generator: ElasticSearcher, ec: ElasticCore, fields: List[str], fact_name: str, fact_value: str, tagger_object: TorchTaggerObject, tagger: TorchTagger = None,
+                     batch_size: int = TORCHTAGGER_INFERENCE_BATCH_SIZE, progress: ShowProgress = None):
+    start_time = time.monotonic()
+    tagged_documents = 0
+
     for i, scroll_batch in enumerate(generator):
         logging.getLogger(INFO_LOGGER).info(f"Appyling Torch Tagger with ID {tagger_object.id} to batch {i + 1}...")
-        for raw_doc in scroll_batch:
-            hit = raw_doc["_source"]
-            flat_hit = ec.flatten(hit)
-            existing_facts = hit.get("texta_facts", [])
 
+        # Collect the texts of the whole scroll batch so they could be tagged in batches.
+        texts, text_locations = [], []
+        for document_index, raw_doc in enumerate(scroll_batch):
+            flat_hit = ec.flatten(raw_doc["_source"])
             for field in fields:
                 text = flat_hit.get(field, None)
                 if text and isinstance(text, str):
+                    texts.append(text)
+                    text_locations.append((document_index, field, text))
+
+        results = tagger_object.apply_loaded_tagger_to_texts(tagger, texts, batch_size=batch_size)
+
+        new_facts = defaultdict(list)
+        for (document_index, field, text), result in zip(text_locations, results):
+            # If tagger is binary and fact value is not specified by the user, use tagger description as fact value
+            if result["result"] in ["true", "false"]:
+                if not fact_value:
+                    fact_value = tagger_object.description
 
-                    result = tagger_object.apply_loaded_tagger(tagger, text, input_type="text", feedback=False)
+            # For multitag, use the prediction as fact value
+            else:
+                fact_value = result["result"]
 
-                    # If tagger is binary and fact value is not specified by the user, use tagger description as fact value
-                    if result["result"] in ["true", "false"]:
-                        if not fact_value:
-                            fact_value = tagger_object.description
+            new_facts[document_index].extend(to_texta_facts(result, field, fact_name, fact_value, text))
 
-                    # For multitag, use the prediction as fact value
-                    else:
-                        fact_value = result["result"]
+        tagged_documents += len(scroll_batch)
+        if progress:
+            # Written into the task together with the progress of the next scroll batch.
+            elapsed = time.monotonic() - start_time
+            progress.update_step(f"tagging ({tagged_documents / elapsed if elapsed else 0:.1f} docs/s)")
 
-                    new_facts = to_texta_facts(result, field, fact_name, fact_value, text)
-                    existing_facts.extend(new_facts)
+        for document_index, raw_doc in enumerate(scroll_batch):
+            existing_facts = raw_doc["_source"].get("texta_facts", [])
+            existing_facts.extend(new_facts[document_index])
 
             if existing_facts:
                 # Remove duplicates to avoid adding the same facts with repetitive use.
@@ -196,7 +223,7 @@ def apply_tagger_to_index(object_id: int, indices: List[str], fields: List[str],
             scroll_size=bulk_size
         )
 
-        actions = update_generator(generator=searcher, ec=ec, fields=fields, fact_name=fact_name, fact_value=fact_value, tagger_object=tagger_object, tagger=tagger)
+        actions = update_generator(generator=searcher, ec=ec, fields=fields, fact_name=fact_name, fact_value=fact_value, tagger_object=tagger_object, tagger=tagger, progress=progress)
         for success, info in streaming_bulk(client=ec.es, actions=actions, refresh="wait_for", chunk_size=bulk_size, max_chunk_bytes=max_chunk_bytes, max_retries=3):
             if not success:
                 logging.getLogger(ERROR_LOGGER).exception(json.dumps(info))
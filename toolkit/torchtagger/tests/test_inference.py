@@ -0,0 +1,74 @@
+import random
+from time import time
+from types import SimpleNamespace
+
+import torch
+from django.test import SimpleTestCase
+from texta_torch_tagger.tagger import TORCH_MODELS, TorchTagger
+from torchtext import data
+
+from toolkit.tools.utils_for_tests import print_output
+from toolkit.torchtagger.inference import tag_texts
+
+
+class TorchTaggerInferenceTests(SimpleTestCase):
+    TEXTS = [
+        "politsei pidas kinni varga",
+        "kohus",
+        "varas põgenes politsei eest",
+        "kohus mõistis varga süüdi ja saatis ta vangi",
+        "politsei",
+        "tundmatu sõna",
+        "kohus mõistis süüdi",
+    ]
+
+
+    def _get_tagger(self, model_arch: str, vocab_texts=None) -> TorchTagger:
+        torch.manual_seed(0)
+        tagger = TorchTagger(SimpleNamespace(phraser=None), model_arch=model_arch)
+        text_field = data.Field(sequential=True, tokenize=tagger.tokenizer, lower=True)
+        text_field.build_vocab([text.split(" ") for text in (vocab_texts or self.TEXTS[:-2])])
+        tagger.text_field = text_field
+        tagger.config.output_size = 2
+        word_embeddings = torch.randn(len(text_field.vocab), tagger.config.embed_size)
+        tagger.model = tagger.model_arch(tagger.config, len(text_field.vocab), word_embeddings, tagger.evaluate_model)
+        tagger.model.eval()
+        tagger.label_reverse_index = {0: "false", 1: "true"}
+        return tagger
+
+
+    def test_batched_results_match_tag_text_for_every_architecture(self):
+        for model_arch in TORCH_MODELS:
+            with self.subTest(model_arch=model_arch):
+                tagger = self._get_tagger(model_arch)
+                with torch.no_grad():
+                    expected = [tagger.tag_text(text) for text in self.TEXTS]
+
+                for batch_size in (1, 2, 64):
+                    results = tag_texts(tagger, self.TEXTS, batch_size=batch_size)
+                    self.assertEqual([result["prediction"] for result in results], [result["prediction"] for result in expected])
+                    for result, expected_result in zip(results, expected):
+                        self.assertAlmostEqual(result["probability"], expected_result["probability"], places=5)
+
+
+    def test_batched_inference_benchmark(self):
+        """Compares the throughput of batched inference against tagging texts of varying length one by one on the CPU."""
+        random.seed(0)
+        words = [f"sõna{i}" for i in range(1000)]
+        texts = [" ".join(random.choices(words, k=random.randint(1, 100))) for _ in range(300)]
+        for model_arch in TORCH_MODELS:
+            with self.subTest(model_arch=model_arch):
+                tagger = self._get_tagger(model_arch, vocab_texts=texts)
+                start = time()
+                with torch.no_grad():
+                    single_results = [tagger.tag_text(text) for text in texts]
+                single_duration = time() - start
+
+                start = time()
+                batched_results = tag_texts(tagger, texts, batch_size=64)
+                batched_duration = time() - start
+
+                print_output(f'test_torch_tagger_batched_inference {model_arch} docs/s (single, batched):', (len(texts) / single_duration, len(texts) / batched_duration))
+                self.assertEqual([result["prediction"] for result in batched_results], [result["prediction"] for result in single_results])
+                for batched_result, single_result in zip(batched_results, single_results):
+                    self.assertAlmostEqual(batched_result["probability"], single_result["probability"], places=5)
@@ -1,16 +1,120 @@
+import base64
+import hashlib
+import json
 import logging
+import time
+from typing import Optional
 
+import redis
 import requests
 from django.contrib.auth.models import User
 from django.utils.translation import gettext_lazy as _
 from rest_framework import authentication, exceptions
 from rest_framework.authentication import get_authorization_header
 
-from toolkit.settings import INFO_LOGGER, UAA_USERINFO_URI
+from toolkit.settings import BROKER_URL, ERROR_LOGGER, INFO_LOGGER, UAA_TOKEN_CACHE_MAX_ITEMS, UAA_TOKEN_CACHE_TTL, UAA_TOKEN_CACHE_USE_REDIS, UAA_TOKEN_NEGATIVE_CACHE_TTL, UAA_USERINFO_URI
+from toolkit.tools.model_cache import ModelCache
 
 
 REQUESTS_TIMEOUT_IN_SECONDS = 10
 
+# Results of the token validation, keyed by the hash of the token.
+TOKEN_CACHE = ModelCache("uaa_token", max_items=UAA_TOKEN_CACHE_MAX_ITEMS, max_bytes=0)
+# Primary keys of the users the valid tokens belong to, keyed by the hash of the token.
+USER_CACHE = ModelCache("uaa_user", max_items=UAA_TOKEN_CACHE_MAX_ITEMS, max_bytes=0)
+REDIS_KEY_PREFIX = "texta:uaa:token:"
+
+_redis: Optional[redis.Redis] = None
+
+
+def get_token_hash(bearer_token: str) -> str:
+    return hashlib.sha256(bearer_token.encode("utf8")).hexdigest()
+
+
+def get_token_expiry(bearer_token: str) -> Optional[float]:
+    """Reads the expiry timestamp from the payload of a JWT access token without verifying it, UAA does that."""
+    try:
+        payload = bearer_token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def get_token_ttl(bearer_token: str, is_valid: bool) -> float:
+    if not is_valid:
+        return UAA_TOKEN_NEGATIVE_CACHE_TTL
+
+    ttl = UAA_TOKEN_CACHE_TTL
+    expiry = get_token_expiry(bearer_token)
+    if expiry is not None:
+        ttl = min(ttl, expiry - time.time())
+    return ttl
+
+
+class CachedTokenValidator:
+    """
+    Remembers the results of validating bearer tokens against UAA, both in the memory of the
+    process and optionally in Redis to share them between the processes.
+    Valid tokens are kept until they expire (but no longer than UAA_TOKEN_CACHE_TTL),
+    invalid ones for UAA_TOKEN_NEGATIVE_CACHE_TTL seconds.
+    """
+
+
+    def __init__(self, validate, use_redis: bool = UAA_TOKEN_CACHE_USE_REDIS):
+        self.validate = validate
+        self.use_redis = use_redis
+
+
+    def __call__(self, bearer_token: str):
+        key = (get_token_hash(bearer_token),)
+        result = TOKEN_CACHE.get(key)
+        if result is None:
+            result = self._get_shared(key[0])
+        if result is None:
+            result = self.validate(bearer_token)
+            self._put(key, result, get_token_ttl(bearer_token, is_valid=result[0] is not None))
+        return result
+
+
+    def _put(self, key: tuple, result: tuple, ttl: float):
+        if ttl <= 0:
+            return
+        TOKEN_CACHE.put(key, result, ttl=ttl)
+        if self.use_redis:
+            try:
+                self._get_redis().set(REDIS_KEY_PREFIX + key[0], json.dumps(result), ex=max(int(ttl), 1))
+            except redis.RedisError as e:
+                logging.getLogger(ERROR_LOGGER).exception(e)
+
+
+    def _get_shared(self, token_hash: str) -> Optional[tuple]:
+        if not self.use_redis:
+            return None
+        try:
+            pipeline = self._get_redis().pipeline()
+            pipeline.get(REDIS_KEY_PREFIX + token_hash)
+            pipeline.ttl(REDIS_KEY_PREFIX + token_hash)
+            value, ttl = pipeline.execute()
+        except redis.RedisError as e:
+            logging.getLogger(ERROR_LOGGER).exception(e)
+            return None
+
+        if value is None:
+            return None
+        result = tuple(json.loads(value))
+        if ttl and ttl > 0:
+            TOKEN_CACHE.put((token_hash,), result, ttl=ttl)
+        return result
+
+
+    @staticmethod
+    def _get_redis() -> redis.Redis:
+        global _redis
+        if _redis is None:
+            _redis = redis.Redis.from_url(BROKER_URL, socket_timeout=3)
+        return _redis
+
 
 class UaaAuthentication(authentication.BaseAuthentication):
     """
@@ -23,6 +127,10 @@ class UaaAuthentication(authentication.BaseAuthentication):
     keyword = 'Bearer'
 
 
+    def __init__(self):
+        self._cached_validate = CachedTokenValidator(self._request_userinfo)
+
+
     # TODO Revisit this place on how to handle logouts from UAA and TK side.
     def authenticate(self, request):
         auth = get_authorization_header(request).split()
@@ -38,14 +146,30 @@ class UaaAuthentication(authentication.BaseAuthentication):
             raise exceptions.AuthenticationFailed(msg)
 
         # Validate if token has expired
-        username, email, resp_json = self._validate_token(auth[1].decode(), request)
-        try:
-            user = User.objects.get(username=username, email=email)
-            return (user, None)
-
-        except User.DoesNotExist:
+        bearer_token = auth[1].decode()
+        username, email, resp_json = self._validate_token(bearer_token, request)
+        user = self._get_user(bearer_token, username, email)
+        if user is None:
             logging.getLogger(INFO_LOGGER).info(f"UaaAuthentication didn't find a matching user (OAuth tokens possibly expired) - username: {username} | email: {email} | resp_json: {resp_json}")
             raise exceptions.AuthenticationFailed(resp_json)
+        return (user, None)
+
+
+    @staticmethod
+    def _get_user(bearer_token: str, username: Optional[str], email: Optional[str]) -> Optional[User]:
+        """Fetches the user of a valid token by the primary key remembered for the token, matching the username and email only once per token."""
+        key = (get_token_hash(bearer_token),)
+        user_pk = USER_CACHE.get(key)
+        if user_pk is not None:
+            user = User.objects.filter(pk=user_pk).first()
+            if user is not None:
+                return user
+
+        user = User.objects.filter(username=username, email=email).first()
+        ttl = get_token_ttl(bearer_token, is_valid=True)
+        if user is not None and ttl > 0:
+            USER_CACHE.put(key, user.pk, ttl=ttl)
+        return user
 
 
     # TODO This place will give you an error in case the scopes have changed for the user, might need to refresh it in such cases.
@@ -53,6 +177,13 @@ class UaaAuthentication(authentication.BaseAuthentication):
     # UAA Response: "Some required "scope" are missing: [name_of_removed_scope]" HTTP 401.
     # Possible solution: if access token fails, try refresh token and if that also fails forcefully log out.
     def _validate_token(self, bearer_token: str, request):
+        return self._cached_validate(bearer_token)
+
+
+    def _request_userinfo(self, bearer_token: str):
+        """
+        :return: Username and email (None for rejected tokens) and the response of UAA.
+        """
         headers = {
             'Content-Type': 'application/x-www-form-urlencoded',
             'Accept': 'application/json',
@@ -67,7 +198,11 @@ class UaaAuthentication(authentication.BaseAuthentication):
         if resp.status_code == 200:
             return resp_json['user_name'], resp_json['email'], resp_json
 
-        return None, None, resp_json
+        # Only rejections of the token are remembered, errors of UAA itself are not.
+        if 400 <= resp.status_code < 500:
+            return None, None, resp_json
+
+        raise exceptions.AuthenticationFailed(resp_json)
 
 
     def authenticate_header(self, request):
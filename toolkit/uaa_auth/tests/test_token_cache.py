@@ -0,0 +1,117 @@
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import exceptions
+from rest_framework.test import APIRequestFactory
+
+from toolkit.tools.utils_for_tests import create_test_user
+from toolkit.uaa_auth.authentication import TOKEN_CACHE, USER_CACHE, UaaAuthentication
+
+
+def create_jwt(expires_in: float) -> str:
+    def encode(data: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode("utf8")).decode("utf8").rstrip("=")
+
+    return f"{encode({'alg': 'none'})}.{encode({'exp': time.time() + expires_in})}.signature"
+
+
+class FakeUaaHandler(BaseHTTPRequestHandler):
+    valid_tokens = set()
+    request_count = 0
+
+
+    def do_GET(self):
+        FakeUaaHandler.request_count += 1
+        token = self.headers["Authorization"].split()[1]
+        if token in FakeUaaHandler.valid_tokens:
+            status, body = 200, {"user_name": "uaa_user", "email": "uaa@email.com"}
+        else:
+            status, body = 401, {"error": "invalid_token"}
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(json.dumps(body).encode("utf8"))
+
+
+    def log_message(self, *args):
+        pass
+
+
+class UaaTokenCacheTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = HTTPServer(("localhost", 0), FakeUaaHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.userinfo_uri = f"http://localhost:{cls.server.server_port}/userinfo"
+
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+
+    def setUp(self):
+        self.user = create_test_user("uaa_user", "uaa@email.com", "pw")
+        TOKEN_CACHE.clear()
+        USER_CACHE.clear()
+        FakeUaaHandler.request_count = 0
+        FakeUaaHandler.valid_tokens = set()
+
+        patcher = mock.patch("toolkit.uaa_auth.authentication.UAA_USERINFO_URI", self.userinfo_uri)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+    def _authenticate(self, token: str):
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        return UaaAuthentication().authenticate(request)
+
+
+    def test_valid_token_is_validated_only_once(self):
+        token = create_jwt(expires_in=3600)
+        FakeUaaHandler.valid_tokens.add(token)
+        for _ in range(5):
+            user, _ = self._authenticate(token)
+            self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(FakeUaaHandler.request_count, 1)
+        self.assertGreater(TOKEN_CACHE.stats()["hit_ratio"], 0.5)
+
+
+    def test_invalid_token_is_cached_negatively(self):
+        token = create_jwt(expires_in=3600)
+        for _ in range(3):
+            with self.assertRaises(exceptions.AuthenticationFailed):
+                self._authenticate(token)
+        self.assertEqual(FakeUaaHandler.request_count, 1)
+
+
+    def test_expired_token_is_not_cached(self):
+        token = create_jwt(expires_in=-10)
+        FakeUaaHandler.valid_tokens.add(token)
+        self._authenticate(token)
+        self._authenticate(token)
+        self.assertEqual(FakeUaaHandler.request_count, 2)
+
+
+    def test_user_is_fetched_by_primary_key_after_the_first_request(self):
+        token = create_jwt(expires_in=3600)
+        FakeUaaHandler.valid_tokens.add(token)
+        self._authenticate(token)
+
+        with CaptureQueriesContext(connection) as queries:
+            user, _ = self._authenticate(token)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("username", queries[0]["sql"].split("WHERE")[1])